@@ -27,6 +27,35 @@ class Settings(BaseSettings):
     DEFAULT_LIMIT: int = 1000
     MAX_LIMIT: int = 10000
     H3_RESOLUTION: int = 5
+    DEFAULT_COUNT_MODE: str = "metadata"
+    SIMPLIFY_PIXEL_TOLERANCE: float = 0.5
+    MAX_BATCH_QUERIES: int = 16
+    MAX_INTERSECTS_VERTICES: int = 10000
+    JOIN_RING_SIZE: int = 1
+    JOIN_MAX_RING_SIZE: int = 10
+    NEAREST_MAX_K: int = 1000
+    NEAREST_MAX_RING_SIZE: int = 32
+    
+    # Admission control
+    MAX_CONCURRENT_QUERIES: int = 4
+    MAX_QUERIES_PER_CLIENT: int = 2
+    # Key per-client limits on X-Forwarded-For; enable only behind a proxy that sets it
+    TRUST_FORWARDED_FOR: bool = False
+    QUERY_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    QUERY_TIMEOUT_SECONDS: float = 30.0
+    QUERY_RETRY_AFTER_SECONDS: int = 5
+    QUERY_MAX_SCAN_ROWS: int = 50_000_000
+    QUERY_MAX_SCAN_FILES: int = 10_000
+    QUERY_DOWNGRADE_SCAN_ROWS: int = 5_000_000
+    QUERY_DOWNGRADE_LIMIT: int = 1000
+    METADATA_CACHE_TTL_SECONDS: int = 60
+    
+    # Bulk export configuration (local directory or s3:// prefix)
+    EXPORT_LOCATION: str = os.getenv("EXPORT_LOCATION", "/tmp/exports")
+    EXPORT_WORKERS: int = 2
+    # Finished jobs (and their outputs) are deleted after the TTL, oldest first beyond the cap
+    EXPORT_JOB_TTL_SECONDS: int = 86400
+    EXPORT_MAX_JOBS: int = 1000
     
     # DuckDB configuration
     DUCKDB_THREADS: int = 2
@@ -35,6 +64,16 @@ class Settings(BaseSettings):
     # Feature flags
     ENABLE_GEOARROW: bool = True
     ENABLE_DIRECT_S3_ACCESS: bool = False
+    ENABLE_QUERY_PROFILING: bool = False
+    ENABLE_METRICS: bool = True
+    
+    # Response compression
+    ENABLE_COMPRESSION: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    GZIP_LEVEL: int = 5
+    ZSTD_LEVEL: int = 3
+    BROTLI_QUALITY: int = 4
+    ARROW_IPC_COMPRESSION: Optional[str] = None
     
     class Config:
         env_file = ".env"
@@ -3,21 +3,211 @@ DuckDB client for querying Iceberg tables via Polaris catalog
 """
 import duckdb
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable, Set
 from contextlib import contextmanager
+from functools import lru_cache
 import h3
 import json
+import math
+import threading
+import time
 
 from app.config import settings
+from app import metrics
+from app.iceberg_catalog import get_iceberg_client
+from app.params import DatetimeFilter
 
 logger = logging.getLogger(__name__)
 
 
+GEOPARQUET_METADATA = json.dumps({
+    "version": "1.0.0",
+    "primary_column": "geometry",
+    "columns": {"geometry": {"encoding": "WKB", "geometry_types": []}}
+})
+
+
+# Prefix of ETL-precomputed simplified geometry columns, e.g. geometry_z6
+SIMPLIFIED_GEOMETRY_PREFIX = "geometry_z"
+
+
+def zoom_to_tolerance(zoom: float) -> float:
+    """Simplification tolerance in degrees for a web map zoom level"""
+    degrees_per_pixel = 360.0 / (256 * 2 ** zoom)
+    return degrees_per_pixel * settings.SIMPLIFY_PIXEL_TOLERANCE
+
+
+def geometry_sql(
+    geom_column: str = "geometry",
+    precision: Optional[int] = None,
+    simplify_tolerance: Optional[float] = None
+) -> str:
+    """
+    SQL expression for a WKB geometry column
+    
+    With a tolerance, geometries are simplified with topology preserved; with a
+    precision, coordinates are snapped to a 10^-precision grid in DuckDB, which
+    also drops vertices that collapse onto each other.
+    """
+    geometry = f"ST_GeomFromWKB({geom_column})"
+    if simplify_tolerance:
+        geometry = f"ST_SimplifyPreserveTopology({geometry}, {simplify_tolerance!r})"
+    if precision is not None:
+        geometry = f"ST_ReducePrecision({geometry}, {10.0 ** -precision!r})"
+    return geometry
+
+
+# Spatial join predicates between the left (l) and right (r) geometries
+JOIN_PREDICATES = {
+    "intersects": "ST_Intersects({left}, {right})",
+    "contains": "ST_Contains({left}, {right})",
+    "within": "ST_Within({left}, {right})",
+    "dwithin": "ST_DWithin({left}, {right}, {distance!r})",
+}
+
+# Kilometres per degree of latitude; an upper bound for a degree of longitude
+KM_PER_DEGREE = 111.32
+
+
+def join_ring_size(distance: Optional[float], ring: int, resolution: int, extent: float = 0.0) -> int:
+    """
+    H3 grid distance between the centroid cells of two features that may satisfy a join
+    
+    Two features within `distance` of each other have centroids at most
+    `extent` (half the sum of their largest bbox diagonals, in degrees) plus
+    `distance` apart; enough rings are added to reach every cell that far
+    away. `ring` is a margin for centroids lying off their cell's center.
+    """
+    reach = (distance or 0.0) + extent
+    if reach <= 0:
+        return ring
+    edge_degrees = h3.average_hexagon_edge_length(resolution, unit="km") / KM_PER_DEGREE
+    return ring + math.ceil(reach / edge_degrees)
+
+
+def expand_cells(cells: List[str], k: int) -> List[str]:
+    """All H3 cells within k grid steps of the given cells"""
+    return sorted({neighbor for cell in cells for neighbor in h3.grid_disk(cell, k)})
+
+
+def nearest_safe_ring(distance_m: float, resolution: int) -> int:
+    """
+    Smallest grid disk guaranteed to hold every centroid within distance_m of its center cell
+    
+    Reaching a cell k rings out means crossing k - 1 whole cells, each at least
+    sqrt(3) edge lengths across; half of that, with the average edge length,
+    absorbs H3's variation in cell size, and one more ring adds margin.
+    """
+    min_crossing_m = h3.average_hexagon_edge_length(resolution, unit="m") * math.sqrt(3) / 2
+    return math.ceil(distance_m / min_crossing_m) + 1
+
+
+def sql_literal(value: Any) -> str:
+    """Render a Python scalar as a SQL literal"""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def bbox_to_polygon(bbox: Tuple[float, float, float, float]) -> Dict[str, Any]:
+    """GeoJSON polygon for a minx,miny,maxx,maxy bbox"""
+    minx, miny, maxx, maxy = bbox
+    return {
+        "type": "Polygon",
+        "coordinates": [[
+            [minx, miny],
+            [maxx, miny],
+            [maxx, maxy],
+            [minx, maxy],
+            [minx, miny]
+        ]]
+    }
+
+
+def geometry_positions(coordinates: Any):
+    """Yield every [x, y] position in nested GeoJSON coordinates"""
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        yield coordinates
+        return
+    for part in coordinates:
+        yield from geometry_positions(part)
+
+
+# Longest ring edge (degrees of longitude) handed to H3, which reads longer
+# edges as crossing the antimeridian
+MAX_RING_EDGE_DEGREES = 90.0
+
+
+def _densify_ring(ring: List[List[float]]) -> List[List[float]]:
+    """Split ring edges spanning more than MAX_RING_EDGE_DEGREES of longitude"""
+    densified = [ring[0]]
+    for (x0, y0, *_), (x1, y1, *_) in zip(ring, ring[1:]):
+        steps = max(1, math.ceil(abs(x1 - x0) / MAX_RING_EDGE_DEGREES))
+        densified.extend([x0 + (x1 - x0) * i / steps, y0 + (y1 - y0) * i / steps] for i in range(1, steps + 1))
+    return densified
+
+
+def _line_cells(line: List[List[float]], resolution: int) -> Set[str]:
+    """Cells crossed by a line, sampled at a quarter of the cell edge length"""
+    step = h3.average_hexagon_edge_length(resolution, unit="km") / KM_PER_DEGREE / 4
+    cells = set()
+    for (x0, y0, *_), (x1, y1, *_) in zip(line, line[1:]):
+        steps = max(1, math.ceil(math.hypot(x1 - x0, y1 - y0) / step))
+        cells.update(
+            h3.latlng_to_cell(y0 + (y1 - y0) * i / steps, x0 + (x1 - x0) * i / steps, resolution)
+            for i in range(steps + 1)
+        )
+    return cells
+
+
+@lru_cache(maxsize=1024)
+def _geometry_to_h3_cells(geometry_json: str, resolution: int) -> Tuple[str, ...]:
+    """
+    Compute (and cache) the H3 covering of a GeoJSON geometry
+    
+    Features are partitioned by the cell of their centroid, so the covering
+    holds every cell that overlaps the geometry: polygons get all cells
+    touching them (not only those whose center is inside), lines every cell
+    they cross, and every vertex its own cell.
+    """
+    geometry = json.loads(geometry_json)
+    try:
+        with metrics.stage(metrics.STAGE_H3_COVERING):
+            cells = set()
+            geometry_type = geometry["type"]
+            coordinates = geometry["coordinates"]
+            if geometry_type in ("Polygon", "MultiPolygon"):
+                polygons = [coordinates] if geometry_type == "Polygon" else coordinates
+                shape = h3.geo_to_h3shape({
+                    "type": "MultiPolygon",
+                    "coordinates": [[_densify_ring(ring) for ring in polygon] for polygon in polygons]
+                })
+                cells.update(h3.h3shape_to_cells_experimental(shape, resolution, contain="overlap"))
+            elif geometry_type in ("LineString", "MultiLineString"):
+                lines = [coordinates] if geometry_type == "LineString" else coordinates
+                for line in lines:
+                    cells.update(_line_cells(line, resolution))
+            for position in geometry_positions(coordinates):
+                cells.add(h3.latlng_to_cell(position[1], position[0], resolution))
+        return tuple(sorted(cells))
+    except Exception as e:
+        logger.warning(f"Error converting geometry to H3 cells: {e}")
+        return ()
+
+
 class DuckDBClient:
     """DuckDB client with Iceberg and spatial support"""
     
     def __init__(self):
         self.connection = None
+        self._catalog_lock = threading.Lock()
+        self._catalog_cache: Dict[Tuple[str, ...], Tuple[float, Any]] = {}
+        # Largest feature extent per (table, snapshot); a snapshot's data never changes
+        self._extent_cache: Dict[Tuple[str, Optional[int]], float] = {}
         self._initialize_connection()
     
     def _initialize_connection(self):
@@ -64,9 +254,27 @@ class DuckDBClient:
             logger.error(f"Failed to initialize DuckDB: {e}", exc_info=True)
             raise
     
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        """Open a cursor on the shared database so queries can run (and be interrupted) independently"""
+        return self.connection.cursor()
+    
+    def _cached_catalog_lookup(self, key: Tuple[str, ...], loader: Callable[[], Any]) -> Any:
+        """Return a catalog lookup result, reloading it after METADATA_CACHE_TTL_SECONDS"""
+        now = time.monotonic()
+        with self._catalog_lock:
+            cached = self._catalog_cache.get(key)
+            if cached and now - cached[0] < settings.METADATA_CACHE_TTL_SECONDS:
+                return cached[1]
+        
+        value = loader()
+        
+        with self._catalog_lock:
+            self._catalog_cache[key] = (now, value)
+        return value
+    
     def list_tables(self) -> List[str]:
         """List all tables in the catalog"""
-        try:
+        def load():
             query = f"""
             SELECT table_name 
             FROM {settings.POLARIS_CATALOG}.information_schema.tables
@@ -74,20 +282,32 @@ class DuckDBClient:
             """
             result = self.connection.execute(query).fetchall()
             return [row[0] for row in result]
+        
+        try:
+            return self._cached_catalog_lookup(("tables",), load)
         except Exception as e:
             logger.error(f"Error listing tables: {e}")
             return []
     
-    def get_table_schema(self, table_name: str) -> List[Dict[str, str]]:
-        """Get schema for a table"""
-        try:
+    def get_table_schema(
+        self,
+        table_name: str,
+        cursor: Optional[duckdb.DuckDBPyConnection] = None
+    ) -> List[Dict[str, str]]:
+        """Get schema for a table; pass the query's cursor when called off the event loop"""
+        conn = cursor or self.connection
+        
+        def load():
             query = f"""
             SELECT column_name, data_type
             FROM {settings.POLARIS_CATALOG}.information_schema.columns
             WHERE table_schema = 'default' AND table_name = '{table_name}'
             """
-            result = self.connection.execute(query).fetchall()
+            result = conn.execute(query).fetchall()
             return [{"name": row[0], "type": row[1]} for row in result]
+        
+        try:
+            return self._cached_catalog_lookup(("schema", table_name), load)
         except Exception as e:
             logger.error(f"Error getting schema for {table_name}: {e}")
             return []
@@ -111,82 +331,308 @@ class DuckDBClient:
             logger.warning(f"Could not compute extent for {table_name}: {e}")
             return None
     
+    def get_max_feature_extent(self, table_name: str, cursor: Optional[duckdb.DuckDBPyConnection] = None) -> float:
+        """
+        Largest bbox diagonal of any feature in a table, in degrees
+        
+        Read from the ETL's column statistics when they describe the current
+        snapshot, else computed with one scan and cached for the snapshot.
+        """
+        snapshot_id = None
+        try:
+            stats = get_iceberg_client().get_table_stats(table_name)
+            snapshot_id = stats.snapshot_id
+            geometry = stats.columns.get("geometry")
+            if geometry is not None and geometry.max_extent is not None:
+                return geometry.max_extent
+        except Exception as e:
+            logger.warning(f"Could not read geometry statistics of {table_name}: {e}")
+        
+        key = (table_name, snapshot_id)
+        with self._catalog_lock:
+            if key in self._extent_cache:
+                return self._extent_cache[key]
+        
+        conn = cursor or self.connection
+        query = f"""
+        SELECT MAX(sqrt(
+            power(ST_XMax(g) - ST_XMin(g), 2) + power(ST_YMax(g) - ST_YMin(g), 2)
+        ))
+        FROM (SELECT ST_GeomFromWKB(geometry) AS g FROM {settings.POLARIS_CATALOG}.default.{table_name})
+        """
+        extent = conn.execute(query).fetchone()[0] or 0.0
+        
+        with self._catalog_lock:
+            self._extent_cache[key] = extent
+        return extent
+    
+    def get_simplified_geometry_columns(
+        self,
+        table_name: str,
+        cursor: Optional[duckdb.DuckDBPyConnection] = None
+    ) -> Dict[int, str]:
+        """Precomputed simplified geometry columns keyed by the zoom level they target"""
+        columns = {}
+        for column in self.get_table_schema(table_name, cursor=cursor):
+            suffix = column["name"][len(SIMPLIFIED_GEOMETRY_PREFIX):]
+            if column["name"].startswith(SIMPLIFIED_GEOMETRY_PREFIX) and suffix.isdigit():
+                columns[int(suffix)] = column["name"]
+        return columns
+    
     def bbox_to_h3_cells(self, bbox: Tuple[float, float, float, float]) -> List[str]:
         """Convert bbox to H3 cells for partition pruning"""
-        minx, miny, maxx, maxy = bbox
+        return self.geometry_to_h3_cells(bbox_to_polygon(bbox))
+    
+    def geometry_to_h3_cells(self, geometry: Dict[str, Any]) -> List[str]:
+        """Convert a GeoJSON geometry to H3 cells for partition pruning"""
+        return list(_geometry_to_h3_cells(json.dumps(geometry, sort_keys=True), settings.H3_RESOLUTION))
+    
+    def partition_resolutions(self, table_name: str) -> Set[int]:
+        """H3 resolutions of a table's h3_cell partitions; the configured resolution if unknown"""
+        try:
+            resolutions = get_iceberg_client().get_table_stats(table_name).partition_resolutions
+        except Exception as e:
+            logger.warning(f"Could not load partition resolutions of {table_name}: {e}")
+            resolutions = set()
+        return resolutions or {settings.H3_RESOLUTION}
+    
+    def partition_cells(self, table_name: str, cells: List[str], resolution: Optional[int] = None) -> List[str]:
+        """
+        Map cells at `resolution` (default H3_RESOLUTION) to the h3_cell partition values of a table
         
-        # Create polygon from bbox
-        coords = [
-            [minx, miny],
-            [maxx, miny],
-            [maxx, maxy],
-            [minx, maxy],
-            [minx, miny]
-        ]
+        Tables loaded with adaptive partitioning mix resolutions, so the
+        partition values are found from the manifests.
+        """
+        resolution = settings.H3_RESOLUTION if resolution is None else resolution
+        if self.partition_resolutions(table_name) == {resolution}:
+            return cells
+        stats = get_iceberg_client().get_table_stats(table_name)
+        # Nothing matching in the manifests: keep the covering, which selects no partitions
+        return stats.covering_partitions(cells, resolution) or cells
+    
+    def join_resolution(self, left_table: str, right_table: str) -> int:
+        """Resolution a join matches cells at: the coarsest partition resolution of either table"""
+        resolutions = self.partition_resolutions(left_table) | self.partition_resolutions(right_table)
+        return min(resolutions | {settings.H3_RESOLUTION})
+    
+    def join_right_cells(
+        self,
+        right_table: str,
+        bbox: Tuple[float, float, float, float],
+        k: int,
+        resolution: int
+    ) -> List[str]:
+        """
+        Right-hand partitions a bbox-filtered join can reach
         
-        # Get H3 cells covering the polygon
-        # Note: h3.polygon_to_cells expects GeoJSON polygon format
-        try:
-            cells = h3.polygon_to_cells(
-                {"type": "Polygon", "coordinates": [coords]},
-                settings.H3_RESOLUTION
+        The bbox covering is coarsened to the join resolution and expanded by
+        the k rings the join searches at that resolution.
+        """
+        covering = {h3.cell_to_parent(cell, resolution) for cell in self.bbox_to_h3_cells(bbox)}
+        return self.partition_cells(right_table, expand_cells(sorted(covering), k), resolution)
+    
+    def spatial_filter_cells(
+        self,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        intersects: Optional[Dict[str, Any]] = None,
+        table_name: Optional[str] = None
+    ) -> Optional[List[str]]:
+        """
+        H3 cells that can hold features matching both a bbox and an intersects geometry
+        
+        With a table name, the cells are mapped to that table's partition values.
+        """
+        coverings = []
+        if bbox:
+            coverings.append(self.bbox_to_h3_cells(bbox))
+        if intersects:
+            coverings.append(self.geometry_to_h3_cells(intersects))
+        
+        # An empty covering means it could not be computed, not that nothing matches
+        coverings = [set(cells) for cells in coverings if cells]
+        if not coverings:
+            return None
+        cells = sorted(set.intersection(*coverings))
+        if table_name and cells:
+            cells = self.partition_cells(table_name, cells)
+        return cells
+    
+    def get_feature_geometry(
+        self,
+        table_name: str,
+        feature_id: Any,
+        cursor: Optional[duckdb.DuckDBPyConnection] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Get the GeoJSON geometry of a feature by id"""
+        conn = cursor or self.connection
+        query = f"""
+        SELECT ST_AsGeoJSON(ST_GeomFromWKB(geometry))
+        FROM {settings.POLARIS_CATALOG}.default.{table_name}
+        WHERE id = {sql_literal(feature_id)}
+        LIMIT 1
+        """
+        with metrics.stage(metrics.STAGE_EXECUTION):
+            row = conn.execute(query).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(str(row[0]))
+    
+    def _build_where_clause(
+        self,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        geom_column: str = "geometry",
+        h3_cells: Optional[List[str]] = None,
+        datetime_filter: Optional[DatetimeFilter] = None,
+        property_filters: Optional[Dict[str, Any]] = None,
+        intersects: Optional[Dict[str, Any]] = None,
+        table_name: Optional[str] = None
+    ) -> str:
+        """Build the WHERE clause for a feature query, optionally restricted to given H3 cells"""
+        where_clauses = []
+        
+        if bbox or intersects:
+            # Convert bbox / geometry to the table's H3 partition cells for pruning
+            if h3_cells is None:
+                h3_cells = self.spatial_filter_cells(bbox, intersects, table_name)
+            if h3_cells:
+                cells_str = "', '".join(h3_cells)
+                where_clauses.append(f"h3_cell IN ('{cells_str}')")
+        
+        if intersects:
+            where_clauses.append(
+                f"ST_Intersects(ST_GeomFromWKB({geom_column}), ST_GeomFromGeoJSON({sql_literal(json.dumps(intersects))}))"
             )
-            return list(cells)
-        except Exception as e:
-            logger.warning(f"Error converting bbox to H3 cells: {e}")
-            return []
+        
+        if bbox:
+            # Add spatial filter
+            minx, miny, maxx, maxy = bbox
+            bbox_wkt = f"POLYGON(({minx} {miny}, {maxx} {miny}, {maxx} {maxy}, {minx} {maxy}, {minx} {miny}))"
+            where_clauses.append(
+                f"ST_Intersects(ST_GeomFromWKB({geom_column}), ST_GeomFromText('{bbox_wkt}'))"
+            )
+        
+        if datetime_filter:
+            # Plain range predicates on the raw column so DuckDB can prune
+            # time partitions and skip row groups using Parquet min/max statistics
+            if datetime_filter.start:
+                where_clauses.append(f"{datetime_filter.column} >= TIMESTAMP '{datetime_filter.start.isoformat()}'")
+            if datetime_filter.end:
+                where_clauses.append(f"{datetime_filter.column} <= TIMESTAMP '{datetime_filter.end.isoformat()}'")
+        
+        if property_filters:
+            for column, value in property_filters.items():
+                where_clauses.append(f"{column} = {sql_literal(value)}")
+        
+        return " AND ".join(where_clauses) if where_clauses else "1=1"
     
-    def query_features(
+    def build_features_query(
         self,
         table_name: str,
         bbox: Optional[Tuple[float, float, float, float]] = None,
         limit: int = 1000,
         offset: int = 0,
         properties: Optional[List[str]] = None,
-        geom_column: str = "geometry"
-    ) -> List[Dict[str, Any]]:
-        """Query features from a table"""
-        try:
-            # Build SELECT clause
+        geom_column: str = "geometry",
+        datetime_filter: Optional[DatetimeFilter] = None,
+        precision: Optional[int] = None,
+        simplify_tolerance: Optional[float] = None,
+        exclude_columns: Optional[List[str]] = None,
+        intersects: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Build the SQL for a GeoJSON feature query"""
+        with metrics.stage(metrics.STAGE_PLANNING):
+            # Build SELECT clause; WKB columns are never needed as properties
             if properties:
                 select_cols = ", ".join(properties)
             else:
-                select_cols = "*"
+                excluded = ["geometry"] + list(exclude_columns or [])
+                select_cols = f"* EXCLUDE ({', '.join(excluded)})"
             
-            # Build WHERE clause
-            where_clauses = []
+            # Spatial filtering always runs on the full-resolution geometry
+            where_clause = self._build_where_clause(
+                bbox, datetime_filter=datetime_filter, intersects=intersects, table_name=table_name
+            )
             
-            if bbox:
-                # Convert bbox to H3 cells for partition pruning
-                h3_cells = self.bbox_to_h3_cells(bbox)
-                if h3_cells:
-                    cells_str = "', '".join(h3_cells)
-                    where_clauses.append(f"h3_cell IN ('{cells_str}')")
-                
-                # Add spatial filter
-                minx, miny, maxx, maxy = bbox
-                bbox_wkt = f"POLYGON(({minx} {miny}, {maxx} {miny}, {maxx} {maxy}, {minx} {maxy}, {minx} {miny}))"
-                where_clauses.append(
-                    f"ST_Intersects(ST_GeomFromWKB({geom_column}), ST_GeomFromText('{bbox_wkt}'))"
-                )
+            return f"""
+            SELECT {select_cols},
+                   ST_AsGeoJSON({geometry_sql(geom_column, precision, simplify_tolerance)}) as geom_json
+            FROM {settings.POLARIS_CATALOG}.default.{table_name}
+            WHERE {where_clause}
+            LIMIT {limit}
+            OFFSET {offset}
+            """
+    
+    def build_features_arrow_query(
+        self,
+        table_name: str,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        limit: int = 1000,
+        offset: int = 0,
+        datetime_filter: Optional[DatetimeFilter] = None,
+        precision: Optional[int] = None,
+        simplify_tolerance: Optional[float] = None,
+        geom_column: str = "geometry",
+        exclude_columns: Optional[List[str]] = None,
+        properties: Optional[List[str]] = None,
+        intersects: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Build the SQL for an Arrow feature query"""
+        with metrics.stage(metrics.STAGE_PLANNING):
+            where_clause = self._build_where_clause(
+                bbox, datetime_filter=datetime_filter, intersects=intersects, table_name=table_name
+            )
             
-            where_clause = " AND ".join(where_clauses) if where_clauses else "1=1"
+            transformed = precision is not None or simplify_tolerance or geom_column != "geometry"
+            if properties:
+                geometry = "geometry"
+                if transformed:
+                    geometry = f"ST_AsWKB({geometry_sql(geom_column, precision, simplify_tolerance)})"
+                select_cols = ", ".join([*properties, f"{geometry} AS geometry"])
+            else:
+                select_cols = "*"
+                if exclude_columns:
+                    select_cols += f" EXCLUDE ({', '.join(exclude_columns)})"
+                if transformed:
+                    geometry = geometry_sql(geom_column, precision, simplify_tolerance)
+                    select_cols += f" REPLACE (ST_AsWKB({geometry}) AS geometry)"
             
-            # Build query
-            query = f"""
-            SELECT {select_cols},
-                   ST_AsText(ST_GeomFromWKB({geom_column})) as geom_wkt
+            return f"""
+            SELECT {select_cols}
             FROM {settings.POLARIS_CATALOG}.default.{table_name}
             WHERE {where_clause}
             LIMIT {limit}
             OFFSET {offset}
             """
+    
+    def query_features(
+        self,
+        table_name: str,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        limit: int = 1000,
+        offset: int = 0,
+        properties: Optional[List[str]] = None,
+        geom_column: str = "geometry",
+        datetime_filter: Optional[DatetimeFilter] = None,
+        precision: Optional[int] = None,
+        simplify_tolerance: Optional[float] = None,
+        exclude_columns: Optional[List[str]] = None,
+        intersects: Optional[Dict[str, Any]] = None,
+        cursor: Optional[duckdb.DuckDBPyConnection] = None
+    ) -> List[Dict[str, Any]]:
+        """Query features from a table"""
+        conn = cursor or self.connection
+        try:
+            query = self.build_features_query(
+                table_name, bbox, limit, offset, properties, geom_column, datetime_filter,
+                precision, simplify_tolerance, exclude_columns, intersects
+            )
             
-            logger.info(f"Executing query: {query}")
-            result = self.connection.execute(query).fetchall()
+            logger.debug(f"Executing query: {query}")
+            with metrics.stage(metrics.STAGE_EXECUTION):
+                result = conn.execute(query).fetchall()
             
             # Get column names
-            columns = [desc[0] for desc in self.connection.description]
+            columns = [desc[0] for desc in conn.description]
             
             # Convert to list of dicts
             features = []
@@ -205,40 +651,432 @@ class DuckDBClient:
         table_name: str,
         bbox: Optional[Tuple[float, float, float, float]] = None,
         limit: int = 1000,
-        offset: int = 0
+        offset: int = 0,
+        datetime_filter: Optional[DatetimeFilter] = None,
+        precision: Optional[int] = None,
+        simplify_tolerance: Optional[float] = None,
+        geom_column: str = "geometry",
+        exclude_columns: Optional[List[str]] = None,
+        properties: Optional[List[str]] = None,
+        intersects: Optional[Dict[str, Any]] = None,
+        cursor: Optional[duckdb.DuckDBPyConnection] = None
     ):
         """Query features and return as Arrow table"""
+        conn = cursor or self.connection
         try:
-            where_clauses = []
+            query = self.build_features_arrow_query(
+                table_name, bbox, limit, offset, datetime_filter, precision,
+                simplify_tolerance, geom_column, exclude_columns, properties, intersects
+            )
             
-            if bbox:
-                h3_cells = self.bbox_to_h3_cells(bbox)
-                if h3_cells:
-                    cells_str = "', '".join(h3_cells)
-                    where_clauses.append(f"h3_cell IN ('{cells_str}')")
+            logger.debug(f"Executing Arrow query: {query}")
+            with metrics.stage(metrics.STAGE_EXECUTION):
+                return conn.execute(query).arrow()
+            
+        except Exception as e:
+            logger.error(f"Error querying Arrow features: {e}", exc_info=True)
+            return None
+    
+    def count_features(
+        self,
+        table_name: str,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        mode: str = "metadata",
+        datetime_filter: Optional[DatetimeFilter] = None,
+        intersects: Optional[Dict[str, Any]] = None,
+        cursor: Optional[duckdb.DuckDBPyConnection] = None
+    ) -> Optional[int]:
+        """
+        Count features matching a query
+        
+        Modes:
+            none: skip counting
+            exact: COUNT(*) over the filtered table
+            metadata: manifest record counts for partitions fully inside the bbox,
+                      exact counts only for boundary cells (exact when filtering
+                      by datetime or an intersects geometry)
+        """
+        if mode == "none":
+            return None
+        
+        conn = cursor or self.connection
+        try:
+            with metrics.stage(metrics.STAGE_COUNT):
+                if mode == "metadata" and datetime_filter is None and intersects is None:
+                    count = self._count_from_metadata(table_name, bbox, conn)
+                    if count is not None:
+                        return count
                 
-                minx, miny, maxx, maxy = bbox
-                bbox_wkt = f"POLYGON(({minx} {miny}, {maxx} {miny}, {maxx} {maxy}, {minx} {maxy}, {minx} {miny}))"
-                where_clauses.append(
-                    f"ST_Intersects(ST_GeomFromWKB(geometry), ST_GeomFromText('{bbox_wkt}'))"
+                where_clause = self._build_where_clause(
+                    bbox, datetime_filter=datetime_filter, intersects=intersects, table_name=table_name
                 )
-            
-            where_clause = " AND ".join(where_clauses) if where_clauses else "1=1"
-            
-            query = f"""
-            SELECT *
+                return self._count_where(conn, table_name, where_clause)
+        
+        except Exception as e:
+            logger.error(f"Error counting features in {table_name}: {e}", exc_info=True)
+            return None
+    
+    def _count_from_metadata(
+        self,
+        table_name: str,
+        bbox: Optional[Tuple[float, float, float, float]],
+        conn: duckdb.DuckDBPyConnection
+    ) -> Optional[int]:
+        """Count using manifest statistics; returns None when they cannot answer exactly"""
+        try:
+            stats = get_iceberg_client().get_table_stats(table_name)
+        except Exception as e:
+            logger.warning(f"Could not load metadata counts for {table_name}: {e}")
+            return None
+        
+        # Manifest record counts do not account for delete files
+        if stats.has_deletes:
+            return None
+        
+        if not bbox:
+            return stats.record_count
+        
+        # Files outside the h3_cell partitioning would need a full scan
+        if None in stats.partitions:
+            return None
+        
+        # Without a covering the page query is not H3-filtered either; count exactly
+        cells = self.spatial_filter_cells(bbox, table_name=table_name)
+        if not cells:
+            return None
+        
+        minx, miny, maxx, maxy = bbox
+        interior, boundary = [], []
+        for cell in cells:
+            if cell not in stats.partitions:
+                continue
+            # Every feature in a cell fully inside the bbox has its centroid inside the bbox
+            vertices = h3.cell_to_boundary(cell)
+            if all(minx <= lng <= maxx and miny <= lat <= maxy for lat, lng in vertices):
+                interior.append(cell)
+            else:
+                boundary.append(cell)
+        
+        count = sum(stats.partitions[cell].record_count for cell in interior)
+        if boundary:
+            where_clause = self._build_where_clause(bbox, h3_cells=boundary)
+            count += self._count_where(conn, table_name, where_clause)
+        return count
+    
+    def _count_where(self, conn: duckdb.DuckDBPyConnection, table_name: str, where_clause: str) -> int:
+        query = f"""
+        SELECT COUNT(*)
+        FROM {settings.POLARIS_CATALOG}.default.{table_name}
+        WHERE {where_clause}
+        """
+        return conn.execute(query).fetchone()[0]
+    
+    def export_features(
+        self,
+        table_name: str,
+        destination: str,
+        fmt: str = "geoparquet",
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        datetime_filter: Optional[DatetimeFilter] = None,
+        properties: Optional[List[str]] = None,
+        property_filters: Optional[Dict[str, Any]] = None,
+        cursor: Optional[duckdb.DuckDBPyConnection] = None
+    ) -> int:
+        """
+        Write all matching features to a GeoParquet or FlatGeobuf file in a single scan
+        
+        Returns the number of rows written.
+        """
+        conn = cursor or self.connection
+        where_clause = self._build_where_clause(
+            bbox, datetime_filter=datetime_filter, property_filters=property_filters, table_name=table_name
+        )
+        if properties:
+            columns = ", ".join(properties)
+        else:
+            excluded = ["geometry", "h3_cell"] + list(self.get_simplified_geometry_columns(table_name, conn).values())
+            columns = f"* EXCLUDE ({', '.join(excluded)})"
+        
+        if fmt == "flatgeobuf":
+            select_sql = f"SELECT {columns}, ST_GeomFromWKB(geometry) AS geometry"
+            options = "FORMAT GDAL, DRIVER 'FlatGeobuf'"
+        else:
+            # Geometry stays WKB; the `geo` footer metadata makes the file valid GeoParquet
+            select_sql = f"SELECT {columns}, geometry"
+            options = f"FORMAT PARQUET, COMPRESSION ZSTD, KV_METADATA {{geo: '{GEOPARQUET_METADATA}'}}"
+        
+        query = f"""
+        COPY (
+            {select_sql}
             FROM {settings.POLARIS_CATALOG}.default.{table_name}
             WHERE {where_clause}
+        ) TO '{destination}' ({options})
+        """
+        logger.info(f"Exporting {table_name} to {destination}")
+        logger.debug(f"Executing export: {query}")
+        return conn.execute(query).fetchone()[0]
+    
+    def build_join_query(
+        self,
+        left_table: str,
+        right_table: str,
+        predicate: str = "intersects",
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        distance: Optional[float] = None,
+        ring: int = 1,
+        extent: float = 0.0,
+        limit: int = 1000,
+        offset: int = 0,
+        left_properties: Optional[List[str]] = None,
+        right_properties: Optional[List[str]] = None,
+        precision: Optional[int] = None,
+        arrow: bool = False,
+        cursor: Optional[duckdb.DuckDBPyConnection] = None
+    ) -> str:
+        """
+        Build the SQL for a spatial join between two collections
+        
+        Both tables carry the h3_cell partition column, so each left feature is
+        paired only with right features whose cell lies within a few grid steps
+        of its own: an equi-join on h3_cell instead of a cartesian product. When
+        either table mixes partition resolutions, both sides join on their
+        ancestors at the coarsest one. With a bbox, the left side is filtered as
+        in an items query and the right side is pruned to the partitions around
+        its covering. `extent` is half the sum of the two tables' largest feature
+        diagonals (see join_ring_size). Right-hand properties are returned as
+        "{right_table}.{name}", leaving out its geometry and h3_cell partition
+        columns by default. Schema lookups run on `cursor` when given.
+        """
+        with metrics.stage(metrics.STAGE_PLANNING):
+            resolutions = self.partition_resolutions(left_table) | self.partition_resolutions(right_table)
+            join_resolution = min(resolutions | {settings.H3_RESOLUTION})
+            k = join_ring_size(distance, ring, join_resolution, extent)
+            
+            left_where = self._build_where_clause(bbox, table_name=left_table)
+            right_where = "1=1"
+            if bbox:
+                nearby = self.join_right_cells(right_table, bbox, k, join_resolution)
+                if nearby:
+                    right_where = f"h3_cell IN ({', '.join(sql_literal(c) for c in nearby)})"
+            
+            if resolutions == {join_resolution}:
+                left_key, right_key = "h3_cell", "r.h3_cell"
+            else:
+                left_key = f"h3_cell_to_parent(h3_cell, {join_resolution})"
+                right_key = f"h3_cell_to_parent(r.h3_cell, {join_resolution})"
+            
+            if left_properties:
+                left_cols = [f'l."{name}"' for name in left_properties]
+            else:
+                excluded = ["geometry", "join_cell"] + list(self.get_simplified_geometry_columns(left_table, cursor).values())
+                left_cols = [f"l.* EXCLUDE ({', '.join(excluded)})"]
+            
+            if right_properties is None:
+                simplified = set(self.get_simplified_geometry_columns(right_table, cursor).values())
+                right_properties = [
+                    column["name"] for column in self.get_table_schema(right_table, cursor)
+                    if column["name"] not in ("geometry", "h3_cell") and column["name"] not in simplified
+                ]
+            right_cols = [f'r."{name}" AS "{right_table}.{name}"' for name in right_properties]
+            
+            geometry = geometry_sql("l.geometry", precision)
+            if arrow:
+                geometry_col = f"ST_AsWKB({geometry}) AS geometry" if precision is not None else "l.geometry AS geometry"
+            else:
+                geometry_col = f"ST_AsGeoJSON({geometry}) AS geom_json"
+            
+            join_predicate = JOIN_PREDICATES[predicate].format(
+                left="ST_GeomFromWKB(l.geometry)",
+                right="ST_GeomFromWKB(r.geometry)",
+                distance=distance
+            )
+            
+            return f"""
+            WITH l AS (
+                SELECT *, unnest(h3_grid_disk({left_key}, {k})) AS join_cell
+                FROM {settings.POLARIS_CATALOG}.default.{left_table}
+                WHERE {left_where}
+            ), r AS (
+                SELECT *
+                FROM {settings.POLARIS_CATALOG}.default.{right_table}
+                WHERE {right_where}
+            )
+            SELECT {", ".join(left_cols + right_cols)},
+                   {geometry_col}
+            FROM l
+            JOIN r ON {right_key} = l.join_cell AND {join_predicate}
             LIMIT {limit}
             OFFSET {offset}
             """
+    
+    def query_join(
+        self,
+        left_table: str,
+        right_table: str,
+        cursor: Optional[duckdb.DuckDBPyConnection] = None,
+        **join_args
+    ) -> List[Dict[str, Any]]:
+        """Run a spatial join and return rows with a geom_json column"""
+        conn = cursor or self.connection
+        try:
+            query = self.build_join_query(left_table, right_table, arrow=False, cursor=conn, **join_args)
             
-            return self.connection.execute(query).arrow()
+            logger.debug(f"Executing join: {query}")
+            with metrics.stage(metrics.STAGE_EXECUTION):
+                result = conn.execute(query).fetchall()
+            columns = [desc[0] for desc in conn.description]
+            return [dict(zip(columns, row)) for row in result]
             
         except Exception as e:
-            logger.error(f"Error querying Arrow features: {e}", exc_info=True)
+            logger.error(f"Error joining {left_table} with {right_table}: {e}", exc_info=True)
+            return []
+    
+    def query_join_arrow(
+        self,
+        left_table: str,
+        right_table: str,
+        cursor: Optional[duckdb.DuckDBPyConnection] = None,
+        **join_args
+    ):
+        """Run a spatial join and return an Arrow table with WKB geometry"""
+        conn = cursor or self.connection
+        try:
+            query = self.build_join_query(left_table, right_table, arrow=True, cursor=conn, **join_args)
+            
+            logger.debug(f"Executing Arrow join: {query}")
+            with metrics.stage(metrics.STAGE_EXECUTION):
+                return conn.execute(query).arrow()
+            
+        except Exception as e:
+            logger.error(f"Error joining {left_table} with {right_table} as Arrow: {e}", exc_info=True)
             return None
     
+    def query_nearest(
+        self,
+        table_name: str,
+        point: Tuple[float, float],
+        k: int = 10,
+        properties: Optional[List[str]] = None,
+        precision: Optional[int] = None,
+        arrow: bool = False,
+        cursor: Optional[duckdb.DuckDBPyConnection] = None
+    ):
+        """
+        Find the k features whose centroids are nearest a lon/lat point
+        
+        Searches H3 grid disks around the point's cell, starting with the
+        smallest disk whose partitions hold k records per the manifests. Once k
+        candidates are found, the k-th distance gives the disk that must contain
+        every closer centroid; the search is widened to it if needed, so only the
+        partitions near the point are read. Results are ranked by geodesic
+        distance (distance_m, in metres). Raises ValueError for a point H3
+        cannot index.
+        """
+        conn = cursor or self.connection
+        lon, lat = point
+        resolution = settings.H3_RESOLUTION
+        try:
+            center = h3.latlng_to_cell(lat, lon, resolution)
+        except h3.H3BaseException as e:
+            raise ValueError(f"Cannot index point {lon},{lat}: {e}")
+        
+        # Smallest disk whose partitions hold k records according to the manifests
+        rings = 1
+        try:
+            partitions = get_iceberg_client().get_table_stats(table_name).partitions
+            if None not in partitions:
+                for rings in range(settings.NEAREST_MAX_RING_SIZE + 1):
+                    disk = self.partition_cells(table_name, h3.grid_disk(center, rings))
+                    found = sum(partitions[cell].record_count for cell in disk if cell in partitions)
+                    if found >= k:
+                        break
+        except Exception as e:
+            logger.warning(f"Could not use metadata to size k-NN search on {table_name}: {e}")
+        
+        while True:
+            result, distances = self._nearest_in_disk(
+                conn, table_name, point, center, rings, k, properties, precision, arrow
+            )
+            if len(distances) < k:
+                # Deletes or a sparse table: keep widening until the ring limit
+                if rings >= settings.NEAREST_MAX_RING_SIZE:
+                    return result
+                rings = min(max(rings * 2, 1), settings.NEAREST_MAX_RING_SIZE)
+                continue
+            
+            safe_rings = nearest_safe_ring(distances[-1], resolution)
+            if safe_rings <= rings:
+                return result
+            if safe_rings > settings.NEAREST_MAX_RING_SIZE:
+                logger.info(f"k-NN on {table_name} capped at {settings.NEAREST_MAX_RING_SIZE} rings")
+                safe_rings = settings.NEAREST_MAX_RING_SIZE
+            
+            result, _ = self._nearest_in_disk(
+                conn, table_name, point, center, safe_rings, k, properties, precision, arrow
+            )
+            return result
+    
+    def _nearest_in_disk(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        table_name: str,
+        point: Tuple[float, float],
+        center: str,
+        rings: int,
+        k: int,
+        properties: Optional[List[str]],
+        precision: Optional[int],
+        arrow: bool
+    ):
+        """Run one k-NN candidate query over a grid disk; returns (result, sorted distances)"""
+        lon, lat = point
+        with metrics.stage(metrics.STAGE_PLANNING):
+            cells = self.partition_cells(table_name, list(h3.grid_disk(center, rings)))
+            cells_sql = ", ".join(sql_literal(cell) for cell in sorted(cells))
+            
+            if properties:
+                select_cols = [f'"{name}"' for name in properties]
+            else:
+                excluded = ["geometry"] + list(self.get_simplified_geometry_columns(table_name, conn).values())
+                select_cols = [f"* EXCLUDE ({', '.join(excluded)})"]
+            
+            geometry = geometry_sql(precision=precision)
+            if arrow:
+                select_cols.append(f"ST_AsWKB({geometry}) AS geometry" if precision is not None else "geometry")
+            else:
+                select_cols.append(f"ST_AsGeoJSON({geometry}) AS geom_json")
+            
+            # ST_Distance_Spheroid takes points in latitude, longitude order
+            centroid = "ST_FlipCoordinates(ST_Centroid(ST_GeomFromWKB(geometry)))"
+            select_cols.append(f"ST_Distance_Spheroid({centroid}, ST_Point({lat!r}, {lon!r})) AS distance_m")
+            
+            query = f"""
+            SELECT {", ".join(select_cols)}
+            FROM {settings.POLARIS_CATALOG}.default.{table_name}
+            WHERE h3_cell IN ({cells_sql}) AND geometry IS NOT NULL
+            ORDER BY distance_m
+            LIMIT {k}
+            """
+        
+        logger.debug(f"Executing k-NN query over {len(cells)} cells")
+        with metrics.stage(metrics.STAGE_EXECUTION):
+            if arrow:
+                result = conn.execute(query).arrow()
+                return result, result.column("distance_m").to_pylist()
+            
+            rows = conn.execute(query).fetchall()
+            columns = [desc[0] for desc in conn.description]
+            result = [dict(zip(columns, row)) for row in rows]
+            return result, [row["distance_m"] for row in result]
+    
+    def explain_analyze(self, query: str, cursor: Optional[duckdb.DuckDBPyConnection] = None) -> str:
+        """Run a query under EXPLAIN ANALYZE and return the profiled plan"""
+        conn = cursor or self.connection
+        with metrics.stage(metrics.STAGE_EXECUTION):
+            rows = conn.execute(f"EXPLAIN ANALYZE {query}").fetchall()
+        # Rows are (explain_key, explain_value) pairs; the value holds the rendered plan
+        return "\n".join(str(row[-1]) for row in rows)
+    
     def close(self):
         """Close connection"""
         if self.connection:
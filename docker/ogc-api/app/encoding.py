@@ -0,0 +1,73 @@
+"""
+Response encodings for feature query results
+"""
+from typing import Any, Dict, List, Optional, Union
+import json
+import logging
+
+import pyarrow as pa
+
+from app.models import Feature
+
+logger = logging.getLogger(__name__)
+
+# Columns managed by the platform rather than returned as properties
+INTERNAL_COLUMNS = ("geometry", "h3_cell")
+
+
+def arrow_to_ipc(table: pa.Table, compression: Optional[str] = None) -> bytes:
+    """Serialize an Arrow table to the IPC stream format, optionally with LZ4/ZSTD buffer compression"""
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def rows_to_features(rows: List[Dict[str, Any]], precision: Optional[int] = None) -> List[Feature]:
+    """Convert query rows (with a geom_json column) to GeoJSON features"""
+    features = []
+    for feat_data in rows:
+        geom_json = feat_data.pop("geom_json", None)
+        
+        # Geometry arrives as GeoJSON from ST_AsGeoJSON
+        geometry = None
+        if geom_json:
+            geometry = parse_geojson_geometry(geom_json, precision)
+        
+        # Remove internal columns
+        properties = {k: v for k, v in feat_data.items() if k not in INTERNAL_COLUMNS}
+        
+        feature = Feature(
+            type="Feature",
+            id=feat_data.get("id"),
+            geometry=geometry,
+            properties=properties
+        )
+        features.append(feature)
+    
+    return features
+
+
+def _round_coordinates(coordinates: Any, precision: int) -> Any:
+    """Round nested GeoJSON coordinates; rounding yields the shortest float repr once serialized"""
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        return [round(v, precision) for v in coordinates]
+    return [_round_coordinates(part, precision) for part in coordinates]
+
+
+def parse_geojson_geometry(geom_json: Union[str, dict], precision: Optional[int] = None) -> Optional[dict]:
+    """Parse an ST_AsGeoJSON geometry, optionally rounding coordinates to `precision` decimals"""
+    try:
+        geometry = json.loads(geom_json) if isinstance(geom_json, str) else geom_json
+        if precision is not None:
+            if geometry["type"] == "GeometryCollection":
+                geometry["geometries"] = [
+                    parse_geojson_geometry(part, precision) for part in geometry["geometries"]
+                ]
+            else:
+                geometry["coordinates"] = _round_coordinates(geometry["coordinates"], precision)
+        return geometry
+    except Exception as e:
+        logger.error(f"Error parsing GeoJSON geometry: {e}")
+        return None
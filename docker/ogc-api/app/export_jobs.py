@@ -0,0 +1,225 @@
+"""
+Background bulk export jobs writing whole collections with a single DuckDB COPY
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import os
+import tempfile
+import threading
+import uuid
+
+import fsspec
+
+from app.config import settings
+from app.duckdb_client import get_duckdb_client
+from app.models import ExportFormat, JobState
+from app.params import DatetimeFilter
+
+logger = logging.getLogger(__name__)
+
+FILE_EXTENSIONS = {
+    ExportFormat.GEOPARQUET: "parquet",
+    ExportFormat.FLATGEOBUF: "fgb",
+}
+
+MEDIA_TYPES = {
+    ExportFormat.GEOPARQUET: "application/vnd.apache.parquet",
+    ExportFormat.FLATGEOBUF: "application/flatgeobuf",
+}
+
+
+@dataclass
+class ExportJob:
+    """State of one export job"""
+    job_id: str
+    collection: str
+    format: ExportFormat
+    location: str
+    bbox: Optional[Tuple[float, float, float, float]] = None
+    datetime_filter: Optional[DatetimeFilter] = None
+    properties: Optional[List[str]] = None
+    property_filters: Optional[Dict[str, Any]] = None
+    status: JobState = JobState.ACCEPTED
+    created: datetime = field(default_factory=datetime.utcnow)
+    started: Optional[datetime] = None
+    finished: Optional[datetime] = None
+    message: Optional[str] = None
+    rows_written: Optional[int] = None
+    size_bytes: Optional[int] = None
+    cursor: Any = None
+
+
+class ExportJobManager:
+    """Runs export jobs on a bounded worker pool and tracks their status"""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.EXPORT_WORKERS,
+            thread_name_prefix="export"
+        )
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, ExportJob] = {}
+
+    def submit(
+        self,
+        collection: str,
+        fmt: ExportFormat,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        datetime_filter: Optional[DatetimeFilter] = None,
+        properties: Optional[List[str]] = None,
+        property_filters: Optional[Dict[str, Any]] = None
+    ) -> ExportJob:
+        """Queue an export job"""
+        job_id = uuid.uuid4().hex
+        location = f"{settings.EXPORT_LOCATION.rstrip('/')}/{collection}-{job_id}.{FILE_EXTENSIONS[fmt]}"
+        job = ExportJob(
+            job_id=job_id,
+            collection=collection,
+            format=fmt,
+            location=location,
+            bbox=bbox,
+            datetime_filter=datetime_filter,
+            properties=properties,
+            property_filters=property_filters
+        )
+        self._sweep()
+        with self._lock:
+            self._jobs[job_id] = job
+        self.executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def dismiss(self, job_id: str) -> Optional[ExportJob]:
+        """Cancel a queued or running job and delete its output"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            previous = job.status
+            job.status = JobState.DISMISSED
+            job.message = "Dismissed by client"
+            if previous == JobState.ACCEPTED:
+                # The worker skips dismissed jobs, so nothing else finishes it
+                job.finished = datetime.utcnow()
+            elif previous == JobState.RUNNING and job.cursor is not None:
+                job.cursor.interrupt()
+
+        if previous == JobState.SUCCESSFUL:
+            self._remove_output(job)
+        return job
+
+    def _run(self, job: ExportJob):
+        with self._lock:
+            if job.status == JobState.DISMISSED:
+                return
+            job.status = JobState.RUNNING
+            job.started = datetime.utcnow()
+
+        try:
+            cursor = get_duckdb_client().cursor()
+            with self._lock:
+                job.cursor = cursor
+            rows = self._write(job)
+            fs, path = fsspec.core.url_to_fs(job.location)
+            size = fs.size(path)
+            with self._lock:
+                if job.status == JobState.DISMISSED:
+                    self._remove_output(job)
+                    return
+                job.rows_written = rows
+                job.size_bytes = size
+                job.status = JobState.SUCCESSFUL
+            logger.info(f"Export {job.job_id} wrote {rows:,} rows ({size:,} bytes) to {job.location}")
+
+        except Exception as e:
+            with self._lock:
+                dismissed = job.status == JobState.DISMISSED
+                if not dismissed:
+                    job.status = JobState.FAILED
+                    job.message = str(e)
+            if dismissed:
+                self._remove_output(job)
+            else:
+                logger.error(f"Export {job.job_id} failed: {e}", exc_info=True)
+
+        finally:
+            with self._lock:
+                job.finished = datetime.utcnow()
+                if job.cursor is not None:
+                    job.cursor.close()
+                    job.cursor = None
+
+    def _sweep(self):
+        """
+        Forget finished jobs older than EXPORT_JOB_TTL_SECONDS and delete their outputs
+
+        When more than EXPORT_MAX_JOBS jobs are tracked, the oldest finished
+        ones go first regardless of age. Queued and running jobs are kept.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.EXPORT_JOB_TTL_SECONDS)
+        with self._lock:
+            finished = sorted(
+                (job for job in self._jobs.values() if job.finished is not None),
+                key=lambda job: job.finished
+            )
+            excess = len(self._jobs) - settings.EXPORT_MAX_JOBS
+            expired = [job for i, job in enumerate(finished) if i < excess or job.finished < cutoff]
+            for job in expired:
+                del self._jobs[job.job_id]
+
+        for job in expired:
+            if job.status != JobState.DISMISSED:
+                self._remove_output(job)
+        if expired:
+            logger.info(f"Evicted {len(expired)} finished export jobs")
+
+    def _write(self, job: ExportJob) -> int:
+        client = get_duckdb_client()
+        export_args = dict(
+            table_name=job.collection,
+            fmt=job.format.value,
+            bbox=job.bbox,
+            datetime_filter=job.datetime_filter,
+            properties=job.properties,
+            property_filters=job.property_filters,
+            cursor=job.cursor
+        )
+
+        # GDAL needs a seekable local file; stage it and upload when exporting to object storage
+        if job.format == ExportFormat.FLATGEOBUF and "://" in job.location:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                local_path = os.path.join(tmp_dir, os.path.basename(job.location))
+                rows = client.export_features(destination=local_path, **export_args)
+                fs, path = fsspec.core.url_to_fs(job.location)
+                fs.put_file(local_path, path)
+                return rows
+
+        if "://" not in job.location:
+            os.makedirs(os.path.dirname(job.location), exist_ok=True)
+        return client.export_features(destination=job.location, **export_args)
+
+    def _remove_output(self, job: ExportJob):
+        try:
+            fs, path = fsspec.core.url_to_fs(job.location)
+            if fs.exists(path):
+                fs.rm(path)
+        except Exception as e:
+            logger.warning(f"Could not remove export output {job.location}: {e}")
+
+
+# Global manager instance
+_manager: Optional[ExportJobManager] = None
+
+
+def get_export_manager() -> ExportJobManager:
+    """Get or create export job manager singleton"""
+    global _manager
+    if _manager is None:
+        _manager = ExportJobManager()
+    return _manager
@@ -0,0 +1,363 @@
+"""
+Iceberg metadata access via PyIceberg for planning without scanning data
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import threading
+import time
+
+import h3
+from pyiceberg.catalog import load_catalog
+from pyiceberg.conversions import from_bytes
+from pyiceberg.types import (
+    BooleanType, DateType, DecimalType, DoubleType, FloatType, IntegerType, LongType,
+    StringType, TimestampType, TimestamptzType
+)
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARTITION_COLUMN = "h3_cell"
+DATETIME_COLUMN_PROPERTY = "ogc.datetime-column"
+COLUMN_STATS_PROPERTY = "ogc.column-stats"
+COLUMN_STATS_SNAPSHOT_PROPERTY = "ogc.column-stats-snapshot"
+TEMPORAL_TYPES = (TimestampType, TimestamptzType, DateType)
+EPOCH = datetime(1970, 1, 1)
+
+# Statistics kind of each Iceberg type that manifest bounds are kept for
+STATS_KINDS = (
+    (TEMPORAL_TYPES, "datetime"),
+    ((IntegerType, LongType), "integer"),
+    ((FloatType, DoubleType, DecimalType), "number"),
+    ((StringType,), "string"),
+    ((BooleanType,), "boolean"),
+)
+
+
+@dataclass
+class PartitionStats:
+    """Manifest-level statistics for one partition"""
+    record_count: int = 0
+    file_count: int = 0
+    size_bytes: int = 0
+    has_deletes: bool = False
+
+
+@dataclass
+class ColumnStats:
+    """
+    Statistics for one column
+
+    Manifests give min/max bounds and null counts for any table; distinct
+    counts, histograms and value counts come from the ETL's ogc.column-stats
+    table property. Temporal values are naive UTC datetimes.
+    """
+    type: str
+    min: Any = None
+    max: Any = None
+    null_count: Optional[int] = None
+    distinct_count: Optional[int] = None
+    # Equal-width histogram: len(counts) + 1 bin bounds
+    histogram: Optional[Dict[str, List[Any]]] = None
+    # Row count per value, for low-cardinality columns
+    values: Optional[Dict[str, int]] = None
+    # Largest bbox diagonal of a feature in degrees, for geometry columns
+    max_extent: Optional[float] = None
+
+    @classmethod
+    def from_property(cls, stats: Dict[str, Any]) -> "ColumnStats":
+        """Build from one column of the ogc.column-stats table property"""
+        column = cls(
+            type=stats["type"],
+            min=stats.get("min"),
+            max=stats.get("max"),
+            null_count=stats.get("nullCount"),
+            distinct_count=stats.get("distinctCount"),
+            histogram=stats.get("histogram"),
+            values=stats.get("values"),
+            max_extent=stats.get("maxExtent")
+        )
+        if column.type == "datetime":
+            column.min = _parse_timestamp(column.min)
+            column.max = _parse_timestamp(column.max)
+            if column.histogram:
+                column.histogram = {
+                    "bounds": [_parse_timestamp(bound) for bound in column.histogram["bounds"]],
+                    "counts": column.histogram["counts"]
+                }
+        return column
+
+    def range_selectivity(self, low: Any = None, high: Any = None) -> Optional[float]:
+        """
+        Estimated fraction of rows with low <= value <= high; open ends are None
+
+        Interpolates linearly within histogram bins. None without a histogram.
+        """
+        if not self.histogram:
+            return None
+        bounds, counts = self.histogram["bounds"], self.histogram["counts"]
+        total = sum(counts) + (self.null_count or 0)
+        if total == 0:
+            return 0.0
+
+        matched = 0.0
+        for (start, end), count in zip(zip(bounds, bounds[1:]), counts):
+            overlap_start = start if low is None else max(start, low)
+            overlap_end = end if high is None else min(end, high)
+            if overlap_start > overlap_end:
+                continue
+            if end == start:
+                matched += count
+            else:
+                matched += count * ((overlap_end - overlap_start) / (end - start))
+        return matched / total
+
+
+@dataclass
+class TableStats:
+    """Manifest-level statistics for the current snapshot of a table"""
+    snapshot_id: Optional[int] = None
+    # Keyed by h3_cell partition value; None holds files without an h3_cell partition
+    partitions: Dict[Optional[str], PartitionStats] = field(default_factory=dict)
+    datetime_column: Optional[str] = None
+    temporal_extent: Optional[Tuple[Optional[datetime], Optional[datetime]]] = None
+    columns: Dict[str, ColumnStats] = field(default_factory=dict)
+    # "etl" when the ogc.column-stats property describes this snapshot, else "manifest"
+    column_stats_source: str = "manifest"
+
+    @property
+    def record_count(self) -> int:
+        return sum(p.record_count for p in self.partitions.values())
+
+    @property
+    def file_count(self) -> int:
+        return sum(p.file_count for p in self.partitions.values())
+
+    @property
+    def has_deletes(self) -> bool:
+        return any(p.has_deletes for p in self.partitions.values())
+
+    @property
+    def partition_resolutions(self) -> Set[int]:
+        """H3 resolutions of the h3_cell partition values (several for adaptive partitioning)"""
+        return {h3.get_resolution(cell) for cell in self.partitions if cell is not None}
+
+    def covering_partitions(self, cells: List[str], resolution: int) -> List[str]:
+        """
+        Partition values that can hold features of the given cells
+
+        A partition matches a cell when it is the cell, one of its ancestors
+        (a merged sparse partition) or one of its descendants (a split dense one).
+        """
+        wanted = set(cells)
+        ancestors = {
+            res: {h3.cell_to_parent(cell, res) for cell in cells}
+            for res in self.partition_resolutions if res < resolution
+        }
+
+        matched = []
+        for partition in self.partitions:
+            if partition is None:
+                continue
+            res = h3.get_resolution(partition)
+            if res == resolution:
+                hit = partition in wanted
+            elif res < resolution:
+                hit = partition in ancestors[res]
+            else:
+                hit = h3.cell_to_parent(partition, resolution) in wanted
+            if hit:
+                matched.append(partition)
+        return matched
+
+
+class IcebergMetadataClient:
+    """Reads table metadata from the Polaris REST catalog"""
+
+    def __init__(self):
+        self.catalog = load_catalog(
+            settings.POLARIS_CATALOG,
+            **{
+                "type": "rest",
+                "uri": settings.POLARIS_ENDPOINT,
+                "warehouse": settings.POLARIS_CATALOG
+            }
+        )
+        self._lock = threading.Lock()
+        self._stats_cache: Dict[str, Tuple[float, TableStats]] = {}
+
+    def load_table(self, table_name: str):
+        """Load an Iceberg table from the default namespace"""
+        return self.catalog.load_table(("default", table_name))
+
+    def _cached_stats(self, table_name: str) -> Optional[TableStats]:
+        """Cached statistics for a table, if younger than METADATA_CACHE_TTL_SECONDS"""
+        with self._lock:
+            cached = self._stats_cache.get(table_name)
+            if cached and time.monotonic() - cached[0] < settings.METADATA_CACHE_TTL_SECONDS:
+                return cached[1]
+        return None
+
+    def get_table_stats(self, table_name: str) -> TableStats:
+        """Get per-partition record and file counts, cached for METADATA_CACHE_TTL_SECONDS"""
+        cached = self._cached_stats(table_name)
+        if cached is not None:
+            return cached
+
+        now = time.monotonic()
+        stats = self._compute_table_stats(table_name)
+
+        with self._lock:
+            self._stats_cache[table_name] = (now, stats)
+        return stats
+
+    async def get_table_stats_async(self, table_name: str) -> TableStats:
+        """
+        get_table_stats for async handlers
+
+        Cache hits return directly; loading plans every data file of the
+        snapshot, so it runs in a worker thread instead of on the event loop.
+        """
+        cached = self._cached_stats(table_name)
+        if cached is not None:
+            return cached
+        return await asyncio.to_thread(self.get_table_stats, table_name)
+
+    def _compute_table_stats(self, table_name: str) -> TableStats:
+        table = self.load_table(table_name)
+        schema = table.schema()
+        snapshot = table.current_snapshot()
+        datetime_field = _find_datetime_field(schema, table.properties)
+        stats = TableStats(
+            snapshot_id=snapshot.snapshot_id if snapshot else None,
+            datetime_column=datetime_field.name if datetime_field else None
+        )
+        if snapshot is None:
+            return stats
+
+        # Columns to collect manifest bounds and null counts for
+        stats_fields = {}
+        for schema_field in schema.fields:
+            kind = _stats_kind(schema_field.field_type)
+            if kind is not None and schema_field.name != PARTITION_COLUMN:
+                stats_fields[schema_field.field_id] = (schema_field, kind)
+
+        # Locate the identity partition on h3_cell, if any
+        partition_pos = None
+        try:
+            source_id = schema.find_field(PARTITION_COLUMN).field_id
+        except ValueError:
+            # Not an ETL-loaded table: every file counts as unpartitioned
+            source_id = None
+        for pos, spec_field in enumerate(table.spec().fields):
+            if source_id is not None and spec_field.source_id == source_id and str(spec_field.transform) == "identity":
+                partition_pos = pos
+                break
+
+        for task in table.scan().plan_files():
+            data_file = task.file
+            key = data_file.partition[partition_pos] if partition_pos is not None else None
+            partition = stats.partitions.setdefault(key, PartitionStats())
+            partition.record_count += data_file.record_count
+            partition.file_count += 1
+            partition.size_bytes += data_file.file_size_in_bytes
+            partition.has_deletes = partition.has_deletes or bool(task.delete_files)
+
+            # Column bounds from the manifest give min/max (and the temporal extent) without a scan
+            for field_id, (schema_field, kind) in stats_fields.items():
+                column = stats.columns.setdefault(schema_field.name, ColumnStats(type=kind, null_count=0))
+                null_count = (data_file.null_value_counts or {}).get(field_id)
+                if null_count is not None:
+                    column.null_count += null_count
+                lower = (data_file.lower_bounds or {}).get(field_id)
+                upper = (data_file.upper_bounds or {}).get(field_id)
+                if lower is not None:
+                    value = _from_bound(schema_field.field_type, lower)
+                    column.min = value if column.min is None else min(column.min, value)
+                if upper is not None:
+                    value = _from_bound(schema_field.field_type, upper)
+                    column.max = value if column.max is None else max(column.max, value)
+
+        # ETL statistics are exact, but only while the snapshot they describe is current
+        if table.properties.get(COLUMN_STATS_SNAPSHOT_PROPERTY) == str(snapshot.snapshot_id):
+            try:
+                columns = json.loads(table.properties[COLUMN_STATS_PROPERTY])
+                stats.columns.update({name: ColumnStats.from_property(c) for name, c in columns.items()})
+                stats.column_stats_source = "etl"
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Ignoring invalid {COLUMN_STATS_PROPERTY} on {table_name}: {e}")
+
+        datetime_stats = stats.columns.get(stats.datetime_column) if stats.datetime_column else None
+        if datetime_stats and (datetime_stats.min is not None or datetime_stats.max is not None):
+            stats.temporal_extent = (datetime_stats.min, datetime_stats.max)
+
+        return stats
+
+
+def _find_datetime_field(schema, properties: Dict[str, str]):
+    """The column named by the ogc.datetime-column property, else the first timestamp/date column"""
+    configured = properties.get(DATETIME_COLUMN_PROPERTY)
+    if configured:
+        try:
+            return schema.find_field(configured)
+        except ValueError:
+            # The collection then has no temporal column and datetime filters get 400
+            logger.warning(f"{DATETIME_COLUMN_PROPERTY} names a missing column: {configured}")
+            return None
+
+    for schema_field in schema.fields:
+        if isinstance(schema_field.field_type, TEMPORAL_TYPES):
+            return schema_field
+    return None
+
+
+def _stats_kind(field_type) -> Optional[str]:
+    """Statistics kind of an Iceberg type, or None for types without statistics"""
+    for types, kind in STATS_KINDS:
+        if isinstance(field_type, types):
+            return kind
+    return None
+
+
+def _from_bound(field_type, bound: bytes) -> Any:
+    """Decode a manifest lower/upper bound"""
+    value = from_bytes(field_type, bound)
+    if isinstance(field_type, TEMPORAL_TYPES):
+        return _to_datetime(field_type, value)
+    if isinstance(field_type, DecimalType):
+        return float(value)
+    return value
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO 8601 date or timestamp, normalized to naive UTC"""
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _to_datetime(field_type, value) -> datetime:
+    """Convert an Iceberg date (days) or timestamp (microseconds) bound to a datetime"""
+    if isinstance(field_type, DateType):
+        return EPOCH + timedelta(days=value)
+    return EPOCH + timedelta(microseconds=value)
+
+
+# Global client instance
+_client: Optional[IcebergMetadataClient] = None
+
+
+def get_iceberg_client() -> IcebergMetadataClient:
+    """Get or create Iceberg metadata client singleton"""
+    global _client
+    if _client is None:
+        _client = IcebergMetadataClient()
+    return _client
@@ -1,13 +1,15 @@
 """
 OGC API Features service for querying Iceberg tables with geospatial data
 """
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import logging
 
 from app.config import settings
-from app.routers import landing, conformance, collections
+from app import metrics
+from app.compression import CompressionMiddleware
+from app.routers import landing, conformance, collections, jobs, batch, spatial
 
 # Configure logging
 logging.basicConfig(
@@ -35,10 +37,17 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+# Response compression (zstd / br / gzip)
+if settings.ENABLE_COMPRESSION:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
 # Include routers
 app.include_router(landing.router)
 app.include_router(conformance.router)
 app.include_router(collections.router)
+app.include_router(jobs.router)
+app.include_router(batch.router)
+app.include_router(spatial.router)
 
 # Health check endpoint
 @app.get("/health")
@@ -46,6 +55,15 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "ogc-api-features"}
 
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus metrics endpoint"""
+    if not settings.ENABLE_METRICS:
+        raise HTTPException(status_code=404, detail="Metrics not enabled")
+    content, media_type = metrics.render_latest()
+    return Response(content=content, media_type=media_type)
+
 # Exception handlers
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -0,0 +1,118 @@
+"""
+Prometheus metrics and per-request query profiling
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+import time
+
+from prometheus_client import Histogram, Counter, Gauge, generate_latest, CONTENT_TYPE_LATEST
+
+
+# Pipeline stages timed for every items request
+STAGE_CATALOG = "catalog_lookup"
+STAGE_H3_COVERING = "h3_covering"
+STAGE_PLANNING = "query_planning"
+STAGE_EXECUTION = "execution"
+STAGE_COUNT = "count"
+STAGE_SERIALIZATION = "serialization"
+
+STAGE_SECONDS = Histogram(
+    "ogc_api_stage_duration_seconds",
+    "Time spent in each stage of a feature request",
+    ["stage", "collection", "format"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+RESPONSE_BYTES = Histogram(
+    "ogc_api_response_bytes",
+    "Size of feature response bodies",
+    ["collection", "format"],
+    buckets=(1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8)
+)
+
+REQUESTS_TOTAL = Counter(
+    "ogc_api_feature_requests_total",
+    "Feature requests served",
+    ["collection", "format"]
+)
+
+QUERY_OUTCOMES = Counter(
+    "ogc_api_query_outcomes_total",
+    "Query admission and completion outcomes",
+    ["outcome"]
+)
+
+QUERIES_IN_FLIGHT = Gauge(
+    "ogc_api_queries_in_flight",
+    "Queries currently holding an admission slot"
+)
+
+
+class RequestProfile:
+    """Labels and stage timings collected for a single request"""
+
+    def __init__(self, collection: str, fmt: str):
+        self.collection = collection
+        self.format = fmt
+        self.timings: Dict[str, float] = {}
+
+    def record(self, stage: str, seconds: float):
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+        STAGE_SECONDS.labels(stage, self.collection, self.format).observe(seconds)
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+# Seconds spent in stages nested inside the innermost running stage
+_nested_seconds: ContextVar[Optional[List[float]]] = ContextVar("nested_seconds", default=None)
+
+
+def start_request(collection: str, fmt: str) -> RequestProfile:
+    """Bind metric labels for the current request and count it"""
+    profile = RequestProfile(collection, fmt)
+    _current_profile.set(profile)
+    REQUESTS_TOTAL.labels(collection, fmt).inc()
+    return profile
+
+
+def current_profile() -> Optional[RequestProfile]:
+    """Profile bound to the current request, if any"""
+    return _current_profile.get()
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Time a block and record it against the current request's labels
+
+    Time spent in a stage nested inside the block (e.g. the H3 covering
+    computed while planning) is recorded for the inner stage only, so stage
+    timings never double count.
+    """
+    parent = _nested_seconds.get()
+    nested = [0.0]
+    token = _nested_seconds.set(nested)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _nested_seconds.reset(token)
+        if parent is not None:
+            parent[0] += elapsed
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.record(name, elapsed - nested[0])
+
+
+def observe_response_bytes(size: int):
+    """Record the size of a response body for the current request"""
+    profile = _current_profile.get()
+    if profile is not None:
+        RESPONSE_BYTES.labels(profile.collection, profile.format).observe(size)
+
+
+def render_latest():
+    """Render all metrics in the Prometheus text exposition format"""
+    return generate_latest(), CONTENT_TYPE_LATEST
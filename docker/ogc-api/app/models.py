@@ -26,6 +26,8 @@ class Link(BaseModel):
     type: Optional[str] = None
     title: Optional[str] = None
     hreflang: Optional[str] = None
+    method: Optional[str] = None
+    body: Optional[Dict[str, Any]] = None
 
 
 class Extent(BaseModel):
@@ -91,4 +93,126 @@ class FeatureCollection(BaseModel):
     links: List[Link]
     timeStamp: Optional[datetime] = None
     numberMatched: Optional[int] = None
-    numberReturned: int
\ No newline at end of file
+    numberReturned: int
+
+
+class Geometry(BaseModel):
+    """GeoJSON geometry"""
+    type: str = Field(
+        ..., pattern="^(Point|MultiPoint|LineString|MultiLineString|Polygon|MultiPolygon)$"
+    )
+    coordinates: List[Any]
+
+
+class FeatureReference(BaseModel):
+    """Reference to a feature in a collection"""
+    collection: str
+    featureId: Union[str, int]
+
+
+class ItemsSearch(BaseModel):
+    """Body of a POST items query"""
+    intersects: Optional[Union[Geometry, FeatureReference]] = Field(
+        None, description="GeoJSON geometry, or a feature whose geometry to use"
+    )
+    bbox: Optional[List[float]] = Field(None, min_length=4, max_length=4)
+    datetime: Optional[str] = None
+    properties: Optional[List[str]] = None
+    limit: Optional[int] = Field(None, ge=1)
+    offset: int = Field(0, ge=0)
+    count: Optional[str] = Field(None, pattern="^(metadata|exact|none)$")
+    precision: Optional[int] = Field(None, ge=0, le=15)
+    zoom: Optional[int] = Field(None, ge=0, le=24)
+    f: str = Field("json", pattern="^(json|arrow)$")
+
+
+class Histogram(BaseModel):
+    """Equal-width histogram: one more bound than counts"""
+    bounds: List[Any]
+    counts: List[int]
+
+
+class ColumnStatistics(BaseModel):
+    """Statistics for one column of a collection"""
+    type: str
+    min: Optional[Any] = None
+    max: Optional[Any] = None
+    nullCount: Optional[int] = None
+    distinctCount: Optional[int] = None
+    histogram: Optional[Histogram] = None
+    values: Optional[Dict[str, int]] = None
+    maxExtent: Optional[float] = Field(None, description="Largest feature bbox diagonal in degrees")
+
+
+class CollectionStatistics(BaseModel):
+    """Per-column statistics for the current snapshot of a collection"""
+    id: str
+    snapshotId: Optional[int] = None
+    numberOfFeatures: int
+    source: str = Field(..., description="etl (exact, from the load job) or manifest (bounds only)")
+    columns: Dict[str, ColumnStatistics]
+    links: List[Link]
+
+
+class ExportFormat(str, Enum):
+    """Bulk export output formats"""
+    GEOPARQUET = "geoparquet"
+    FLATGEOBUF = "flatgeobuf"
+
+
+class JobState(str, Enum):
+    """Job status codes (as in OGC API - Processes)"""
+    ACCEPTED = "accepted"
+    RUNNING = "running"
+    SUCCESSFUL = "successful"
+    FAILED = "failed"
+    DISMISSED = "dismissed"
+
+
+class ExportRequest(BaseModel):
+    """Bulk export job request"""
+    format: ExportFormat = ExportFormat.GEOPARQUET
+    bbox: Optional[List[float]] = Field(None, min_length=4, max_length=4)
+    datetime: Optional[str] = None
+    properties: Optional[List[str]] = None
+    filter: Optional[Dict[str, Union[str, int, float, bool]]] = Field(
+        None, description="Property equality filters"
+    )
+
+
+class JobStatus(BaseModel):
+    """Bulk export job status"""
+    jobID: str
+    status: JobState
+    collection: str
+    format: ExportFormat
+    created: datetime
+    started: Optional[datetime] = None
+    finished: Optional[datetime] = None
+    message: Optional[str] = None
+    numberWritten: Optional[int] = None
+    sizeBytes: Optional[int] = None
+    links: List[Link]
+
+
+class BatchQuery(BaseModel):
+    """One sub-query of a batch request"""
+    collection: str
+    bbox: Optional[List[float]] = Field(None, min_length=4, max_length=4)
+    datetime: Optional[str] = None
+    properties: Optional[List[str]] = None
+    limit: int = Field(1000, ge=1)
+    zoom: Optional[int] = Field(None, ge=0, le=24)
+    precision: Optional[int] = Field(None, ge=0, le=15)
+
+
+class BatchRequest(BaseModel):
+    """Several feature queries answered in one round trip"""
+    queries: List[BatchQuery] = Field(..., min_length=1)
+    format: str = Field("json", pattern="^(json|arrow)$")
+
+
+class BatchResponse(BaseModel):
+    """GeoJSON results of a batch request, in request order"""
+    results: List[FeatureCollection]
+    timeStamp: Optional[datetime] = None
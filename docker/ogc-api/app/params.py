@@ -0,0 +1,69 @@
+"""
+Parsing of OGC API Features query parameters
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+
+@dataclass
+class DatetimeFilter:
+    """Closed interval on a collection's temporal column; open ends are None"""
+    column: str
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """Parse a minx,miny,maxx,maxy bbox string"""
+    coords = [float(x) for x in bbox.split(",")]
+    if len(coords) != 4:
+        raise ValueError("bbox must have 4 values")
+    return tuple(coords)
+
+
+def parse_point(point: str) -> Tuple[float, float]:
+    """Parse a lon,lat point string"""
+    coords = [float(x) for x in point.split(",")]
+    if len(coords) != 2:
+        raise ValueError("point must have 2 values")
+    lon, lat = coords
+    if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+        raise ValueError("point must be a longitude,latitude pair")
+    return lon, lat
+
+
+def _parse_instant(value: str, end_of_day: bool = False) -> datetime:
+    """Parse an RFC 3339 date-time or full date, normalized to naive UTC"""
+    value = value.strip()
+    if "T" not in value.upper():
+        # A bare date covers the whole day
+        day = datetime.fromisoformat(value)
+        return day + timedelta(days=1, microseconds=-1) if end_of_day else day
+
+    parsed = datetime.fromisoformat(value.replace("z", "Z"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_datetime(value: str) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Parse the OGC `datetime` parameter
+
+    Accepts an instant ("2018-02-12T23:20:50Z"), a bounded interval
+    ("2018-02-12T00:00:00Z/2018-03-18T12:31:12Z") or a half-bounded one
+    ("../2018-03-18", "2018-02-12/.."). Returns (start, end), inclusive.
+    """
+    if "/" not in value:
+        return _parse_instant(value), _parse_instant(value, end_of_day=True)
+
+    start_str, end_str = value.split("/", 1)
+    start = None if start_str.strip() in ("", "..") else _parse_instant(start_str)
+    end = None if end_str.strip() in ("", "..") else _parse_instant(end_str, end_of_day=True)
+
+    if start is None and end is None:
+        raise ValueError("datetime interval must have at least one bound")
+    if start and end and start > end:
+        raise ValueError("datetime interval start is after its end")
+    return start, end
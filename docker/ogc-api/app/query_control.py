@@ -0,0 +1,337 @@
+"""
+Admission control, timeouts and cancellation for DuckDB queries
+"""
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+import asyncio
+import logging
+import math
+
+from fastapi import HTTPException, Request
+
+from app.config import settings
+from app.duckdb_client import get_duckdb_client
+from app.iceberg_catalog import get_iceberg_client
+from app.params import DatetimeFilter
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Seconds between client disconnect checks while a query runs
+DISCONNECT_POLL_INTERVAL = 0.5
+
+_semaphore: Optional[asyncio.Semaphore] = None
+_client_slots: Dict[str, asyncio.Semaphore] = {}
+# Requests holding or queued for each client's slots
+_client_inflight: Dict[str, int] = {}
+
+
+@dataclass
+class QueryCost:
+    """Estimated scan cost of a feature query"""
+    cells: int
+    files: int
+    rows: int
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_QUERIES)
+    return _semaphore
+
+
+def _retry_after() -> Dict[str, str]:
+    return {"Retry-After": str(settings.QUERY_RETRY_AFTER_SECONDS)}
+
+
+def client_key(request: Request) -> str:
+    """
+    Key for per-client limits: the peer address, or the first X-Forwarded-For
+    address when TRUST_FORWARDED_FOR is set (only safe behind a proxy that sets it)
+    """
+    if settings.TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for", "").split(",")[0].strip()
+        if forwarded:
+            return forwarded
+    return request.client.host if request.client else "unknown"
+
+
+@asynccontextmanager
+async def admission_slot(request: Request):
+    """
+    Hold one of the MAX_CONCURRENT_QUERIES query slots
+
+    Each client runs at most MAX_QUERIES_PER_CLIENT queries at once; further
+    requests queue behind its own queries and get 429 when none finishes within
+    QUERY_QUEUE_TIMEOUT_SECONDS. When no global slot frees up within that time
+    the request gets 503.
+    """
+    key = client_key(request)
+    client_slots = _client_slots.setdefault(key, asyncio.Semaphore(settings.MAX_QUERIES_PER_CLIENT))
+    _client_inflight[key] = _client_inflight.get(key, 0) + 1
+    try:
+        try:
+            await asyncio.wait_for(client_slots.acquire(), timeout=settings.QUERY_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            metrics.QUERY_OUTCOMES.labels("rejected_client_limit").inc()
+            raise HTTPException(
+                status_code=429,
+                detail="Too many concurrent queries from this client",
+                headers=_retry_after()
+            )
+
+        try:
+            semaphore = _get_semaphore()
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=settings.QUERY_QUEUE_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                metrics.QUERY_OUTCOMES.labels("rejected_busy").inc()
+                raise HTTPException(
+                    status_code=503,
+                    detail="Server is busy, please retry later",
+                    headers=_retry_after()
+                )
+
+            metrics.QUERIES_IN_FLIGHT.inc()
+            try:
+                yield
+            finally:
+                metrics.QUERIES_IN_FLIGHT.dec()
+                semaphore.release()
+        finally:
+            client_slots.release()
+    finally:
+        # Drop the client's semaphore once no request holds or awaits it
+        _client_inflight[key] -= 1
+        if _client_inflight[key] <= 0:
+            del _client_inflight[key]
+            del _client_slots[key]
+
+
+async def run_query(
+    request: Request,
+    func: Callable[..., T],
+    timeout: Optional[float] = None
+) -> T:
+    """
+    Run a blocking query function on its own DuckDB cursor
+
+    The query is interrupted when it exceeds the timeout (504) or the HTTP
+    client disconnects (499). `func` receives the cursor as its only argument.
+    """
+    timeout = settings.QUERY_TIMEOUT_SECONDS if timeout is None else timeout
+    client = get_duckdb_client()
+
+    async with admission_slot(request):
+        cursor = client.cursor()
+        task = asyncio.ensure_future(asyncio.to_thread(func, cursor))
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    cursor.interrupt()
+                    metrics.QUERY_OUTCOMES.labels("timeout").inc()
+                    raise HTTPException(
+                        status_code=504,
+                        detail=f"Query exceeded the {timeout:g}s timeout"
+                    )
+
+                done, _ = await asyncio.wait({task}, timeout=min(DISCONNECT_POLL_INTERVAL, remaining))
+                if done:
+                    metrics.QUERY_OUTCOMES.labels("completed").inc()
+                    return task.result()
+
+                if await request.is_disconnected():
+                    cursor.interrupt()
+                    metrics.QUERY_OUTCOMES.labels("cancelled").inc()
+                    logger.info(f"Client disconnected, cancelled query on {request.url.path}")
+                    raise HTTPException(status_code=499, detail="Client closed request")
+        finally:
+            # Keep the slot until the interrupted query has actually stopped
+            if not task.done():
+                cursor.interrupt()
+                await asyncio.wait({task})
+            cursor.close()
+
+
+async def estimate_query_cost(
+    table_name: str,
+    h3_cells: Optional[List[str]],
+    limit: int,
+    offset: int,
+    datetime_filter: Optional[DatetimeFilter] = None
+) -> Optional[QueryCost]:
+    """
+    Estimate rows and files scanned from Iceberg manifest statistics
+
+    Without a spatial filter DuckDB stops once offset + limit rows match, which
+    takes offset + limit rows divided by the selectivity of the datetime filter
+    (from the column histogram, when there is one). Spatially filtered queries
+    are charged for every row in the partitions they touch.
+    """
+    try:
+        stats = await get_iceberg_client().get_table_stats_async(table_name)
+    except Exception as e:
+        logger.warning(f"Could not load metadata for cost estimate of {table_name}: {e}")
+        return None
+
+    if h3_cells is None:
+        selectivity = datetime_selectivity(stats, datetime_filter)
+        rows = stats.record_count
+        if selectivity > 0:
+            rows = min(rows, math.ceil((offset + limit) / selectivity))
+        return QueryCost(
+            cells=len(stats.partitions),
+            files=stats.file_count,
+            rows=rows
+        )
+
+    return _partition_scan_cost(stats, h3_cells)
+
+
+async def apply_count_policy(
+    table_name: str,
+    h3_cells: Optional[List[str]],
+    mode: str,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    datetime_filter: Optional[DatetimeFilter] = None,
+    intersects: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Skip numberMatched counts that would scan more than the downgrade threshold
+
+    Returns the count mode to run the query with: "none" when the count scan
+    exceeds QUERY_DOWNGRADE_SCAN_ROWS or QUERY_MAX_SCAN_FILES, or when manifest
+    statistics are unavailable and the count would fall back to a full COUNT(*).
+    """
+    if mode == "none":
+        return mode
+
+    try:
+        stats = await get_iceberg_client().get_table_stats_async(table_name)
+    except Exception as e:
+        logger.warning(f"Could not load metadata for count estimate of {table_name}: {e}")
+        stats = None
+
+    if stats is not None:
+        cost = _count_scan_cost(stats, h3_cells, mode, bbox, datetime_filter, intersects)
+        if cost is None or (
+            cost.rows <= settings.QUERY_DOWNGRADE_SCAN_ROWS and cost.files <= settings.QUERY_MAX_SCAN_FILES
+        ):
+            return mode
+
+    metrics.QUERY_OUTCOMES.labels("count_skipped").inc()
+    return "none"
+
+
+def _count_scan_cost(
+    stats,
+    h3_cells: Optional[List[str]],
+    mode: str,
+    bbox: Optional[Tuple[float, float, float, float]],
+    datetime_filter: Optional[DatetimeFilter],
+    intersects: Optional[Dict[str, Any]]
+) -> Optional[QueryCost]:
+    """
+    Rows and files a count scans beyond the page query; None when it scans nothing extra
+
+    Metadata counts read the manifests, plus the boundary partitions of a bbox
+    that the page query already scans. Otherwise count_features runs COUNT(*)
+    over every partition the query touches, or the whole table without a
+    spatial filter.
+    """
+    if mode == "metadata" and datetime_filter is None and intersects is None and not stats.has_deletes:
+        if not bbox or (h3_cells and None not in stats.partitions):
+            return None
+
+    if h3_cells is None:
+        return QueryCost(cells=len(stats.partitions), files=stats.file_count, rows=stats.record_count)
+    return _partition_scan_cost(stats, h3_cells)
+
+
+def datetime_selectivity(stats, datetime_filter: Optional[DatetimeFilter]) -> float:
+    """Estimated fraction of rows matching a datetime filter; 1.0 when unknown"""
+    if datetime_filter is None:
+        return 1.0
+    column = stats.columns.get(datetime_filter.column)
+    selectivity = column.range_selectivity(datetime_filter.start, datetime_filter.end) if column else None
+    return 1.0 if selectivity is None else selectivity
+
+
+def _partition_scan_cost(stats, h3_cells: List[str]) -> QueryCost:
+    """Rows and files in the partitions of the given cells"""
+    # Files without an h3_cell partition value are scanned regardless of the covering
+    touched = [stats.partitions[c] for c in h3_cells if c in stats.partitions]
+    if None in stats.partitions:
+        touched.append(stats.partitions[None])
+
+    return QueryCost(
+        cells=len(h3_cells),
+        files=sum(p.file_count for p in touched),
+        rows=sum(p.record_count for p in touched)
+    )
+
+
+async def estimate_join_cost(
+    left_table: str,
+    right_table: str,
+    left_cells: Optional[List[str]],
+    right_cells: Optional[List[str]]
+) -> Optional[QueryCost]:
+    """
+    Estimate rows and files read by a spatial join
+
+    A LIMIT does not stop a join early, so both sides are charged for every
+    row in the partitions they touch (all partitions when a side is unfiltered).
+    """
+    try:
+        left_stats = await get_iceberg_client().get_table_stats_async(left_table)
+        right_stats = await get_iceberg_client().get_table_stats_async(right_table)
+    except Exception as e:
+        logger.warning(f"Could not load metadata for cost estimate of {left_table} x {right_table}: {e}")
+        return None
+
+    if left_cells is None:
+        left_cells = [cell for cell in left_stats.partitions if cell is not None]
+    if right_cells is None:
+        right_cells = [cell for cell in right_stats.partitions if cell is not None]
+
+    left = _partition_scan_cost(left_stats, left_cells)
+    right = _partition_scan_cost(right_stats, right_cells)
+    return QueryCost(
+        cells=left.cells + right.cells,
+        files=left.files + right.files,
+        rows=left.rows + right.rows
+    )
+
+
+def apply_admission_policy(cost: Optional[QueryCost], limit: int) -> int:
+    """
+    Reject queries over the hard scan limits and downgrade expensive ones
+
+    Returns the limit to run the query with.
+    """
+    if cost is None:
+        return limit
+
+    if cost.rows > settings.QUERY_MAX_SCAN_ROWS or cost.files > settings.QUERY_MAX_SCAN_FILES:
+        metrics.QUERY_OUTCOMES.labels("rejected_cost").inc()
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Query would scan ~{cost.rows:,} rows in {cost.files:,} files; "
+                f"narrow the bbox or reduce the offset"
+            )
+        )
+
+    if cost.rows > settings.QUERY_DOWNGRADE_SCAN_ROWS and limit > settings.QUERY_DOWNGRADE_LIMIT:
+        metrics.QUERY_OUTCOMES.labels("downgraded").inc()
+        return settings.QUERY_DOWNGRADE_LIMIT
+
+    return limit
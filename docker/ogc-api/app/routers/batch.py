@@ -0,0 +1,240 @@
+"""
+Batch feature queries across several collections and bounding boxes
+"""
+from fastapi import APIRouter, Request, HTTPException, Response
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from urllib.parse import urlencode
+import asyncio
+import logging
+import uuid
+
+from app.models import BatchQuery, BatchRequest, BatchResponse, FeatureCollection, Link
+from app.duckdb_client import get_duckdb_client
+from app.params import DatetimeFilter, parse_bbox
+from app.encoding import arrow_to_ipc, rows_to_features
+from app.query_control import run_query, estimate_query_cost, apply_admission_policy
+from app.routers.collections import resolve_datetime_filter, resolve_geometry
+from app.config import settings
+from app import metrics
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+@dataclass
+class PlannedQuery:
+    """A validated batch sub-query ready to run"""
+    query: BatchQuery
+    bbox: Optional[Tuple[float, float, float, float]]
+    datetime_filter: Optional[DatetimeFilter]
+    limit: int
+    geom_column: str
+    tolerance: Optional[float]
+    exclude_columns: List[str]
+    items_url: str
+
+
+async def plan_query(index: int, query: BatchQuery, tables: List[str], base_url: str) -> PlannedQuery:
+    """Validate a sub-query and apply the same admission policy as the items endpoint"""
+    client = get_duckdb_client()
+    if query.collection not in tables:
+        raise HTTPException(status_code=404, detail=f"queries[{index}]: Collection {query.collection} not found")
+    if query.limit > settings.MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"queries[{index}]: limit must be at most {settings.MAX_LIMIT}")
+
+    bbox_tuple = None
+    if query.bbox:
+        bbox_tuple = parse_bbox(",".join(str(x) for x in query.bbox))
+
+    if query.properties:
+        schema_columns = {column["name"] for column in client.get_table_schema(query.collection)}
+        unknown = [name for name in query.properties if name not in schema_columns]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"queries[{index}]: Unknown properties: {', '.join(unknown)}"
+            )
+
+    geom_column, tolerance, exclude_columns = await resolve_geometry(query.collection, query.zoom)
+    datetime_filter = await resolve_datetime_filter(query.collection, query.datetime)
+
+    h3_cells = await asyncio.to_thread(client.spatial_filter_cells, bbox_tuple, table_name=query.collection)
+    cost = await estimate_query_cost(query.collection, h3_cells, query.limit, 0, datetime_filter)
+    limit = apply_admission_policy(cost, query.limit)
+
+    # Equivalent items request, used for links and part headers
+    params = {"limit": limit}
+    if query.bbox:
+        params["bbox"] = ",".join(str(x) for x in query.bbox)
+    if query.datetime:
+        params["datetime"] = query.datetime
+    if query.properties:
+        params["properties"] = ",".join(query.properties)
+    if query.zoom is not None:
+        params["zoom"] = query.zoom
+    if query.precision is not None:
+        params["precision"] = query.precision
+
+    return PlannedQuery(
+        query=query,
+        bbox=bbox_tuple,
+        datetime_filter=datetime_filter,
+        limit=limit,
+        geom_column=geom_column,
+        tolerance=tolerance,
+        exclude_columns=exclude_columns,
+        items_url=f"{base_url}/collections/{query.collection}/items?{urlencode(params)}"
+    )
+
+
+async def execute_query(
+    request: Request,
+    planned: PlannedQuery,
+    use_arrow: bool,
+    semaphore: asyncio.Semaphore
+) -> Any:
+    """Run one sub-query; returns an Arrow table or (rows, has_more)"""
+    client = get_duckdb_client()
+    query = planned.query
+
+    async with semaphore:
+        # Each sub-query runs in its own task, so it gets its own metric labels
+        metrics.start_request(query.collection, "arrow" if use_arrow else "json")
+
+        if use_arrow:
+            arrow_table = await run_query(request, lambda cursor: client.query_features_arrow(
+                table_name=query.collection,
+                bbox=planned.bbox,
+                limit=planned.limit,
+                datetime_filter=planned.datetime_filter,
+                precision=query.precision,
+                simplify_tolerance=planned.tolerance,
+                geom_column=planned.geom_column,
+                exclude_columns=planned.exclude_columns,
+                properties=query.properties,
+                cursor=cursor
+            ))
+            if arrow_table is None:
+                raise HTTPException(status_code=500, detail=f"Error querying {query.collection}")
+            return arrow_table
+
+        # Fetch one extra row to know whether a next page exists
+        rows = await run_query(request, lambda cursor: client.query_features(
+            table_name=query.collection,
+            bbox=planned.bbox,
+            limit=planned.limit + 1,
+            properties=query.properties,
+            geom_column=planned.geom_column,
+            datetime_filter=planned.datetime_filter,
+            precision=query.precision,
+            simplify_tolerance=planned.tolerance,
+            exclude_columns=planned.exclude_columns,
+            cursor=cursor
+        ))
+        return rows[:planned.limit], len(rows) > planned.limit
+
+
+async def gather_cancelling(*coroutines) -> List[Any]:
+    """Like asyncio.gather, but cancels the remaining coroutines when one fails"""
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def build_multipart(parts: List[Tuple[dict, bytes]], boundary: str) -> bytes:
+    """Assemble a multipart/mixed body from (headers, content) parts"""
+    chunks = []
+    for headers, content in parts:
+        chunks.append(f"--{boundary}\r\n".encode())
+        for name, value in headers.items():
+            chunks.append(f"{name}: {value}\r\n".encode())
+        chunks.append(b"\r\n")
+        chunks.append(content)
+        chunks.append(b"\r\n")
+    chunks.append(f"--{boundary}--\r\n".encode())
+    return b"".join(chunks)
+
+
+@router.post("/batch", tags=["Features"])
+async def batch_query(batch: BatchRequest, request: Request):
+    """
+    Run several feature queries in one round trip
+
+    Sub-queries may target different collections or bounding boxes and run
+    concurrently. GeoJSON results come back as a list of feature collections;
+    Arrow results as a multipart/mixed body with one IPC stream per sub-query,
+    in request order.
+    """
+    if len(batch.queries) > settings.MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch may contain at most {settings.MAX_BATCH_QUERIES} queries"
+        )
+
+    base_url = str(request.base_url).rstrip("/")
+    client = get_duckdb_client()
+    accept_header = request.headers.get("accept", "")
+    use_arrow = batch.format == "arrow" or "application/vnd.apache.arrow" in accept_header
+    if use_arrow and not settings.ENABLE_GEOARROW:
+        raise HTTPException(status_code=400, detail="GeoArrow format not enabled")
+
+    # One catalog lookup serves every sub-query
+    tables = client.list_tables()
+    try:
+        planned = [await plan_query(i, query, tables, base_url) for i, query in enumerate(batch.queries)]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch query: {e}")
+
+    # Stay within the per-client admission limit instead of tripping it
+    semaphore = asyncio.Semaphore(settings.MAX_QUERIES_PER_CLIENT)
+    results = await gather_cancelling(*(
+        execute_query(request, p, use_arrow, semaphore) for p in planned
+    ))
+
+    if use_arrow:
+        parts = []
+        for p, arrow_table in zip(planned, results):
+            headers = {
+                "Content-Type": ARROW_MEDIA_TYPE,
+                "Content-Location": p.items_url
+            }
+            if p.limit != p.query.limit:
+                headers["X-Query-Downgraded"] = f"limit={p.limit}"
+            content = arrow_to_ipc(arrow_table, settings.ARROW_IPC_COMPRESSION)
+            headers["Content-Length"] = str(len(content))
+            parts.append((headers, content))
+
+        boundary = uuid.uuid4().hex
+        response_headers = {}
+        if settings.ARROW_IPC_COMPRESSION:
+            response_headers["Cache-Control"] = "no-transform"
+        return Response(
+            content=build_multipart(parts, boundary),
+            media_type=f"multipart/mixed; boundary={boundary}",
+            headers=response_headers
+        )
+
+    collections = []
+    for p, (rows, has_more) in zip(planned, results):
+        links = [Link(href=p.items_url, rel="self", type="application/geo+json")]
+        if has_more:
+            links.append(Link(href=f"{p.items_url}&offset={p.limit}", rel="next", type="application/geo+json"))
+        features = rows_to_features(rows, p.query.precision)
+        collections.append(FeatureCollection(
+            type="FeatureCollection",
+            features=features,
+            links=links,
+            numberReturned=len(features)
+        ))
+
+    content = BatchResponse(results=collections, timeStamp=datetime.utcnow()).model_dump_json()
+    return Response(content=content, media_type="application/json")
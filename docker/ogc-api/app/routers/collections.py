@@ -3,19 +3,35 @@ OGC API Features - Collections router
 """
 from fastapi import APIRouter, Request, Query, HTTPException, Response
 from fastapi.responses import StreamingResponse
-from typing import Optional, List
+from typing import Optional, List, Tuple, Dict, Any
 from datetime import datetime
+from urllib.parse import urlencode
+import asyncio
 import json
-import pyarrow as pa
+import time
 import logging
 
-from app.models import Collections, Collection, Link, Extent, FeatureCollection, Feature
-from app.duckdb_client import get_duckdb_client
+from app.models import (
+    Collections, Collection, Link, Extent, FeatureCollection, FeatureReference, ItemsSearch,
+    CollectionStatistics, ColumnStatistics
+)
+from app.duckdb_client import get_duckdb_client, zoom_to_tolerance, geometry_positions, SIMPLIFIED_GEOMETRY_PREFIX
+from app.iceberg_catalog import get_iceberg_client, ColumnStats
+from app.params import DatetimeFilter, parse_bbox, parse_datetime
+from app.encoding import arrow_to_ipc, rows_to_features
+from app.query_control import run_query, estimate_query_cost, apply_admission_policy, apply_count_policy
 from app.config import settings
+from app import metrics
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+QUERYABLES_REL = "http://www.opengis.net/def/rel/ogc/1.0/queryables"
+JSON_SCHEMA_DIALECT = "https://json-schema.org/draft/2019-09/schema"
+
+# DuckDB integer types, described as JSON Schema integers
+INTEGER_TYPES = ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT")
+
 
 @router.get("/collections", response_model=Collections, tags=["Collections"])
 async def get_collections(request: Request):
@@ -29,14 +45,7 @@ async def get_collections(request: Request):
     
     collections = []
     for table_name in tables:
-        extent_bbox = client.get_table_extent(table_name)
-        
-        extent = Extent(
-            spatial={
-                "bbox": [list(extent_bbox) if extent_bbox else [-180, -90, 180, 90]],
-                "crs": "http://www.opengis.net/def/crs/OGC/1.3/CRS84"
-            }
-        )
+        extent = await build_extent(table_name)
         
         collection = Collection(
             id=table_name,
@@ -54,6 +63,12 @@ async def get_collections(request: Request):
                     rel="items",
                     type="application/geo+json",
                     title=f"{table_name} features"
+                ),
+                Link(
+                    href=f"{base_url}/collections/{table_name}/queryables",
+                    rel=QUERYABLES_REL,
+                    type="application/schema+json",
+                    title=f"{table_name} queryables"
                 )
             ],
             extent=extent
@@ -84,14 +99,7 @@ async def get_collection(collection_id: str, request: Request):
     if collection_id not in tables:
         raise HTTPException(status_code=404, detail=f"Collection {collection_id} not found")
     
-    extent_bbox = client.get_table_extent(collection_id)
-    
-    extent = Extent(
-        spatial={
-            "bbox": [list(extent_bbox) if extent_bbox else [-180, -90, 180, 90]],
-            "crs": "http://www.opengis.net/def/crs/OGC/1.3/CRS84"
-        }
-    )
+    extent = await build_extent(collection_id)
     
     return Collection(
         id=collection_id,
@@ -107,43 +115,286 @@ async def get_collection(collection_id: str, request: Request):
                 href=f"{base_url}/collections/{collection_id}/items",
                 rel="items",
                 type="application/geo+json"
+            ),
+            Link(
+                href=f"{base_url}/collections/{collection_id}/queryables",
+                rel=QUERYABLES_REL,
+                type="application/schema+json"
+            ),
+            Link(
+                href=f"{base_url}/collections/{collection_id}/statistics",
+                rel="statistics",
+                type="application/json"
             )
         ],
         extent=extent
     )
 
 
+async def build_extent(table_name: str) -> Extent:
+    """Build the spatial extent from the data and the temporal extent from Iceberg metadata"""
+    extent_bbox = get_duckdb_client().get_table_extent(table_name)
+    
+    temporal_interval = [None, None]
+    try:
+        temporal_extent = (await get_iceberg_client().get_table_stats_async(table_name)).temporal_extent
+        if temporal_extent:
+            temporal_interval = [
+                f"{value.isoformat()}Z" if value else None for value in temporal_extent
+            ]
+    except Exception as e:
+        logger.warning(f"Could not read temporal extent for {table_name}: {e}")
+    
+    return Extent(
+        spatial={
+            "bbox": [list(extent_bbox) if extent_bbox else [-180, -90, 180, 90]],
+            "crs": "http://www.opengis.net/def/crs/OGC/1.3/CRS84"
+        },
+        temporal={
+            "interval": [temporal_interval],
+            "trs": "http://www.opengis.net/def/uom/ISO-8601/0/Gregorian"
+        }
+    )
+
+
+def queryable_schema(column_type: str, column_stats: Optional[ColumnStats]) -> Optional[Dict[str, Any]]:
+    """JSON Schema for a column, narrowed by its statistics; None for non-queryable types"""
+    column_type = column_type.upper()
+    if column_type.startswith("TIMESTAMP"):
+        return {"type": "string", "format": "date-time"}
+    if column_type == "DATE":
+        return {"type": "string", "format": "date"}
+    if column_type == "BOOLEAN":
+        return {"type": "boolean"}
+    
+    if column_type in INTEGER_TYPES:
+        schema = {"type": "integer"}
+    elif column_type in ("FLOAT", "DOUBLE", "REAL") or column_type.startswith("DECIMAL"):
+        schema = {"type": "number"}
+    elif column_type == "VARCHAR":
+        schema = {"type": "string"}
+    else:
+        return None
+    
+    if column_stats is not None:
+        if schema["type"] == "string":
+            if column_stats.values:
+                schema["enum"] = sorted(column_stats.values)
+        else:
+            if column_stats.min is not None:
+                schema["minimum"] = column_stats.min
+            if column_stats.max is not None:
+                schema["maximum"] = column_stats.max
+    return schema
+
+
+@router.get("/collections/{collection_id}/queryables", tags=["Collections"])
+async def get_queryables(collection_id: str, request: Request):
+    """
+    Get the properties of a collection that can be used in queries, as JSON Schema
+    
+    Ranges and enumerations come from precomputed column statistics, so no
+    data is scanned.
+    """
+    base_url = str(request.base_url).rstrip("/")
+    client = get_duckdb_client()
+    
+    if collection_id not in client.list_tables():
+        raise HTTPException(status_code=404, detail=f"Collection {collection_id} not found")
+    
+    column_stats, datetime_column = {}, None
+    try:
+        stats = await get_iceberg_client().get_table_stats_async(collection_id)
+        column_stats, datetime_column = stats.columns, stats.datetime_column
+    except Exception as e:
+        logger.warning(f"Could not read column statistics for {collection_id}: {e}")
+    
+    properties = {}
+    for column in client.get_table_schema(collection_id):
+        name = column["name"]
+        if name == "h3_cell" or name.startswith(SIMPLIFIED_GEOMETRY_PREFIX):
+            continue
+        if name == "geometry":
+            properties[name] = {"format": "geometry-any", "x-ogc-role": "primary-geometry"}
+            continue
+        schema = queryable_schema(column["type"], column_stats.get(name))
+        if schema is None:
+            continue
+        if name == datetime_column:
+            schema["x-ogc-role"] = "primary-instant"
+        properties[name] = {"title": name, **schema}
+    
+    content = {
+        "$schema": JSON_SCHEMA_DIALECT,
+        "$id": f"{base_url}/collections/{collection_id}/queryables",
+        "type": "object",
+        "title": collection_id.replace("_", " ").title(),
+        "properties": properties,
+        "additionalProperties": False
+    }
+    return Response(content=json.dumps(content, default=str), media_type="application/schema+json")
+
+
+@router.get("/collections/{collection_id}/statistics", response_model=CollectionStatistics, tags=["Collections"])
+async def get_statistics(collection_id: str, request: Request):
+    """
+    Get per-column statistics for a collection
+    
+    Min/max, null counts, distinct counts, histograms and value counts, computed
+    once per snapshot by the ETL. Collections loaded without statistics report
+    the min/max bounds and null counts from the Iceberg manifests.
+    """
+    base_url = str(request.base_url).rstrip("/")
+    client = get_duckdb_client()
+    
+    if collection_id not in client.list_tables():
+        raise HTTPException(status_code=404, detail=f"Collection {collection_id} not found")
+    
+    try:
+        stats = await get_iceberg_client().get_table_stats_async(collection_id)
+    except Exception as e:
+        logger.error(f"Could not read statistics for {collection_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Could not read statistics for {collection_id}")
+    
+    return CollectionStatistics(
+        id=collection_id,
+        snapshotId=stats.snapshot_id,
+        numberOfFeatures=stats.record_count,
+        source=stats.column_stats_source,
+        columns={
+            name: ColumnStatistics(
+                type=column.type,
+                min=column.min,
+                max=column.max,
+                nullCount=column.null_count,
+                distinctCount=column.distinct_count,
+                histogram=column.histogram,
+                values=column.values,
+                maxExtent=column.max_extent
+            )
+            for name, column in stats.columns.items()
+        },
+        links=[
+            Link(
+                href=f"{base_url}/collections/{collection_id}/statistics",
+                rel="self",
+                type="application/json"
+            ),
+            Link(
+                href=f"{base_url}/collections/{collection_id}",
+                rel="collection",
+                type="application/json"
+            )
+        ]
+    )
+
+
+async def resolve_datetime_filter(table_name: str, value: Optional[str]) -> Optional[DatetimeFilter]:
+    """Parse the datetime parameter against the collection's temporal column"""
+    if not value:
+        return None
+    
+    try:
+        start, end = parse_datetime(value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid datetime parameter: {e}")
+    
+    try:
+        column = (await get_iceberg_client().get_table_stats_async(table_name)).datetime_column
+    except Exception as e:
+        logger.error(f"Could not read the temporal column of {table_name}: {e}")
+        raise HTTPException(status_code=503, detail=f"Metadata for {table_name} is unavailable, please retry later")
+    
+    if column is None:
+        raise HTTPException(status_code=400, detail=f"Collection {table_name} has no temporal column")
+    
+    return DatetimeFilter(column=column, start=start, end=end)
+
+
+async def resolve_geometry(
+    table_name: str,
+    zoom: Optional[int] = None,
+    simplify_tolerance: Optional[float] = None
+) -> Tuple[str, Optional[float], List[str]]:
+    """
+    Choose the geometry column and simplification tolerance for a request
+    
+    A zoom level uses the closest precomputed column at least as detailed as
+    that zoom, else simplifies at query time; an explicit tolerance always
+    simplifies the full-resolution geometry. Returns the geometry column, the
+    runtime tolerance and the precomputed columns to leave out of the output.
+    """
+    client = get_duckdb_client()
+    
+    # A schema cache miss queries the catalog, so look it up on a worker thread
+    def load() -> Dict[int, str]:
+        cursor = client.cursor()
+        try:
+            return client.get_simplified_geometry_columns(table_name, cursor)
+        finally:
+            cursor.close()
+    
+    precomputed = await asyncio.to_thread(load)
+    exclude_columns = list(precomputed.values())
+    
+    if simplify_tolerance is not None or zoom is None:
+        return "geometry", simplify_tolerance, exclude_columns
+    
+    detailed_enough = [level for level in precomputed if level >= zoom]
+    if detailed_enough:
+        return precomputed[min(detailed_enough)], None, exclude_columns
+    return "geometry", zoom_to_tolerance(zoom), exclude_columns
+
+
 @router.get("/collections/{collection_id}/items", tags=["Features"])
 async def get_features(
     collection_id: str,
     request: Request,
     bbox: Optional[str] = Query(None, description="Bounding box: minx,miny,maxx,maxy"),
+    datetime_param: Optional[str] = Query(
+        None,
+        alias="datetime",
+        description="Instant or interval, e.g. 2018-02-12T23:20:50Z or 2018-02-12/.."
+    ),
     limit: int = Query(settings.DEFAULT_LIMIT, ge=1, le=settings.MAX_LIMIT),
     offset: int = Query(0, ge=0),
     properties: Optional[str] = Query(None, description="Comma-separated list of properties"),
-    f: Optional[str] = Query("json", description="Output format: json or arrow")
+    f: Optional[str] = Query("json", description="Output format: json or arrow"),
+    profile: bool = Query(False, description="Return the EXPLAIN ANALYZE profile instead of features"),
+    count: str = Query(
+        settings.DEFAULT_COUNT_MODE,
+        pattern="^(metadata|exact|none)$",
+        description="numberMatched mode: metadata, exact or none; counts scanning too many rows are skipped"
+    ),
+    precision: Optional[int] = Query(
+        None, ge=0, le=15, description="Round coordinates to this many decimal places"
+    ),
+    zoom: Optional[int] = Query(
+        None, ge=0, le=24, description="Map zoom level; simplifies geometries to sub-pixel detail"
+    ),
+    simplify_tolerance: Optional[float] = Query(
+        None,
+        alias="simplify-tolerance",
+        gt=0,
+        description="Topology-preserving simplification tolerance in degrees"
+    ),
+    arrow_compression: Optional[str] = Query(
+        settings.ARROW_IPC_COMPRESSION,
+        alias="arrow-compression",
+        pattern="^(lz4|zstd)$",
+        description="Arrow IPC buffer compression: lz4 or zstd"
+    )
 ):
     """
     Get features from a collection
     
     Supports both GeoJSON and GeoArrow output formats
     """
-    base_url = str(request.base_url).rstrip("/")
-    client = get_duckdb_client()
-    
-    # Validate collection exists
-    tables = client.list_tables()
-    if collection_id not in tables:
-        raise HTTPException(status_code=404, detail=f"Collection {collection_id} not found")
-    
     # Parse bbox
     bbox_tuple = None
     if bbox:
         try:
-            coords = [float(x) for x in bbox.split(",")]
-            if len(coords) != 4:
-                raise ValueError("bbox must have 4 values")
-            bbox_tuple = tuple(coords)
+            bbox_tuple = parse_bbox(bbox)
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Invalid bbox parameter: {e}")
     
@@ -152,126 +403,298 @@ async def get_features(
     if properties:
         props_list = [p.strip() for p in properties.split(",")]
     
-    # Handle GeoArrow format
+    return await serve_features(
+        request,
+        collection_id,
+        bbox_tuple=bbox_tuple,
+        datetime_param=datetime_param,
+        limit=limit,
+        offset=offset,
+        props_list=props_list,
+        f=f,
+        profile=profile,
+        count=count,
+        precision=precision,
+        zoom=zoom,
+        simplify_tolerance=simplify_tolerance,
+        arrow_compression=arrow_compression
+    )
+
+
+@router.post("/collections/{collection_id}/items", tags=["Features"])
+async def search_features(collection_id: str, search: ItemsSearch, request: Request):
+    """
+    Get features from a collection, with filters in a JSON body
+    
+    Accepts an `intersects` filter: a GeoJSON geometry, or a reference to a
+    feature of another collection whose geometry is used. Only the H3
+    partitions covering the geometry are scanned.
+    """
+    client = get_duckdb_client()
+    if collection_id not in client.list_tables():
+        raise HTTPException(status_code=404, detail=f"Collection {collection_id} not found")
+    
+    limit = search.limit or settings.DEFAULT_LIMIT
+    if limit > settings.MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be at most {settings.MAX_LIMIT}")
+    
+    bbox_tuple = None
+    if search.bbox:
+        bbox_tuple = parse_bbox(",".join(str(x) for x in search.bbox))
+    
+    intersects = None
+    if isinstance(search.intersects, FeatureReference):
+        reference = search.intersects
+        if reference.collection not in client.list_tables():
+            raise HTTPException(status_code=404, detail=f"Collection {reference.collection} not found")
+        intersects = await run_query(
+            request,
+            lambda cursor: client.get_feature_geometry(reference.collection, reference.featureId, cursor=cursor)
+        )
+        if intersects is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Feature {reference.featureId} not found in {reference.collection}"
+            )
+        if "coordinates" not in intersects:
+            raise HTTPException(status_code=400, detail=f"Feature {reference.featureId} has no simple geometry")
+    elif search.intersects is not None:
+        intersects = search.intersects.model_dump()
+    
+    if intersects is not None:
+        vertices = sum(1 for _ in geometry_positions(intersects["coordinates"]))
+        if vertices > settings.MAX_INTERSECTS_VERTICES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"intersects geometry has {vertices:,} vertices (max {settings.MAX_INTERSECTS_VERTICES:,})"
+            )
+    
+    return await serve_features(
+        request,
+        collection_id,
+        bbox_tuple=bbox_tuple,
+        datetime_param=search.datetime,
+        limit=limit,
+        offset=search.offset,
+        props_list=search.properties,
+        f=search.f,
+        count=search.count or settings.DEFAULT_COUNT_MODE,
+        precision=search.precision,
+        zoom=search.zoom,
+        intersects=intersects,
+        search_body=search.model_dump(exclude_none=True)
+    )
+
+
+async def serve_features(
+    request: Request,
+    collection_id: str,
+    bbox_tuple: Optional[Tuple[float, float, float, float]] = None,
+    datetime_param: Optional[str] = None,
+    limit: int = settings.DEFAULT_LIMIT,
+    offset: int = 0,
+    props_list: Optional[List[str]] = None,
+    f: Optional[str] = "json",
+    profile: bool = False,
+    count: str = settings.DEFAULT_COUNT_MODE,
+    precision: Optional[int] = None,
+    zoom: Optional[int] = None,
+    simplify_tolerance: Optional[float] = None,
+    arrow_compression: Optional[str] = settings.ARROW_IPC_COMPRESSION,
+    intersects: Optional[Dict[str, Any]] = None,
+    search_body: Optional[Dict[str, Any]] = None
+) -> Response:
+    """
+    Run a feature query and render it as GeoJSON or GeoArrow
+    
+    `search_body` is the JSON body of a POST query; its links repeat the POST
+    with an updated offset instead of carrying query parameters.
+    """
+    base_url = str(request.base_url).rstrip("/")
+    client = get_duckdb_client()
+    
+    # Validate collection exists
+    catalog_start = time.perf_counter()
+    tables = client.list_tables()
+    if collection_id not in tables:
+        raise HTTPException(status_code=404, detail=f"Collection {collection_id} not found")
+    
+    # Bind metric labels only for known collections to keep label cardinality bounded
     accept_header = request.headers.get("accept", "")
-    if f == "arrow" or "application/vnd.apache.arrow" in accept_header:
+    use_arrow = f == "arrow" or "application/vnd.apache.arrow" in accept_header
+    request_profile = metrics.start_request(collection_id, "arrow" if use_arrow else "json")
+    request_profile.record(metrics.STAGE_CATALOG, time.perf_counter() - catalog_start)
+    
+    # Property names are spliced into SQL, so only accept known columns
+    if props_list:
+        schema_columns = {column["name"] for column in client.get_table_schema(collection_id)}
+        unknown = [name for name in props_list if name not in schema_columns]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown properties: {', '.join(unknown)}")
+    
+    # Parse datetime
+    datetime_filter = await resolve_datetime_filter(collection_id, datetime_param)
+    
+    # Resolve geometry simplification
+    geom_column, tolerance, exclude_columns = await resolve_geometry(collection_id, zoom, simplify_tolerance)
+    
+    # Estimate scan cost from manifest statistics and apply admission policy
+    h3_cells = await asyncio.to_thread(client.spatial_filter_cells, bbox_tuple, intersects, collection_id)
+    cost = await estimate_query_cost(collection_id, h3_cells, limit, offset, datetime_filter)
+    response_headers = {}
+    admitted_limit = apply_admission_policy(cost, limit)
+    if admitted_limit != limit:
+        logger.info(f"Downgraded query on {collection_id} from limit {limit} to {admitted_limit}")
+        response_headers["X-Query-Downgraded"] = f"limit={admitted_limit}"
+        limit = admitted_limit
+    
+    # numberMatched can need a COUNT(*) over everything the query matches
+    if not use_arrow:
+        admitted_count = await apply_count_policy(
+            collection_id, h3_cells, count, bbox_tuple, datetime_filter, intersects
+        )
+        if admitted_count != count:
+            logger.info(f"Skipped numberMatched count on {collection_id}")
+            downgrades = [response_headers.get("X-Query-Downgraded"), f"count={admitted_count}"]
+            response_headers["X-Query-Downgraded"] = ", ".join(d for d in downgrades if d)
+            count = admitted_count
+    
+    # Handle profiling requests
+    if profile or request.headers.get("x-debug-profile", "").lower() in ("1", "true"):
+        if not settings.ENABLE_QUERY_PROFILING:
+            raise HTTPException(status_code=400, detail="Query profiling not enabled")
+        
+        if use_arrow:
+            query = client.build_features_arrow_query(
+                collection_id, bbox_tuple, limit, offset,
+                datetime_filter=datetime_filter, precision=precision, simplify_tolerance=tolerance,
+                geom_column=geom_column, exclude_columns=exclude_columns, intersects=intersects
+            )
+        else:
+            query = client.build_features_query(
+                collection_id, bbox_tuple, limit, offset, props_list, geom_column,
+                datetime_filter=datetime_filter, precision=precision, simplify_tolerance=tolerance,
+                exclude_columns=exclude_columns, intersects=intersects
+            )
+        
+        plan = await run_query(request, lambda cursor: client.explain_analyze(query, cursor=cursor))
+        
+        return {
+            "collection": collection_id,
+            "format": request_profile.format,
+            "query": query.strip(),
+            "timings": request_profile.timings,
+            "plan": plan
+        }
+    
+    # Handle GeoArrow format
+    if use_arrow:
         if not settings.ENABLE_GEOARROW:
             raise HTTPException(status_code=400, detail="GeoArrow format not enabled")
         
-        arrow_table = client.query_features_arrow(
+        arrow_table = await run_query(request, lambda cursor: client.query_features_arrow(
             table_name=collection_id,
             bbox=bbox_tuple,
             limit=limit,
-            offset=offset
-        )
+            offset=offset,
+            datetime_filter=datetime_filter,
+            precision=precision,
+            simplify_tolerance=tolerance,
+            geom_column=geom_column,
+            exclude_columns=exclude_columns,
+            intersects=intersects,
+            cursor=cursor
+        ))
         
         if arrow_table is None:
             raise HTTPException(status_code=500, detail="Error generating Arrow response")
         
         # Serialize to IPC format
-        sink = pa.BufferOutputStream()
-        with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
-            writer.write_table(arrow_table)
+        with metrics.stage(metrics.STAGE_SERIALIZATION):
+            content = arrow_to_ipc(arrow_table, arrow_compression)
+        
+        # Compressed IPC buffers gain nothing from HTTP content encoding
+        if arrow_compression:
+            response_headers["Cache-Control"] = "no-transform"
         
-        buffer = sink.getvalue()
+        metrics.observe_response_bytes(len(content))
         
         return Response(
-            content=buffer.to_pybytes(),
-            media_type="application/vnd.apache.arrow.stream"
+            content=content,
+            media_type="application/vnd.apache.arrow.stream",
+            headers=response_headers
         )
     
     # Handle GeoJSON format (default)
-    features_data = client.query_features(
-        table_name=collection_id,
-        bbox=bbox_tuple,
-        limit=limit,
-        offset=offset,
-        properties=props_list
-    )
+    def fetch_page(cursor):
+        # Fetch one extra row to know whether a next page exists
+        rows = client.query_features(
+            table_name=collection_id,
+            bbox=bbox_tuple,
+            limit=limit + 1,
+            offset=offset,
+            properties=props_list,
+            geom_column=geom_column,
+            datetime_filter=datetime_filter,
+            precision=precision,
+            simplify_tolerance=tolerance,
+            exclude_columns=exclude_columns,
+            intersects=intersects,
+            cursor=cursor
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        if count == "none":
+            matched = None
+        elif not has_more and (rows or offset == 0):
+            # The last page already tells us the total
+            matched = offset + len(rows)
+        else:
+            matched = client.count_features(
+                collection_id, bbox_tuple, mode=count, datetime_filter=datetime_filter,
+                intersects=intersects, cursor=cursor
+            )
+        return rows, has_more, matched
+    
+    features_data, has_more, number_matched = await run_query(request, fetch_page)
     
     # Convert to GeoJSON features
-    features = []
-    for feat_data in features_data:
-        geom_wkt = feat_data.pop("geom_wkt", None)
-        
-        # Parse WKT to GeoJSON geometry
-        geometry = None
-        if geom_wkt:
-            geometry = wkt_to_geojson(geom_wkt)
+    serialization_start = time.perf_counter()
+    features = rows_to_features(features_data, precision)
+    
+    # Build response links, carrying over all query parameters
+    items_url = f"{base_url}/collections/{collection_id}/items"
+    if search_body is not None:
+        links = [
+            Link(href=items_url, rel="self", type="application/geo+json", method="POST", body=search_body)
+        ]
+        if has_more:
+            next_body = {**search_body, "offset": offset + limit, "limit": limit}
+            links.append(Link(href=items_url, rel="next", type="application/geo+json", method="POST", body=next_body))
+    else:
+        query_params = dict(request.query_params)
+        self_link = f"{items_url}?{urlencode(query_params)}" if query_params else items_url
         
-        # Remove internal columns
-        properties = {k: v for k, v in feat_data.items() if k not in ["geometry", "h3_cell"]}
+        links = [
+            Link(href=self_link, rel="self", type="application/geo+json")
+        ]
         
-        feature = Feature(
-            type="Feature",
-            id=feat_data.get("id"),
-            geometry=geometry,
-            properties=properties
-        )
-        features.append(feature)
+        # Add next link if more results available
+        if has_more:
+            next_params = {**query_params, "offset": offset + limit, "limit": limit}
+            next_link = f"{items_url}?{urlencode(next_params)}"
+            links.append(Link(href=next_link, rel="next", type="application/geo+json"))
     
-    # Build response links
-    self_link = f"{base_url}/collections/{collection_id}/items"
-    if bbox:
-        self_link += f"?bbox={bbox}"
-    if limit != settings.DEFAULT_LIMIT:
-        self_link += f"&limit={limit}"
-    
-    links = [
-        Link(href=self_link, rel="self", type="application/geo+json")
-    ]
-    
-    # Add next link if more results available
-    if len(features) == limit:
-        next_offset = offset + limit
-        next_link = f"{base_url}/collections/{collection_id}/items?offset={next_offset}&limit={limit}"
-        if bbox:
-            next_link += f"&bbox={bbox}"
-        links.append(Link(href=next_link, rel="next", type="application/geo+json"))
-    
-    return FeatureCollection(
+    content = FeatureCollection(
         type="FeatureCollection",
         features=features,
         links=links,
         timeStamp=datetime.utcnow(),
+        numberMatched=number_matched,
         numberReturned=len(features)
-    )
-
-
-def wkt_to_geojson(wkt: str) -> dict:
-    """Convert WKT geometry to GeoJSON"""
-    try:
-        # Simple WKT parser for common geometry types
-        wkt = wkt.strip()
-        
-        if wkt.startswith("POINT"):
-            coords_str = wkt.replace("POINT", "").replace("(", "").replace(")", "").strip()
-            coords = [float(x) for x in coords_str.split()]
-            return {"type": "Point", "coordinates": coords}
-        
-        elif wkt.startswith("LINESTRING"):
-            coords_str = wkt.replace("LINESTRING", "").replace("(", "").replace(")", "").strip()
-            coords = [[float(x) for x in pair.split()] for pair in coords_str.split(",")]
-            return {"type": "LineString", "coordinates": coords}
-        
-        elif wkt.startswith("POLYGON"):
-            # Remove POLYGON and outer parens
-            coords_str = wkt.replace("POLYGON", "").strip()
-            coords_str = coords_str[1:-1]  # Remove outer parens
-            
-            # Split rings
-            rings = []
-            for ring_str in coords_str.split("),("):
-                ring_str = ring_str.replace("(", "").replace(")", "").strip()
-                ring = [[float(x) for x in pair.split()] for pair in ring_str.split(",")]
-                rings.append(ring)
-            
-            return {"type": "Polygon", "coordinates": rings}
-        
-        else:
-            logger.warning(f"Unsupported WKT geometry type: {wkt[:20]}")
-            return None
-            
-    except Exception as e:
-        logger.error(f"Error parsing WKT: {e}")
-        return None
\ No newline at end of file
+    ).model_dump_json()
+    request_profile.record(metrics.STAGE_SERIALIZATION, time.perf_counter() - serialization_start)
+    metrics.observe_response_bytes(len(content))
+    
+    return Response(content=content, media_type="application/geo+json", headers=response_headers)
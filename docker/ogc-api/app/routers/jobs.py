@@ -0,0 +1,194 @@
+"""
+Bulk export jobs router
+"""
+from fastapi import APIRouter, Request, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from typing import Optional, Tuple
+import logging
+
+import fsspec
+
+from app.models import ExportRequest, JobStatus, JobState, Link
+from app.duckdb_client import get_duckdb_client
+from app.export_jobs import ExportJob, get_export_manager, MEDIA_TYPES, FILE_EXTENSIONS
+from app.params import parse_bbox
+from app.routers.collections import resolve_datetime_filter
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Columns managed by the platform rather than exported as properties
+INTERNAL_COLUMNS = ("geometry", "h3_cell")
+
+# Bytes read per chunk when streaming results
+CHUNK_SIZE = 1024 * 1024
+
+
+def build_job_status(job: ExportJob, base_url: str) -> JobStatus:
+    """Build the status document for a job"""
+    links = [
+        Link(href=f"{base_url}/jobs/{job.job_id}", rel="self", type="application/json")
+    ]
+    if job.status == JobState.SUCCESSFUL:
+        links.append(Link(
+            href=f"{base_url}/jobs/{job.job_id}/results",
+            rel="http://www.opengis.net/def/rel/ogc/1.0/results",
+            type=MEDIA_TYPES[job.format],
+            title=f"{job.collection}.{FILE_EXTENSIONS[job.format]}"
+        ))
+
+    return JobStatus(
+        jobID=job.job_id,
+        status=job.status,
+        collection=job.collection,
+        format=job.format,
+        created=job.created,
+        started=job.started,
+        finished=job.finished,
+        message=job.message,
+        numberWritten=job.rows_written,
+        sizeBytes=job.size_bytes,
+        links=links
+    )
+
+
+def parse_range(range_header: str, size: int) -> Tuple[int, int]:
+    """Parse a single-range `bytes=` header into an inclusive (start, end)"""
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        raise ValueError("Only single byte ranges are supported")
+
+    start_str, _, end_str = spec.strip().partition("-")
+    if start_str:
+        start = int(start_str)
+        end = min(int(end_str), size - 1) if end_str else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(size - int(end_str), 0)
+        end = size - 1
+
+    if start > end or start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+@router.post("/collections/{collection_id}/exports", status_code=201, response_model=JobStatus, tags=["Exports"])
+async def create_export(collection_id: str, export: ExportRequest, request: Request, response: Response):
+    """
+    Start a background export of a collection to GeoParquet or FlatGeobuf
+
+    Poll the returned job for status and download the file from its results link.
+    """
+    base_url = str(request.base_url).rstrip("/")
+    client = get_duckdb_client()
+
+    tables = client.list_tables()
+    if collection_id not in tables:
+        raise HTTPException(status_code=404, detail=f"Collection {collection_id} not found")
+
+    # Validate column references against the schema
+    schema_columns = {column["name"] for column in client.get_table_schema(collection_id)}
+    requested = list(export.properties or []) + list((export.filter or {}).keys())
+    unknown = [name for name in requested if name not in schema_columns]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown properties: {', '.join(unknown)}")
+
+    bbox_tuple = None
+    if export.bbox:
+        bbox_tuple = parse_bbox(",".join(str(x) for x in export.bbox))
+
+    properties = None
+    if export.properties:
+        properties = [name for name in export.properties if name not in INTERNAL_COLUMNS]
+
+    job = get_export_manager().submit(
+        collection=collection_id,
+        fmt=export.format,
+        bbox=bbox_tuple,
+        datetime_filter=await resolve_datetime_filter(collection_id, export.datetime),
+        properties=properties,
+        property_filters=export.filter
+    )
+
+    response.headers["Location"] = f"{base_url}/jobs/{job.job_id}"
+    return build_job_status(job, base_url)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus, tags=["Exports"])
+async def get_job(job_id: str, request: Request):
+    """
+    Get the status of an export job
+    """
+    job = get_export_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return build_job_status(job, str(request.base_url).rstrip("/"))
+
+
+@router.delete("/jobs/{job_id}", response_model=JobStatus, tags=["Exports"])
+async def dismiss_job(job_id: str, request: Request):
+    """
+    Cancel an export job and delete its output
+    """
+    job = get_export_manager().dismiss(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return build_job_status(job, str(request.base_url).rstrip("/"))
+
+
+@router.get("/jobs/{job_id}/results", tags=["Exports"])
+async def get_job_results(job_id: str, request: Request):
+    """
+    Download the output of a finished export job
+
+    Supports single HTTP byte ranges so large files can be fetched in parts or resumed.
+    """
+    job = get_export_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job.status != JobState.SUCCESSFUL:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status.value}")
+
+    fs, path = fsspec.core.url_to_fs(job.location)
+    size = fs.size(path)
+    headers = {
+        "Accept-Ranges": "bytes",
+        # Ranges refer to the stored bytes, so the body must not be re-encoded
+        "Cache-Control": "no-transform",
+        "Content-Disposition": f'attachment; filename="{job.collection}.{FILE_EXTENSIONS[job.format]}"'
+    }
+
+    start, end = 0, size - 1
+    status_code = 200
+    range_header: Optional[str] = request.headers.get("range")
+    if range_header and size > 0:
+        try:
+            start, end = parse_range(range_header, size)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=416,
+                detail=str(e),
+                headers={"Content-Range": f"bytes */{size}"}
+            )
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+
+    def iter_file():
+        with fs.open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    return StreamingResponse(
+        iter_file(),
+        status_code=status_code,
+        media_type=MEDIA_TYPES[job.format],
+        headers=headers
+    )
@@ -0,0 +1,289 @@
+"""
+Spatial queries: joins between collections and nearest-neighbour search
+"""
+from fastapi import APIRouter, Request, Query, HTTPException, Response
+from typing import List, Optional
+from datetime import datetime
+from urllib.parse import urlencode
+import time
+import logging
+
+import h3
+
+from app.models import Link, FeatureCollection
+from app.duckdb_client import get_duckdb_client, join_ring_size
+from app.params import parse_bbox, parse_point
+from app.encoding import arrow_to_ipc, rows_to_features
+from app.query_control import run_query, estimate_join_cost, apply_admission_policy
+from app.config import settings
+from app import metrics
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+def parse_properties(value: Optional[str], schema_columns: set, parameter: str) -> Optional[List[str]]:
+    """Split a comma-separated property list and check it against a schema"""
+    if not value:
+        return None
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in schema_columns]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown {parameter}: {', '.join(unknown)}")
+    return names
+
+
+@router.get("/collections/{collection_id}/join", tags=["Features"])
+async def spatial_join(
+    collection_id: str,
+    request: Request,
+    other: str = Query(..., alias="with", description="Collection to join with"),
+    predicate: str = Query(
+        "intersects",
+        pattern="^(intersects|contains|within|dwithin)$",
+        description="Spatial predicate, evaluated as predicate(feature, other feature)"
+    ),
+    distance: Optional[float] = Query(None, gt=0, description="Distance in degrees for dwithin"),
+    ring: int = Query(
+        settings.JOIN_RING_SIZE,
+        ge=0,
+        description="Extra H3 rings to search, for features larger than a partition cell"
+    ),
+    bbox: Optional[str] = Query(None, description="Bounding box: minx,miny,maxx,maxy"),
+    limit: int = Query(settings.DEFAULT_LIMIT, ge=1, le=settings.MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+    properties: Optional[str] = Query(None, description="Comma-separated list of properties"),
+    other_properties: Optional[str] = Query(
+        None, alias="with-properties", description="Comma-separated list of properties of the joined collection"
+    ),
+    f: Optional[str] = Query("json", description="Output format: json or arrow"),
+    precision: Optional[int] = Query(
+        None, ge=0, le=15, description="Round coordinates to this many decimal places"
+    )
+):
+    """
+    Join the features of a collection with those of another collection
+
+    Each result is a feature of this collection, with its geometry, carrying the
+    properties of a matching feature of the other collection as "{other}.{name}".
+    Candidate pairs come from an equi-join on the shared h3_cell partition column,
+    expanded by enough neighbour rings to span the largest features of both
+    collections, so joins cost partition-pruned scans. Joins whose features are
+    too large for JOIN_MAX_RING_SIZE rings are rejected.
+    """
+    base_url = str(request.base_url).rstrip("/")
+    client = get_duckdb_client()
+
+    catalog_start = time.perf_counter()
+    tables = client.list_tables()
+    for table_name in (collection_id, other):
+        if table_name not in tables:
+            raise HTTPException(status_code=404, detail=f"Collection {table_name} not found")
+
+    accept_header = request.headers.get("accept", "")
+    use_arrow = f == "arrow" or "application/vnd.apache.arrow" in accept_header
+    if use_arrow and not settings.ENABLE_GEOARROW:
+        raise HTTPException(status_code=400, detail="GeoArrow format not enabled")
+    request_profile = metrics.start_request(collection_id, "arrow" if use_arrow else "json")
+    request_profile.record(metrics.STAGE_CATALOG, time.perf_counter() - catalog_start)
+
+    if predicate == "dwithin" and distance is None:
+        raise HTTPException(status_code=400, detail="The dwithin predicate requires a distance")
+
+    # Features reach beyond their centroid cell by up to half their diagonal
+    extents = await run_query(request, lambda cursor: [
+        client.get_max_feature_extent(table_name, cursor=cursor) for table_name in (collection_id, other)
+    ])
+    extent = sum(extents) / 2
+    join_resolution = client.join_resolution(collection_id, other)
+    k = join_ring_size(distance, ring, join_resolution, extent)
+    if k > settings.JOIN_MAX_RING_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Join would search {k} H3 rings (max {settings.JOIN_MAX_RING_SIZE}) to cover features "
+                f"up to {max(extents):.3g} degrees across; reduce distance or ring"
+            )
+        )
+
+    bbox_tuple = None
+    if bbox:
+        try:
+            bbox_tuple = parse_bbox(bbox)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid bbox parameter: {e}")
+
+    # Property names are quoted into SQL, so only accept known columns
+    props_list = parse_properties(
+        properties, {c["name"] for c in client.get_table_schema(collection_id)}, "properties"
+    )
+    other_props_list = parse_properties(
+        other_properties, {c["name"] for c in client.get_table_schema(other)}, "with-properties"
+    )
+
+    # Estimate scan cost of both sides and apply admission policy
+    left_cells, right_cells = None, None
+    if bbox_tuple:
+        covering = client.bbox_to_h3_cells(bbox_tuple)
+        left_cells = client.partition_cells(collection_id, covering)
+        right_cells = client.join_right_cells(other, bbox_tuple, k, join_resolution)
+    cost = await estimate_join_cost(collection_id, other, left_cells, right_cells)
+    response_headers = {}
+    admitted_limit = apply_admission_policy(cost, limit)
+    if admitted_limit != limit:
+        logger.info(f"Downgraded join on {collection_id} x {other} from limit {limit} to {admitted_limit}")
+        response_headers["X-Query-Downgraded"] = f"limit={admitted_limit}"
+        limit = admitted_limit
+
+    join_args = dict(
+        predicate=predicate,
+        bbox=bbox_tuple,
+        distance=distance,
+        ring=ring,
+        extent=extent,
+        limit=limit,
+        offset=offset,
+        left_properties=props_list,
+        right_properties=other_props_list,
+        precision=precision
+    )
+
+    if use_arrow:
+        arrow_table = await run_query(
+            request, lambda cursor: client.query_join_arrow(collection_id, other, cursor=cursor, **join_args)
+        )
+        if arrow_table is None:
+            raise HTTPException(status_code=500, detail="Error generating Arrow response")
+        with metrics.stage(metrics.STAGE_SERIALIZATION):
+            content = arrow_to_ipc(arrow_table, settings.ARROW_IPC_COMPRESSION)
+        if settings.ARROW_IPC_COMPRESSION:
+            response_headers["Cache-Control"] = "no-transform"
+        metrics.observe_response_bytes(len(content))
+        return Response(
+            content=content,
+            media_type="application/vnd.apache.arrow.stream",
+            headers=response_headers
+        )
+
+    # Fetch one extra row to know whether a next page exists
+    join_args["limit"] = limit + 1
+    rows = await run_query(
+        request, lambda cursor: client.query_join(collection_id, other, cursor=cursor, **join_args)
+    )
+    has_more = len(rows) > limit
+
+    serialization_start = time.perf_counter()
+    features = rows_to_features(rows[:limit], precision)
+
+    join_url = f"{base_url}/collections/{collection_id}/join"
+    query_params = dict(request.query_params)
+    links = [
+        Link(href=f"{join_url}?{urlencode(query_params)}", rel="self", type="application/geo+json")
+    ]
+    if has_more:
+        next_params = {**query_params, "offset": offset + limit, "limit": limit}
+        links.append(Link(href=f"{join_url}?{urlencode(next_params)}", rel="next", type="application/geo+json"))
+
+    content = FeatureCollection(
+        type="FeatureCollection",
+        features=features,
+        links=links,
+        timeStamp=datetime.utcnow(),
+        numberReturned=len(features)
+    ).model_dump_json()
+    request_profile.record(metrics.STAGE_SERIALIZATION, time.perf_counter() - serialization_start)
+    metrics.observe_response_bytes(len(content))
+
+    return Response(content=content, media_type="application/geo+json", headers=response_headers)
+
+
+@router.get("/collections/{collection_id}/nearest", tags=["Features"])
+async def nearest_features(
+    collection_id: str,
+    request: Request,
+    point: str = Query(..., description="Query point: lon,lat"),
+    k: int = Query(10, ge=1, le=settings.NEAREST_MAX_K, description="Number of features to return"),
+    properties: Optional[str] = Query(None, description="Comma-separated list of properties"),
+    f: Optional[str] = Query("json", description="Output format: json or arrow"),
+    precision: Optional[int] = Query(
+        None, ge=0, le=15, description="Round coordinates to this many decimal places"
+    )
+):
+    """
+    Get the k features nearest a point
+
+    Features are ranked by geodesic distance from their centroid to the point,
+    returned in metres as the distance_m property. Only the H3 partitions
+    around the point are read.
+    """
+    base_url = str(request.base_url).rstrip("/")
+    client = get_duckdb_client()
+
+    catalog_start = time.perf_counter()
+    tables = client.list_tables()
+    if collection_id not in tables:
+        raise HTTPException(status_code=404, detail=f"Collection {collection_id} not found")
+
+    accept_header = request.headers.get("accept", "")
+    use_arrow = f == "arrow" or "application/vnd.apache.arrow" in accept_header
+    if use_arrow and not settings.ENABLE_GEOARROW:
+        raise HTTPException(status_code=400, detail="GeoArrow format not enabled")
+    request_profile = metrics.start_request(collection_id, "arrow" if use_arrow else "json")
+    request_profile.record(metrics.STAGE_CATALOG, time.perf_counter() - catalog_start)
+
+    try:
+        point_tuple = parse_point(point)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid point parameter: {e}")
+
+    props_list = parse_properties(
+        properties, {c["name"] for c in client.get_table_schema(collection_id)}, "properties"
+    )
+
+    try:
+        result = await run_query(request, lambda cursor: client.query_nearest(
+            collection_id,
+            point_tuple,
+            k=k,
+            properties=props_list,
+            precision=precision,
+            arrow=use_arrow,
+            cursor=cursor
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid point parameter: {e}")
+    except h3.H3BaseException as e:
+        logger.error(f"H3 error in k-NN search on {collection_id}: {e}")
+        raise HTTPException(status_code=503, detail="Nearest-neighbour search is unavailable for this point")
+
+    if use_arrow:
+        with metrics.stage(metrics.STAGE_SERIALIZATION):
+            content = arrow_to_ipc(result, settings.ARROW_IPC_COMPRESSION)
+        response_headers = {}
+        if settings.ARROW_IPC_COMPRESSION:
+            response_headers["Cache-Control"] = "no-transform"
+        metrics.observe_response_bytes(len(content))
+        return Response(
+            content=content,
+            media_type="application/vnd.apache.arrow.stream",
+            headers=response_headers
+        )
+
+    serialization_start = time.perf_counter()
+    features = rows_to_features(result, precision)
+    nearest_url = f"{base_url}/collections/{collection_id}/nearest"
+    links = [
+        Link(href=f"{nearest_url}?{urlencode(dict(request.query_params))}", rel="self", type="application/geo+json")
+    ]
+
+    content = FeatureCollection(
+        type="FeatureCollection",
+        features=features,
+        links=links,
+        timeStamp=datetime.utcnow(),
+        numberReturned=len(features)
+    ).model_dump_json()
+    request_profile.record(metrics.STAGE_SERIALIZATION, time.perf_counter() - serialization_start)
+    metrics.observe_response_bytes(len(content))
+
+    return Response(content=content, media_type="application/geo+json")
@@ -0,0 +1,63 @@
+"""
+Batch response assembly
+"""
+import asyncio
+from email.parser import BytesParser
+from email.policy import HTTP
+
+import pytest
+
+from app.routers.batch import build_multipart, gather_cancelling
+
+
+def parse_multipart(body: bytes, boundary: str):
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: multipart/mixed; boundary={boundary}\r\n\r\n".encode() + body
+    )
+    return list(message.iter_parts())
+
+
+def test_build_multipart_round_trips():
+    arrow = bytes(range(256)) + b"\r\n--not-a-boundary\r\n"
+    body = build_multipart([
+        ({"Content-Type": "application/vnd.apache.arrow.stream", "X-Query-Index": "0"}, arrow),
+        ({"Content-Type": "application/vnd.apache.arrow.stream", "X-Query-Index": "1"}, b""),
+    ], "batch-boundary")
+    
+    assert body.startswith(b"--batch-boundary\r\n")
+    assert body.endswith(b"--batch-boundary--\r\n")
+    
+    parts = parse_multipart(body, "batch-boundary")
+    assert [part["X-Query-Index"] for part in parts] == ["0", "1"]
+    assert parts[0].get_payload(decode=True) == arrow
+    assert parts[1].get_payload(decode=True) == b""
+
+
+def test_build_multipart_without_parts():
+    assert build_multipart([], "b") == b"--b--\r\n"
+
+
+def test_gather_cancelling_preserves_order():
+    async def value(delay, result):
+        await asyncio.sleep(delay)
+        return result
+    
+    assert asyncio.run(gather_cancelling(value(0.02, "a"), value(0, "b"))) == ["a", "b"]
+
+
+def test_gather_cancelling_cancels_siblings_on_failure():
+    cancelled = []
+    
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+    
+    async def failing():
+        raise RuntimeError("query failed")
+    
+    with pytest.raises(RuntimeError):
+        asyncio.run(gather_cancelling(slow(), failing()))
+    assert cancelled == [True]
@@ -0,0 +1,56 @@
+"""
+Column statistics and histogram selectivity
+"""
+from datetime import datetime
+
+import pytest
+
+from app.iceberg_catalog import ColumnStats
+
+
+def uniform_column(null_count=0):
+    return ColumnStats(
+        type="number",
+        min=0.0,
+        max=100.0,
+        null_count=null_count,
+        histogram={"bounds": [0.0, 25.0, 50.0, 75.0, 100.0], "counts": [10, 10, 10, 10]}
+    )
+
+
+def test_range_selectivity_interpolates_within_bins():
+    column = uniform_column()
+    assert column.range_selectivity(0.0, 100.0) == pytest.approx(1.0)
+    assert column.range_selectivity(0.0, 50.0) == pytest.approx(0.5)
+    assert column.range_selectivity(10.0, 20.0) == pytest.approx(0.1)
+
+
+def test_range_selectivity_open_ends():
+    column = uniform_column()
+    assert column.range_selectivity(None, 25.0) == pytest.approx(0.25)
+    assert column.range_selectivity(75.0, None) == pytest.approx(0.25)
+    assert column.range_selectivity() == pytest.approx(1.0)
+
+
+def test_range_selectivity_outside_range_and_nulls():
+    assert uniform_column().range_selectivity(200.0, 300.0) == 0.0
+    # Nulls never match a range
+    assert uniform_column(null_count=40).range_selectivity() == pytest.approx(0.5)
+
+
+def test_range_selectivity_without_histogram():
+    assert ColumnStats(type="number", min=0, max=1).range_selectivity(0, 1) is None
+
+
+def test_from_property_parses_datetime_histogram():
+    column = ColumnStats.from_property({
+        "type": "datetime",
+        "min": "2024-01-01T00:00:00",
+        "max": "2024-01-03T00:00:00",
+        "nullCount": 0,
+        "histogram": {"bounds": ["2024-01-01T00:00:00", "2024-01-02T00:00:00", "2024-01-03T00:00:00"], "counts": [3, 1]}
+    })
+    
+    assert column.min == datetime(2024, 1, 1)
+    assert column.range_selectivity(datetime(2024, 1, 2), None) == pytest.approx(0.25)
+    assert column.range_selectivity(None, datetime(2024, 1, 1, 12)) == pytest.approx(0.375)
@@ -0,0 +1,56 @@
+"""
+Content-Encoding negotiation and streaming compression
+"""
+import zlib
+
+import pytest
+
+from app import compression
+from app.compression import _Compressor, negotiate_encoding
+
+
+@pytest.fixture(autouse=True)
+def all_encodings(monkeypatch):
+    # Server preference order when zstandard and brotli are installed
+    monkeypatch.setattr(compression, "available_encodings", lambda: ["zstd", "br", "gzip"])
+
+
+def test_server_preference_breaks_ties():
+    assert negotiate_encoding("gzip, br, zstd") == "zstd"
+    assert negotiate_encoding("gzip, br") == "br"
+    assert negotiate_encoding("gzip") == "gzip"
+
+
+def test_client_q_values_win():
+    assert negotiate_encoding("zstd;q=0.5, gzip;q=0.9") == "gzip"
+    assert negotiate_encoding("br;q=1.0, zstd;q=0.1") == "br"
+
+
+def test_refused_and_unknown_codings():
+    assert negotiate_encoding("") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("deflate, compress") is None
+    # Malformed q values refuse the coding
+    assert negotiate_encoding("gzip;q=high") is None
+
+
+def test_wildcard():
+    assert negotiate_encoding("*") == "zstd"
+    assert negotiate_encoding("zstd;q=0, *;q=0.5") == "br"
+
+
+def test_case_and_whitespace_are_ignored():
+    assert negotiate_encoding(" GZIP ;q=0.8 ,  Br;q=0.2") == "gzip"
+
+
+def test_gzip_chunks_decode_incrementally():
+    compressor = _Compressor("gzip")
+    decompressor = zlib.decompressobj(31)
+    
+    first = compressor.compress(b'{"type": "FeatureCollection", ')
+    # Each chunk is flushed, so the client can decode it before the stream ends
+    assert decompressor.decompress(first) == b'{"type": "FeatureCollection", '
+    rest = compressor.compress(b'"features": []}') + compressor.finish()
+    assert decompressor.decompress(rest) == b'"features": []}'
+    assert decompressor.eof
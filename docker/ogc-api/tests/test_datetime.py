@@ -0,0 +1,93 @@
+"""
+OGC `datetime` parameter parsing and resolution
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from pyiceberg.schema import Schema
+from pyiceberg.types import NestedField, StringType, TimestampType
+
+from app.iceberg_catalog import DATETIME_COLUMN_PROPERTY, TableStats, _find_datetime_field
+from app.params import _parse_instant, parse_datetime
+from app.routers import collections
+
+
+def test_parse_instant_normalizes_offsets_to_utc():
+    assert _parse_instant("2018-02-12T23:20:50Z") == datetime(2018, 2, 12, 23, 20, 50)
+    assert _parse_instant("2018-02-12t23:20:50z") == datetime(2018, 2, 12, 23, 20, 50)
+    assert _parse_instant("2018-02-13T01:20:50+02:00") == datetime(2018, 2, 12, 23, 20, 50)
+
+
+def test_parse_instant_bare_date():
+    assert _parse_instant("2018-02-12") == datetime(2018, 2, 12)
+    assert _parse_instant("2018-02-12", end_of_day=True) == datetime(2018, 2, 12, 23, 59, 59, 999999)
+
+
+def test_parse_datetime_instant():
+    instant = datetime(2018, 2, 12, 23, 20, 50)
+    assert parse_datetime("2018-02-12T23:20:50Z") == (instant, instant)
+    # A bare date matches the whole day
+    assert parse_datetime("2018-02-12") == (datetime(2018, 2, 12), datetime(2018, 2, 12, 23, 59, 59, 999999))
+
+
+def test_parse_datetime_intervals():
+    assert parse_datetime("2018-02-12T00:00:00Z/2018-03-18T12:31:12Z") == (
+        datetime(2018, 2, 12), datetime(2018, 3, 18, 12, 31, 12)
+    )
+    assert parse_datetime("../2018-03-18") == (None, datetime(2018, 3, 18, 23, 59, 59, 999999))
+    assert parse_datetime("2018-02-12/..") == (datetime(2018, 2, 12), None)
+    assert parse_datetime("2018-02-12/") == (datetime(2018, 2, 12), None)
+
+
+@pytest.mark.parametrize("value", ["../..", "2018-03-18/2018-02-12", "yesterday", "2018-13-01"])
+def test_parse_datetime_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        parse_datetime(value)
+
+
+class StubIcebergClient:
+    def __init__(self, stats=None, error=None):
+        self.stats, self.error = stats, error
+
+    async def get_table_stats_async(self, table_name):
+        if self.error:
+            raise self.error
+        return self.stats
+
+
+def resolve(monkeypatch, client, value="2018-02-12"):
+    monkeypatch.setattr(collections, "get_iceberg_client", lambda: client)
+    return asyncio.run(collections.resolve_datetime_filter("events", value))
+
+
+def test_resolve_datetime_filter(monkeypatch):
+    datetime_filter = resolve(monkeypatch, StubIcebergClient(TableStats(datetime_column="observed_at")))
+    assert datetime_filter.column == "observed_at"
+    assert datetime_filter.start == datetime(2018, 2, 12)
+
+
+def test_resolve_datetime_filter_errors(monkeypatch):
+    with pytest.raises(HTTPException) as error:
+        resolve(monkeypatch, StubIcebergClient(TableStats()))
+    assert error.value.status_code == 400
+    
+    with pytest.raises(HTTPException) as error:
+        resolve(monkeypatch, StubIcebergClient(error=OSError("catalog unreachable")))
+    assert error.value.status_code == 503
+    
+    with pytest.raises(HTTPException) as error:
+        resolve(monkeypatch, StubIcebergClient(TableStats(datetime_column="observed_at")), "not-a-date")
+    assert error.value.status_code == 400
+
+
+def test_find_datetime_field():
+    schema = Schema(
+        NestedField(1, "name", StringType(), required=False),
+        NestedField(2, "observed_at", TimestampType(), required=False),
+        NestedField(3, "updated_at", TimestampType(), required=False),
+    )
+    assert _find_datetime_field(schema, {}).name == "observed_at"
+    assert _find_datetime_field(schema, {DATETIME_COLUMN_PROPERTY: "updated_at"}).name == "updated_at"
+    assert _find_datetime_field(schema, {DATETIME_COLUMN_PROPERTY: "missing"}) is None
@@ -0,0 +1,66 @@
+"""
+GeoJSON geometry decoding of query rows
+"""
+import json
+
+from app.encoding import parse_geojson_geometry, rows_to_features
+
+
+def test_polygon_holes_stay_separate_rings():
+    geom = {
+        "type": "Polygon",
+        "coordinates": [
+            [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]],
+            [[2, 2], [4, 2], [4, 4], [2, 2]]
+        ]
+    }
+    
+    parsed = parse_geojson_geometry(json.dumps(geom))
+    
+    assert parsed == geom
+
+
+def test_multi_geometries_are_rounded():
+    geom = {
+        "type": "MultiPolygon",
+        "coordinates": [
+            [[[0.123456, 0.0], [1.0, 0.0], [1.0, 1.987654], [0.123456, 0.0]]],
+            [[[5.0, 5.0], [6.0, 5.0], [6.0, 6.0], [5.0, 5.0]]]
+        ]
+    }
+    
+    parsed = parse_geojson_geometry(json.dumps(geom), precision=2)
+    
+    assert parsed["type"] == "MultiPolygon"
+    assert parsed["coordinates"][0][0] == [[0.12, 0.0], [1.0, 0.0], [1.0, 1.99], [0.12, 0.0]]
+    assert len(parsed["coordinates"]) == 2
+
+
+def test_empty_geometry_is_kept():
+    parsed = parse_geojson_geometry('{"type":"Polygon","coordinates":[]}', precision=3)
+    
+    assert parsed == {"type": "Polygon", "coordinates": []}
+
+
+def test_geometry_collection_is_rounded():
+    geom = {
+        "type": "GeometryCollection",
+        "geometries": [
+            {"type": "Point", "coordinates": [1.23456, 2.34567]},
+            {"type": "LineString", "coordinates": [[0.11111, 0.22222], [1.0, 1.0]]}
+        ]
+    }
+    
+    parsed = parse_geojson_geometry(json.dumps(geom), precision=1)
+    
+    assert parsed["geometries"][0]["coordinates"] == [1.2, 2.3]
+    assert parsed["geometries"][1]["coordinates"] == [[0.1, 0.2], [1.0, 1.0]]
+
+
+def test_rows_to_features_drops_internal_columns():
+    rows = [{"id": 7, "name": "a", "h3_cell": 123, "geom_json": '{"type":"Point","coordinates":[1.0,2.0]}'}]
+    
+    features = rows_to_features(rows)
+    
+    assert features[0].geometry == {"type": "Point", "coordinates": [1.0, 2.0]}
+    assert features[0].properties == {"id": 7, "name": "a"}
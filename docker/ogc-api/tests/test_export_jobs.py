@@ -0,0 +1,103 @@
+"""
+Export job lifecycle and result downloads
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import export_jobs
+from app.config import settings
+from app.export_jobs import ExportJob, ExportJobManager
+from app.models import ExportFormat, JobState
+from app.routers.jobs import parse_range
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    # Ends past the file are clamped; suffix ranges count from the end
+    assert parse_range("bytes=900-5000", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=-5000", 1000) == (0, 999)
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=50-10", "items=0-1", "bytes=0-1,5-6", "bytes=a-b"])
+def test_parse_range_rejects_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1000)
+
+
+def add_job(manager, tmp_path, status, finished=None):
+    job_id = f"job{len(manager._jobs)}"
+    location = tmp_path / f"{job_id}.parquet"
+    location.write_bytes(b"data")
+    job = ExportJob(
+        job_id=job_id,
+        collection="parcels",
+        format=ExportFormat.GEOPARQUET,
+        location=str(location),
+        status=status,
+        finished=finished
+    )
+    manager._jobs[job_id] = job
+    return job
+
+
+@pytest.fixture
+def manager():
+    manager = ExportJobManager()
+    yield manager
+    manager.executor.shutdown()
+
+
+def test_sweep_evicts_expired_jobs_and_outputs(manager, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_JOB_TTL_SECONDS", 3600)
+    now = datetime.utcnow()
+    expired = add_job(manager, tmp_path, JobState.SUCCESSFUL, now - timedelta(hours=2))
+    recent = add_job(manager, tmp_path, JobState.SUCCESSFUL, now)
+    running = add_job(manager, tmp_path, JobState.RUNNING)
+    
+    manager._sweep()
+    
+    assert manager.get(expired.job_id) is None
+    assert not (tmp_path / f"{expired.job_id}.parquet").exists()
+    assert manager.get(recent.job_id) is recent
+    assert manager.get(running.job_id) is running
+
+
+def test_sweep_caps_tracked_jobs(manager, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_MAX_JOBS", 2)
+    now = datetime.utcnow()
+    oldest = add_job(manager, tmp_path, JobState.FAILED, now - timedelta(minutes=2))
+    newer = add_job(manager, tmp_path, JobState.SUCCESSFUL, now - timedelta(minutes=1))
+    queued = add_job(manager, tmp_path, JobState.ACCEPTED)
+    
+    manager._sweep()
+    
+    assert set(manager._jobs) == {newer.job_id, queued.job_id}
+    assert manager.get(oldest.job_id) is None
+
+
+def test_dismissing_queued_job_finishes_it(manager, tmp_path):
+    job = add_job(manager, tmp_path, JobState.ACCEPTED)
+    
+    manager.dismiss(job.job_id)
+    manager._run(job)
+    
+    assert job.status == JobState.DISMISSED
+    assert job.finished is not None
+    assert job.started is None
+
+
+def test_cursor_failure_fails_job(manager, tmp_path, monkeypatch):
+    def unavailable():
+        raise RuntimeError("DuckDB is not available")
+    
+    monkeypatch.setattr(export_jobs, "get_duckdb_client", unavailable)
+    job = add_job(manager, tmp_path, JobState.ACCEPTED)
+    
+    manager._run(job)
+    
+    assert job.status == JobState.FAILED
+    assert job.message == "DuckDB is not available"
+    assert job.finished is not None
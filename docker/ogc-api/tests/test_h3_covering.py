@@ -0,0 +1,83 @@
+"""
+H3 coverings used for partition pruning
+"""
+import json
+import random
+
+import h3
+
+from app.config import settings
+from app.duckdb_client import DuckDBClient, _geometry_to_h3_cells, bbox_to_polygon
+
+
+def covering(geometry, resolution=settings.H3_RESOLUTION):
+    return _geometry_to_h3_cells(json.dumps(geometry, sort_keys=True), resolution)
+
+
+def test_small_bbox_is_covered():
+    bbox = (-122.7, 45.5, -122.6, 45.6)
+    cells = covering(bbox_to_polygon(bbox))
+    assert cells
+    assert h3.latlng_to_cell(45.55, -122.65, settings.H3_RESOLUTION) in cells
+
+
+def test_polygon_interior_is_polyfilled():
+    cells = covering(bbox_to_polygon((-123.0, 45.0, -121.0, 47.0)), resolution=7)
+    # Far more cells than the polygon's four corners
+    assert len(cells) > 100
+    assert h3.latlng_to_cell(46.0, -122.0, 7) in cells
+
+
+def test_multipolygon_covers_every_part():
+    geometry = {
+        "type": "MultiPolygon",
+        "coordinates": [
+            bbox_to_polygon((-122.7, 45.5, -122.6, 45.6))["coordinates"],
+            bbox_to_polygon((2.3, 48.8, 2.4, 48.9))["coordinates"]
+        ]
+    }
+    cells = covering(geometry)
+    assert h3.latlng_to_cell(45.55, -122.65, settings.H3_RESOLUTION) in cells
+    assert h3.latlng_to_cell(48.85, 2.35, settings.H3_RESOLUTION) in cells
+
+
+def test_point_gets_its_cell():
+    assert covering({"type": "Point", "coordinates": [-122.65, 45.55]}) == (
+        h3.latlng_to_cell(45.55, -122.65, settings.H3_RESOLUTION),
+    )
+
+
+def test_bbox_covering_holds_every_point_inside():
+    bbox = (-123.0, 45.0, -121.0, 47.0)
+    cells = set(covering(bbox_to_polygon(bbox)))
+    rng = random.Random(5)
+    for _ in range(5000):
+        lat, lng = rng.uniform(bbox[1], bbox[3]), rng.uniform(bbox[0], bbox[2])
+        assert h3.latlng_to_cell(lat, lng, settings.H3_RESOLUTION) in cells
+
+
+def test_line_covering_holds_every_crossed_cell():
+    line = {"type": "LineString", "coordinates": [[-123.0, 45.0], [-121.0, 47.0]]}
+    crossed = {
+        h3.latlng_to_cell(45.0 + 2.0 * i / 10000, -123.0 + 2.0 * i / 10000, settings.H3_RESOLUTION)
+        for i in range(10001)
+    }
+    assert len(crossed) > 2
+    assert crossed <= set(covering(line))
+
+
+def test_world_bbox_is_not_read_across_the_antimeridian():
+    # Edges longer than 180 degrees would otherwise select a thin strip around it
+    cells = covering(bbox_to_polygon((-180.0, -85.0, 180.0, 85.0)), resolution=2)
+    assert h3.latlng_to_cell(0.0, 0.0, 2) in cells
+    assert len(cells) > 0.9 * h3.get_num_cells(2)
+
+
+def test_spatial_filter_cells_intersects_bbox_and_geometry():
+    # Coverings need no connection, so skip DuckDB initialization
+    client = DuckDBClient.__new__(DuckDBClient)
+    bbox = (-122.7, 45.5, -122.6, 45.6)
+    point = {"type": "Point", "coordinates": [-122.65, 45.55]}
+    assert client.spatial_filter_cells(bbox) == sorted(covering(bbox_to_polygon(bbox)))
+    assert client.spatial_filter_cells(bbox, point) == [h3.latlng_to_cell(45.55, -122.65, settings.H3_RESOLUTION)]
+    assert client.spatial_filter_cells() is None
@@ -0,0 +1,36 @@
+"""
+Items endpoint request validation
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import collections
+
+
+class StubDuckDBClient:
+    def list_tables(self, cursor=None):
+        return ["parcels"]
+
+    def get_table_schema(self, table_name, cursor=None):
+        return [{"name": "id", "type": "INTEGER"}, {"name": "geometry", "type": "BLOB"}]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(collections, "get_duckdb_client", StubDuckDBClient)
+    app = FastAPI()
+    app.include_router(collections.router)
+    return TestClient(app)
+
+
+def test_search_rejects_unknown_properties(client):
+    response = client.post("/collections/parcels/items", json={"properties": ["id", "1; DROP TABLE parcels"]})
+    assert response.status_code == 400
+    assert "1; DROP TABLE parcels" in response.json()["detail"]
+
+
+def test_get_rejects_unknown_properties(client):
+    response = client.get("/collections/parcels/items", params={"properties": "id,owner"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown properties: owner"
@@ -0,0 +1,92 @@
+"""
+Spatial join ring sizing and pruning
+"""
+import math
+import random
+from types import SimpleNamespace
+
+import h3
+import pytest
+
+from app import duckdb_client
+from app.config import settings
+from app.duckdb_client import DuckDBClient, KM_PER_DEGREE, expand_cells, join_ring_size
+from app.iceberg_catalog import PartitionStats, TableStats
+
+
+def edge_degrees(resolution):
+    return h3.average_hexagon_edge_length(resolution, unit="km") / KM_PER_DEGREE
+
+
+def test_ring_only_without_distance_or_extent():
+    assert join_ring_size(None, 1, 5) == 1
+    assert join_ring_size(None, 0, 5, extent=0.0) == 0
+
+
+def test_extent_and_distance_add_rings():
+    edge = edge_degrees(5)
+    assert join_ring_size(None, 1, 5, extent=edge) == 2
+    assert join_ring_size(edge, 1, 5, extent=edge) == 3
+    assert join_ring_size(None, 1, 5, extent=10 * edge) > join_ring_size(None, 1, 5, extent=edge)
+
+
+@pytest.mark.parametrize("resolution", [4, 5, 6])
+def test_ring_reaches_every_centroid_within_reach(resolution):
+    rng = random.Random(resolution)
+    reach = 3 * edge_degrees(resolution)
+    k = join_ring_size(reach / 2, 1, resolution, extent=reach / 2)
+    for _ in range(200):
+        lat, lng = rng.uniform(-60, 60), rng.uniform(-179, 179)
+        angle = rng.uniform(0, 2 * math.pi)
+        other = (lat + reach * math.sin(angle), lng + reach * math.cos(angle))
+        a = h3.latlng_to_cell(lat, lng, resolution)
+        b = h3.latlng_to_cell(*other, resolution)
+        assert h3.grid_distance(a, b) <= k
+
+
+def test_expand_cells():
+    cell = h3.latlng_to_cell(45.5, -122.6, 5)
+    assert expand_cells([cell], 0) == [cell]
+    assert len(expand_cells([cell], 1)) == 7
+    neighbor = h3.grid_ring(cell, 1)[0]
+    assert len(expand_cells([cell, neighbor], 1)) < 14
+
+
+def test_right_prune_uses_join_resolution(monkeypatch):
+    client = DuckDBClient.__new__(DuckDBClient)
+    bbox = (-122.7, 45.5, -122.6, 45.6)
+    join_resolution = settings.H3_RESOLUTION - 2
+    center = h3.latlng_to_cell(45.55, -122.65, join_resolution)
+    neighbor = h3.grid_ring(center, 1)[0]
+    far = h3.grid_ring(center, 3)[0]
+    # Adaptive right table: coarse partitions plus a split one at the covering resolution
+    split = h3.cell_to_center_child(h3.grid_ring(center, 1)[1], settings.H3_RESOLUTION)
+    stats = TableStats(partitions={cell: PartitionStats(record_count=1) for cell in (center, neighbor, far, split)})
+    monkeypatch.setattr(duckdb_client, "get_iceberg_client", lambda: SimpleNamespace(get_table_stats=lambda t: stats))
+    
+    cells = client.join_right_cells("right", bbox, 1, join_resolution)
+    
+    # One ring at the join resolution reaches the neighbouring coarse partitions
+    assert {center, neighbor, split} <= set(cells)
+    assert far not in cells
+    assert client.join_resolution("left", "right") == join_resolution
+
+
+def test_default_right_properties_leave_out_internal_columns(monkeypatch):
+    client = DuckDBClient.__new__(DuckDBClient)
+    schema = [
+        {"name": "id", "type": "INTEGER"},
+        {"name": "name", "type": "VARCHAR"},
+        {"name": "geometry", "type": "BLOB"},
+        {"name": "h3_cell", "type": "VARCHAR"},
+    ]
+    monkeypatch.setattr(client, "partition_resolutions", lambda table: {settings.H3_RESOLUTION})
+    monkeypatch.setattr(client, "get_table_schema", lambda table, cursor=None: schema)
+    monkeypatch.setattr(client, "get_simplified_geometry_columns", lambda table, cursor=None: {})
+    
+    query = client.build_join_query("left", "right")
+    
+    assert 'r."id" AS "right.id"' in query
+    assert 'r."name" AS "right.name"' in query
+    assert '"right.h3_cell"' not in query
+    assert '"right.geometry"' not in query
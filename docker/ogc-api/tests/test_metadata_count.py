@@ -0,0 +1,76 @@
+"""
+numberMatched from manifest record counts
+"""
+import h3
+import pytest
+
+from app import duckdb_client
+from app.config import settings
+from app.duckdb_client import DuckDBClient
+from app.iceberg_catalog import PartitionStats, TableStats
+
+BBOX = (-123.0, 45.0, -121.0, 47.0)
+
+
+class StubIcebergClient:
+    def __init__(self, stats):
+        self.stats = stats
+
+    def get_table_stats(self, table_name):
+        return self.stats
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Metadata counts need no connection, so skip DuckDB initialization
+    client = DuckDBClient.__new__(DuckDBClient)
+    client.boundary_queries = []
+
+    def count_where(conn, table_name, where_clause):
+        client.boundary_queries.append(where_clause)
+        return 3
+
+    monkeypatch.setattr(client, "_count_where", count_where)
+    return client
+
+
+def use_stats(monkeypatch, stats):
+    monkeypatch.setattr(duckdb_client, "get_iceberg_client", lambda: StubIcebergClient(stats))
+
+
+def partitioned_stats(cells, record_count=10):
+    return TableStats(snapshot_id=1, partitions={cell: PartitionStats(record_count=record_count) for cell in cells})
+
+
+def test_interior_cells_counted_from_manifests(client, monkeypatch):
+    cells = client.spatial_filter_cells(BBOX)
+    use_stats(monkeypatch, partitioned_stats(cells))
+
+    count = client._count_from_metadata("t", BBOX, conn=None)
+
+    minx, miny, maxx, maxy = BBOX
+    interior = [
+        cell for cell in cells
+        if all(minx <= lng <= maxx and miny <= lat <= maxy for lat, lng in h3.cell_to_boundary(cell))
+    ]
+    assert interior
+    assert len(client.boundary_queries) == 1
+    assert count == 10 * len(interior) + 3
+
+
+def test_no_bbox_uses_total_record_count(client, monkeypatch):
+    use_stats(monkeypatch, partitioned_stats(["85283473fffffff", "85283447fffffff"]))
+    assert client._count_from_metadata("t", None, conn=None) == 20
+
+
+def test_deletes_fall_back_to_exact_count(client, monkeypatch):
+    stats = partitioned_stats(client.spatial_filter_cells(BBOX))
+    stats.partitions[None] = PartitionStats(record_count=1, has_deletes=True)
+    use_stats(monkeypatch, stats)
+    assert client._count_from_metadata("t", BBOX, conn=None) is None
+
+
+def test_empty_covering_falls_back_to_exact_count(client, monkeypatch):
+    use_stats(monkeypatch, partitioned_stats([h3.latlng_to_cell(46, -122, settings.H3_RESOLUTION)]))
+    monkeypatch.setattr(client, "spatial_filter_cells", lambda *args, **kwargs: None)
+    assert client._count_from_metadata("t", BBOX, conn=None) is None
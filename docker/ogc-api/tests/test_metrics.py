@@ -0,0 +1,57 @@
+"""
+Per-request stage timings
+"""
+import contextvars
+import time
+
+from app import metrics
+
+
+def profiled(func):
+    """Run func in a fresh context with a request profile bound"""
+    def run():
+        profile = metrics.start_request("parcels", "json")
+        func()
+        return profile
+    return contextvars.copy_context().run(run)
+
+
+def test_stage_records_elapsed_time():
+    def work():
+        with metrics.stage(metrics.STAGE_EXECUTION):
+            time.sleep(0.01)
+    
+    profile = profiled(work)
+    assert profile.timings[metrics.STAGE_EXECUTION] >= 0.01
+
+
+def test_nested_stage_time_is_not_double_counted():
+    def work():
+        with metrics.stage(metrics.STAGE_PLANNING):
+            time.sleep(0.01)
+            with metrics.stage(metrics.STAGE_H3_COVERING):
+                time.sleep(0.05)
+    
+    profile = profiled(work)
+    planning = profile.timings[metrics.STAGE_PLANNING]
+    covering = profile.timings[metrics.STAGE_H3_COVERING]
+    assert covering >= 0.05
+    assert 0.01 <= planning < 0.05
+
+
+def test_repeated_stages_accumulate():
+    def work():
+        for _ in range(3):
+            with metrics.stage(metrics.STAGE_COUNT):
+                time.sleep(0.005)
+    
+    profile = profiled(work)
+    assert profile.timings[metrics.STAGE_COUNT] >= 0.015
+
+
+def test_stage_without_profile_is_a_no_op():
+    def work():
+        with metrics.stage(metrics.STAGE_EXECUTION):
+            pass
+    
+    contextvars.Context().run(work)
@@ -0,0 +1,35 @@
+"""
+k-NN search helpers
+"""
+import h3
+import pytest
+
+from app.duckdb_client import nearest_safe_ring
+from app.params import parse_point
+
+
+def test_parse_point():
+    assert parse_point("-122.68,45.52") == (-122.68, 45.52)
+    with pytest.raises(ValueError):
+        parse_point("1,2,3")
+    with pytest.raises(ValueError):
+        parse_point("45.52,-200")
+
+
+def test_nearest_safe_ring_grows_with_distance():
+    assert nearest_safe_ring(0, 5) == 1
+    rings = [nearest_safe_ring(distance, 5) for distance in (1_000, 10_000, 100_000, 1_000_000)]
+    assert rings == sorted(rings)
+    assert rings[-1] > rings[0]
+
+
+@pytest.mark.parametrize("lat, lng", [(45.52, -122.68), (0.0, 0.0), (-33.9, 151.2), (64.1, -21.9)])
+def test_nearest_safe_ring_contains_every_closer_centroid(lat, lng):
+    resolution = 5
+    distance_m = 50_000
+    center = h3.latlng_to_cell(lat, lng, resolution)
+    rings = nearest_safe_ring(distance_m, resolution)
+    # Cells just outside the disk must have no point within distance_m of the query point
+    for cell in h3.grid_ring(center, rings + 1):
+        for vertex in h3.cell_to_boundary(cell):
+            assert h3.great_circle_distance((lat, lng), vertex, unit="m") > distance_m
@@ -0,0 +1,158 @@
+"""
+Admission control and manifest-based cost estimates
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from pyiceberg.partitioning import PartitionSpec
+from pyiceberg.schema import Schema
+from pyiceberg.types import NestedField, StringType
+from starlette.requests import Request
+
+from app import query_control
+from app.config import settings
+from app.iceberg_catalog import IcebergMetadataClient, PartitionStats, TableStats
+from app.query_control import (
+    QueryCost, admission_slot, apply_admission_policy, apply_count_policy, client_key, estimate_query_cost
+)
+
+
+def make_request(headers=None, host="10.0.0.1"):
+    return Request({
+        "type": "http",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+        "client": (host, 1234),
+    })
+
+
+def test_client_key_ignores_forwarded_for_by_default(monkeypatch):
+    monkeypatch.setattr(settings, "TRUST_FORWARDED_FOR", False)
+    assert client_key(make_request({"X-Forwarded-For": "203.0.113.7"})) == "10.0.0.1"
+
+
+def test_client_key_uses_first_forwarded_address_when_trusted(monkeypatch):
+    monkeypatch.setattr(settings, "TRUST_FORWARDED_FOR", True)
+    assert client_key(make_request({"X-Forwarded-For": "203.0.113.7, 10.0.0.2"})) == "203.0.113.7"
+    assert client_key(make_request()) == "10.0.0.1"
+
+
+def test_client_limit_queues_then_rejects(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_QUERIES_PER_CLIENT", 1)
+    monkeypatch.setattr(settings, "QUERY_QUEUE_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(query_control, "_semaphore", None)
+    order = []
+    
+    async def query(name, hold):
+        async with admission_slot(make_request()):
+            order.append(name)
+            await asyncio.sleep(hold)
+    
+    async def main():
+        # The second query waits for the first instead of failing
+        await asyncio.gather(query("first", 0.05), query("second", 0))
+        assert order == ["first", "second"]
+        
+        # A query still queued after the timeout is rejected
+        with pytest.raises(HTTPException) as error:
+            await asyncio.gather(query("slow", 0.5), query("late", 0))
+        assert error.value.status_code == 429
+        assert error.value.headers["Retry-After"] == str(settings.QUERY_RETRY_AFTER_SECONDS)
+    
+    asyncio.run(main())
+    assert query_control._client_inflight == {}
+    assert query_control._client_slots == {}
+
+
+def test_admission_policy_rejects_and_downgrades():
+    assert apply_admission_policy(None, 5000) == 5000
+    assert apply_admission_policy(QueryCost(cells=1, files=1, rows=10), 5000) == 5000
+    
+    downgraded = apply_admission_policy(QueryCost(cells=1, files=1, rows=settings.QUERY_DOWNGRADE_SCAN_ROWS + 1), 5000)
+    assert downgraded == settings.QUERY_DOWNGRADE_LIMIT
+    
+    with pytest.raises(HTTPException) as error:
+        apply_admission_policy(QueryCost(cells=1, files=1, rows=settings.QUERY_MAX_SCAN_ROWS + 1), 10)
+    assert error.value.status_code == 400
+
+
+def test_estimate_query_cost_charges_touched_partitions(monkeypatch):
+    stats = TableStats(partitions={
+        "a": PartitionStats(record_count=100, file_count=2),
+        "b": PartitionStats(record_count=50, file_count=1),
+        None: PartitionStats(record_count=5, file_count=1),
+    })
+    
+    class StubIcebergClient:
+        async def get_table_stats_async(self, table_name):
+            return stats
+    
+    monkeypatch.setattr(query_control, "get_iceberg_client", StubIcebergClient)
+    
+    cost = asyncio.run(estimate_query_cost("t", ["a", "missing"], limit=10, offset=0))
+    assert (cost.cells, cost.files, cost.rows) == (2, 3, 105)
+    
+    unfiltered = asyncio.run(estimate_query_cost("t", None, limit=10, offset=0))
+    assert unfiltered.rows == 10
+
+
+def test_count_policy_skips_counts_that_scan_too_much(monkeypatch):
+    stats = TableStats(partitions={
+        "a": PartitionStats(record_count=100, file_count=2),
+        "b": PartitionStats(record_count=settings.QUERY_DOWNGRADE_SCAN_ROWS, file_count=1),
+    })
+    
+    class StubIcebergClient:
+        async def get_table_stats_async(self, table_name):
+            return stats
+    
+    monkeypatch.setattr(query_control, "get_iceberg_client", StubIcebergClient)
+    bbox = (0.0, 0.0, 1.0, 1.0)
+    
+    # Manifest counts read no data files
+    assert asyncio.run(apply_count_policy("t", None, "metadata")) == "metadata"
+    assert asyncio.run(apply_count_policy("t", ["a", "b"], "metadata", bbox)) == "metadata"
+    
+    # COUNT(*) scans the touched partitions, or the whole table without a spatial filter
+    assert asyncio.run(apply_count_policy("t", ["a"], "exact", bbox)) == "exact"
+    assert asyncio.run(apply_count_policy("t", None, "exact")) == "none"
+    assert asyncio.run(apply_count_policy("t", None, "metadata", datetime_filter=object())) == "none"
+    assert asyncio.run(apply_count_policy("t", ["a", "b"], "metadata", intersects={"type": "Point"})) == "none"
+
+
+def test_count_policy_skips_counts_without_metadata(monkeypatch):
+    class StubIcebergClient:
+        async def get_table_stats_async(self, table_name):
+            raise RuntimeError("catalog unavailable")
+    
+    monkeypatch.setattr(query_control, "get_iceberg_client", StubIcebergClient)
+    
+    assert asyncio.run(apply_count_policy("t", None, "metadata")) == "none"
+    assert asyncio.run(apply_count_policy("t", None, "none")) == "none"
+
+
+def test_table_stats_without_h3_cell_column():
+    schema = Schema(NestedField(1, "name", StringType(), required=False))
+    table = SimpleNamespace(
+        schema=lambda: schema,
+        current_snapshot=lambda: SimpleNamespace(snapshot_id=7),
+        properties={},
+        spec=lambda: PartitionSpec(),
+        scan=lambda: SimpleNamespace(plan_files=lambda: [
+            SimpleNamespace(
+                file=SimpleNamespace(
+                    partition=[], record_count=3, file_size_in_bytes=10,
+                    null_value_counts={}, lower_bounds={}, upper_bounds={}
+                ),
+                delete_files=set()
+            )
+        ])
+    )
+    client = IcebergMetadataClient.__new__(IcebergMetadataClient)
+    client.load_table = lambda table_name: table
+    
+    stats = client._compute_table_stats("plain")
+    
+    assert stats.snapshot_id == 7
+    assert stats.partitions[None].record_count == 3
@@ -0,0 +1,85 @@
+"""
+Zoom-dependent simplification and schema lookups on query cursors
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app.config import settings
+from app.duckdb_client import DuckDBClient, SIMPLIFIED_GEOMETRY_PREFIX, zoom_to_tolerance
+from app.routers import collections
+
+
+class StubCursor:
+    """Records catalog queries and answers them with a fixed schema"""
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def execute(self, query):
+        self.queries.append(query)
+        return self
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        self.closed = True
+
+
+def test_zoom_to_tolerance_at_zoom_zero():
+    # One 256px tile spans the globe at zoom 0
+    assert zoom_to_tolerance(0) == pytest.approx(360.0 / 256 * settings.SIMPLIFY_PIXEL_TOLERANCE)
+
+
+def test_zoom_to_tolerance_halves_per_zoom_level():
+    for zoom in range(0, 20):
+        assert zoom_to_tolerance(zoom + 1) == pytest.approx(zoom_to_tolerance(zoom) / 2)
+    assert zoom_to_tolerance(8.5) < zoom_to_tolerance(8)
+
+
+def test_simplified_geometry_columns_use_given_cursor():
+    # Without a connection, any lookup not run on the cursor fails
+    client = DuckDBClient.__new__(DuckDBClient)
+    client.connection = None
+    client._catalog_lock = threading.Lock()
+    client._catalog_cache = {}
+    cursor = StubCursor([
+        ("id", "INTEGER"),
+        ("geometry", "BLOB"),
+        (f"{SIMPLIFIED_GEOMETRY_PREFIX}4", "BLOB"),
+        (f"{SIMPLIFIED_GEOMETRY_PREFIX}12", "BLOB"),
+        (f"{SIMPLIFIED_GEOMETRY_PREFIX}x", "BLOB"),
+    ])
+    
+    columns = client.get_simplified_geometry_columns("parcels", cursor)
+    
+    assert columns == {4: f"{SIMPLIFIED_GEOMETRY_PREFIX}4", 12: f"{SIMPLIFIED_GEOMETRY_PREFIX}12"}
+    assert len(cursor.queries) == 1
+
+
+def test_resolve_geometry_looks_up_columns_off_the_event_loop(monkeypatch):
+    loop_thread = threading.get_ident()
+    cursor = StubCursor([("geometry", "BLOB"), (f"{SIMPLIFIED_GEOMETRY_PREFIX}10", "BLOB")])
+    lookup_threads = []
+    
+    class StubDuckDBClient:
+        def cursor(self):
+            return cursor
+        
+        def get_simplified_geometry_columns(self, table_name, cursor=None):
+            lookup_threads.append(threading.get_ident())
+            return DuckDBClient.get_simplified_geometry_columns(client, table_name, cursor)
+    
+    client = DuckDBClient.__new__(DuckDBClient)
+    client.connection = None
+    client._catalog_lock = threading.Lock()
+    client._catalog_cache = {}
+    monkeypatch.setattr(collections, "get_duckdb_client", StubDuckDBClient)
+    
+    resolved = asyncio.run(collections.resolve_geometry("parcels", zoom=8))
+    
+    assert resolved == (f"{SIMPLIFIED_GEOMETRY_PREFIX}10", None, [f"{SIMPLIFIED_GEOMETRY_PREFIX}10"])
+    assert lookup_threads and lookup_threads[0] != loop_thread
+    assert cursor.closed
@@ -3,9 +3,241 @@ Sample ETL script for loading geospatial data into Iceberg via DuckDB
 """
 import duckdb
 import argparse
+import json
 import os
 import sys
+from datetime import datetime, timedelta
 from pathlib import Path
+import pyarrow as pa
+from pyiceberg.catalog import load_catalog
+from pyiceberg.exceptions import NoSuchTableError
+
+# Table property telling the OGC API which column drives the `datetime` filter
+DATETIME_COLUMN_PROPERTY = "ogc.datetime-column"
+
+TIME_PARTITION_TRANSFORMS = ("day", "month", "year")
+
+# Table properties describing adaptive H3 partitioning
+H3_PARTITIONING_PROPERTY = "ogc.h3-partitioning"
+H3_RESOLUTIONS_PROPERTY = "ogc.h3-resolutions"
+
+# Table properties holding per-column statistics and the snapshot they describe
+COLUMN_STATS_PROPERTY = "ogc.column-stats"
+COLUMN_STATS_SNAPSHOT_PROPERTY = "ogc.column-stats-snapshot"
+HISTOGRAM_BINS = 10
+MAX_CATEGORIES = 20
+INTEGER_TYPES = ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT")
+NUMBER_TYPES = ("FLOAT", "DOUBLE", "REAL")
+EPOCH = datetime(1970, 1, 1)
+
+# Precomputed simplified geometries are stored as geometry_z{zoom}; the OGC API
+# picks the closest one for the requested zoom
+SIMPLIFIED_GEOMETRY_PREFIX = "geometry_z"
+SIMPLIFY_PIXEL_TOLERANCE = 0.5
+
+
+def zoom_to_tolerance(zoom: int) -> float:
+    """Simplification tolerance in degrees for a web map zoom level (matches the OGC API)"""
+    return 360.0 / (256 * 2 ** zoom) * SIMPLIFY_PIXEL_TOLERANCE
+
+
+def current_snapshot_id(polaris_endpoint: str, table_name: str):
+    """Current snapshot id of an Iceberg table, or None if it has no snapshot or does not exist"""
+    catalog = load_catalog("polaris", type="rest", uri=polaris_endpoint, warehouse="polaris")
+    try:
+        table = catalog.load_table(("default", table_name))
+    except NoSuchTableError:
+        return None
+    snapshot = table.current_snapshot()
+    return snapshot.snapshot_id if snapshot else None
+
+
+def set_table_properties(polaris_endpoint: str, table_name: str, properties: dict, previous_snapshot_id=None):
+    """Set Iceberg table properties through the Polaris REST catalog
+    
+    Column statistics are only written when the table has a snapshot other than
+    previous_snapshot_id, i.e. when this load actually wrote the data they describe.
+    """
+    catalog = load_catalog("polaris", type="rest", uri=polaris_endpoint, warehouse="polaris")
+    table = catalog.load_table(("default", table_name))
+    if COLUMN_STATS_PROPERTY in properties:
+        # Statistics describe the snapshot just written; the OGC API ignores them once it changes
+        snapshot = table.current_snapshot()
+        if snapshot is None or snapshot.snapshot_id == previous_snapshot_id:
+            print("  No new snapshot written; keeping the existing column statistics")
+            properties = {key: value for key, value in properties.items() if key != COLUMN_STATS_PROPERTY}
+        else:
+            properties = {**properties, COLUMN_STATS_SNAPSHOT_PROPERTY: str(snapshot.snapshot_id)}
+    if not properties:
+        return
+    with table.transaction() as transaction:
+        transaction.set_properties(**properties)
+
+
+def detect_datetime_column(columns: list) -> str:
+    """Return the first TIMESTAMP or DATE column from DESCRIBE output, if any"""
+    for name, column_type, *_ in columns:
+        if column_type.upper().startswith("TIMESTAMP") or column_type.upper() == "DATE":
+            return name
+    return None
+
+
+def column_kind(column_type: str) -> str:
+    """Statistics kind for a DuckDB column type, or None for types without statistics"""
+    column_type = column_type.upper()
+    if column_type.startswith("TIMESTAMP") or column_type == "DATE":
+        return "datetime"
+    if column_type in INTEGER_TYPES:
+        return "integer"
+    if column_type in NUMBER_TYPES or column_type.startswith("DECIMAL"):
+        return "number"
+    if column_type == "VARCHAR":
+        return "string"
+    if column_type == "BOOLEAN":
+        return "boolean"
+    return None
+
+
+def compute_column_stats(conn, source: str, columns: list) -> dict:
+    """
+    Compute min/max, null and distinct counts and histograms for each column
+    
+    Numeric and temporal columns get an equal-width histogram of HISTOGRAM_BINS
+    bins; strings and booleans with at most MAX_CATEGORIES distinct values get
+    their value counts. Temporal values are ISO 8601 strings.
+    """
+    kinds = {name: column_kind(column_type) for name, column_type, *_ in columns}
+    kinds = {name: kind for name, kind in kinds.items() if kind is not None}
+    if not kinds:
+        return {}
+    
+    aggregates = ", ".join(
+        f'MIN("{name}"), MAX("{name}"), COUNT(*) - COUNT("{name}"), approx_count_distinct("{name}")'
+        for name in kinds
+    )
+    row = conn.execute(f"SELECT {aggregates} FROM {source}").fetchone()
+    
+    stats = {}
+    for i, (name, kind) in enumerate(kinds.items()):
+        minimum, maximum, null_count, distinct_count = row[4 * i:4 * i + 4]
+        column = {"type": kind, "nullCount": null_count, "distinctCount": distinct_count}
+        if minimum is not None:
+            if kind == "datetime":
+                minimum, maximum = minimum.isoformat(), maximum.isoformat()
+            elif kind == "number":
+                minimum, maximum = float(minimum), float(maximum)
+            column["min"], column["max"] = minimum, maximum
+        
+        if kind in ("string", "boolean"):
+            if distinct_count <= MAX_CATEGORIES:
+                values = conn.execute(f"""
+                    SELECT CAST("{name}" AS VARCHAR), COUNT(*)
+                    FROM {source}
+                    WHERE "{name}" IS NOT NULL
+                    GROUP BY 1
+                    ORDER BY 2 DESC
+                    LIMIT {MAX_CATEGORIES}
+                """).fetchall()
+                column["values"] = dict(values)
+        elif minimum is not None:
+            column["histogram"] = compute_histogram(conn, source, name, kind)
+        
+        stats[name] = column
+    return stats
+
+
+def compute_geometry_stats(conn, source: str) -> dict:
+    """Null count and largest bbox diagonal (degrees) of the WKB geometry column"""
+    null_count, max_extent = conn.execute(f"""
+        SELECT COUNT(*) - COUNT(g), MAX(sqrt(power(ST_XMax(g) - ST_XMin(g), 2) + power(ST_YMax(g) - ST_YMin(g), 2)))
+        FROM (SELECT ST_GeomFromWKB(geometry) AS g FROM {source})
+    """).fetchone()
+    # The OGC API sizes spatial joins from maxExtent
+    return {"type": "geometry", "nullCount": null_count, "maxExtent": max_extent or 0.0}
+
+
+def compute_histogram(conn, source: str, name: str, kind: str) -> dict:
+    """Equal-width histogram with HISTOGRAM_BINS + 1 bounds and HISTOGRAM_BINS counts"""
+    # Bin temporal values on epoch milliseconds
+    value = f'epoch_ms(CAST("{name}" AS TIMESTAMP))' if kind == "datetime" else f'CAST("{name}" AS DOUBLE)'
+    low, high = conn.execute(f"SELECT MIN({value}), MAX({value}) FROM {source}").fetchone()
+    width = (high - low) / HISTOGRAM_BINS or 1
+    
+    counts = [0] * HISTOGRAM_BINS
+    for bin_index, count in conn.execute(f"""
+        SELECT LEAST(CAST(FLOOR(({value} - {low!r}) / {width!r}) AS INTEGER), {HISTOGRAM_BINS - 1}), COUNT(*)
+        FROM {source}
+        WHERE "{name}" IS NOT NULL
+        GROUP BY 1
+    """).fetchall():
+        counts[bin_index] = count
+    
+    bounds = [low + width * i for i in range(HISTOGRAM_BINS + 1)]
+    if kind == "datetime":
+        bounds = [(EPOCH + timedelta(milliseconds=bound)).isoformat() for bound in bounds]
+    return {"bounds": bounds, "counts": counts}
+
+
+def plan_adaptive_partitions(
+    cell_counts: list,
+    base_resolution: int,
+    min_resolution: int,
+    max_resolution: int,
+    min_rows: int,
+    max_rows: int
+) -> dict:
+    """
+    Choose mixed-resolution H3 partitions so partitions hold min_rows..max_rows rows
+    
+    Args:
+        cell_counts: (ancestors, count) pairs per populated cell at max_resolution, where
+                     ancestors lists the cell's ancestors from min_resolution to max_resolution
+        base_resolution: Resolution to start from (the OGC API's covering resolution)
+        min_resolution: Coarsest resolution sparse cells may merge up to
+        max_resolution: Finest resolution dense cells may split down to
+        min_rows: Partitions below this size are merged with their siblings
+        max_rows: Partitions above this size are split into their children
+    
+    Returns:
+        Mapping from each populated max_resolution cell to its partition cell
+    """
+    counts = {}
+    children = {}
+    for ancestors, count in cell_counts:
+        for depth, cell in enumerate(ancestors):
+            counts[cell] = counts.get(cell, 0) + count
+            if depth > 0:
+                children.setdefault(ancestors[depth - 1], set()).add(cell)
+    
+    base_depth = base_resolution - min_resolution
+    base_cells = {ancestors[base_depth] for ancestors, _ in cell_counts}
+    
+    # Split dense cells into their children, down to max_resolution
+    partitions = set()
+    pending = [(cell, base_resolution) for cell in base_cells]
+    while pending:
+        cell, resolution = pending.pop()
+        if counts[cell] > max_rows and resolution < max_resolution:
+            pending.extend((child, resolution + 1) for child in children[cell])
+        else:
+            partitions.add(cell)
+    
+    # Merge sparse siblings into their parent, up to min_resolution
+    for depth in range(base_depth - 1, -1, -1):
+        parents = {ancestors[depth] for ancestors, _ in cell_counts}
+        for parent in parents:
+            siblings = children[parent]
+            if not siblings <= partitions:
+                continue
+            if counts[parent] <= max_rows and counts[parent] / len(siblings) < min_rows:
+                partitions -= siblings
+                partitions.add(parent)
+    
+    # Each fine cell belongs to its one ancestor (or itself) that became a partition
+    return {
+        ancestors[-1]: next(cell for cell in ancestors if cell in partitions)
+        for ancestors, _ in cell_counts
+    }
 
 
 def load_geospatial_data(
@@ -14,7 +246,15 @@ def load_geospatial_data(
     polaris_endpoint: str,
     s3_bucket: str,
     aws_region: str = "us-west-2",
-    h3_resolution: int = 5
+    h3_resolution: int = 5,
+    datetime_column: str = None,
+    time_partition: str = None,
+    simplify_zooms: list = None,
+    adaptive_partitions: bool = False,
+    min_resolution: int = None,
+    max_resolution: int = None,
+    partition_min_rows: int = 10_000,
+    partition_max_rows: int = 1_000_000
 ):
     """
     Load geospatial data into Iceberg table with H3 partitioning
@@ -26,6 +266,14 @@ def load_geospatial_data(
         s3_bucket: S3 bucket for data storage
         aws_region: AWS region
         h3_resolution: H3 resolution for partitioning (default: 5)
+        datetime_column: Timestamp column for temporal queries (default: auto-detect)
+        time_partition: Optional time partition transform on the datetime column (day, month, year)
+        simplify_zooms: Zoom levels to precompute simplified geometry columns for
+        adaptive_partitions: Split dense and merge sparse H3 cells to even out partition sizes
+        min_resolution: Coarsest adaptive resolution (default: h3_resolution - 2)
+        max_resolution: Finest adaptive resolution (default: h3_resolution + 3)
+        partition_min_rows: Target minimum rows per adaptive partition
+        partition_max_rows: Target maximum rows per adaptive partition
     """
     print(f"Loading data from {input_file}...")
     print(f"Target table: {table_name}")
@@ -75,8 +323,38 @@ def load_geospatial_data(
     
     geom_col = 'geom' if 'geom' in columns else 'geometry'
     
-    # Add H3 partition column
-    print(f"Computing H3 cells at resolution {h3_resolution}...")
+    # Resolve the temporal column
+    if datetime_column is None:
+        datetime_column = detect_datetime_column(result)
+    elif datetime_column not in columns:
+        print(f"Error: Datetime column not found in input data: {datetime_column}")
+        sys.exit(1)
+    
+    if datetime_column:
+        print(f"Temporal column: {datetime_column}")
+    elif time_partition:
+        print("Error: --time-partition requires a timestamp column")
+        sys.exit(1)
+    
+    # Precompute simplified geometries for low zoom levels
+    simplified_sql = ""
+    for zoom in sorted(simplify_zooms or []):
+        tolerance = zoom_to_tolerance(zoom)
+        print(f"Simplifying geometries for zoom {zoom} (tolerance {tolerance:.6f} degrees)...")
+        simplified_sql += (
+            f",\n        ST_AsWKB(ST_SimplifyPreserveTopology({geom_col}, {tolerance!r}))"
+            f" as {SIMPLIFIED_GEOMETRY_PREFIX}{zoom}"
+        )
+    
+    # Add H3 partition column (at the finest resolution when partitioning adaptively)
+    if adaptive_partitions:
+        min_resolution = max(h3_resolution - 2, 0) if min_resolution is None else min_resolution
+        max_resolution = min(h3_resolution + 3, 15) if max_resolution is None else max_resolution
+        if not min_resolution <= h3_resolution <= max_resolution:
+            print("Error: adaptive resolutions must satisfy min <= --h3-resolution <= max")
+            sys.exit(1)
+    cell_resolution = max_resolution if adaptive_partitions else h3_resolution
+    print(f"Computing H3 cells at resolution {cell_resolution}...")
     h3_sql = f"""
     CREATE TABLE source_with_h3 AS
     SELECT 
@@ -85,10 +363,10 @@ def load_geospatial_data(
             h3_latlng_to_cell(
                 ST_Y(ST_Centroid({geom_col})),
                 ST_X(ST_Centroid({geom_col})),
-                {h3_resolution}
+                {cell_resolution}
             )
         ) as h3_cell,
-        ST_AsWKB({geom_col}) as geometry
+        ST_AsWKB({geom_col}) as geometry{simplified_sql}
     FROM source_data
     """
     conn.execute(h3_sql)
@@ -96,10 +374,61 @@ def load_geospatial_data(
     # Remove original geometry column to avoid duplication
     conn.execute(f"ALTER TABLE source_with_h3 DROP COLUMN {geom_col}")
     
+    table_properties = {}
+    if adaptive_partitions:
+        print(f"Planning adaptive partitions ({partition_min_rows:,}-{partition_max_rows:,} rows, "
+              f"resolutions {min_resolution}-{max_resolution})...")
+        ancestor_cols = ", ".join(
+            f"h3_cell_to_parent(h3_cell, {resolution})"
+            for resolution in range(min_resolution, max_resolution + 1)
+        )
+        rows = conn.execute(f"""
+            SELECT [{ancestor_cols}] AS ancestors, COUNT(*) AS count
+            FROM source_with_h3
+            GROUP BY ALL
+        """).fetchall()
+        mapping = plan_adaptive_partitions(
+            rows, h3_resolution, min_resolution, max_resolution, partition_min_rows, partition_max_rows
+        )
+        
+        # Replace each fine cell with its partition cell
+        conn.register("cell_partitions", pa.table({
+            "cell": list(mapping.keys()),
+            "partition_cell": list(mapping.values())
+        }))
+        conn.execute("""
+            CREATE TABLE source_partitioned AS
+            SELECT s.* REPLACE (p.partition_cell AS h3_cell)
+            FROM source_with_h3 s
+            JOIN cell_partitions p ON s.h3_cell = p.cell
+        """)
+        conn.execute("DROP TABLE source_with_h3")
+        conn.execute("ALTER TABLE source_partitioned RENAME TO source_with_h3")
+        
+        resolutions = conn.execute("""
+            SELECT h3_get_resolution(h3_cell) AS resolution, COUNT(DISTINCT h3_cell), MIN(n), MAX(n)
+            FROM (SELECT h3_cell, COUNT(*) OVER (PARTITION BY h3_cell) AS n FROM source_with_h3)
+            GROUP BY resolution
+            ORDER BY resolution
+        """).fetchall()
+        for resolution, cells, smallest, largest in resolutions:
+            print(f"  Resolution {resolution}: {cells} partitions, {smallest:,}-{largest:,} rows")
+        
+        table_properties[H3_PARTITIONING_PROPERTY] = "adaptive"
+        table_properties[H3_RESOLUTIONS_PROPERTY] = ",".join(str(r) for r, *_ in resolutions)
+    
     # Count features
     count = conn.execute("SELECT COUNT(*) FROM source_with_h3").fetchone()[0]
     print(f"Processing {count:,} features...")
     
+    # Per-column statistics for the OGC API queryables/statistics endpoints and query planning
+    print("Computing column statistics...")
+    stats_columns = [column for column in result if column[0] not in (geom_col, "h3_cell")]
+    column_stats = compute_column_stats(conn, "source_with_h3", stats_columns)
+    column_stats["geometry"] = compute_geometry_stats(conn, "source_with_h3")
+    table_properties[COLUMN_STATS_PROPERTY] = json.dumps(column_stats, default=str)
+    print(f"  {len(column_stats)} columns")
+    
     # Get H3 cell distribution
     h3_dist = conn.execute("""
         SELECT h3_cell, COUNT(*) as count 
@@ -112,19 +441,33 @@ def load_geospatial_data(
     for cell, cnt in h3_dist[:5]:
         print(f"  {cell}: {cnt:,} features")
     
-    # Create Iceberg table with H3 partitioning
+    # Create Iceberg table with H3 (and optionally time) partitioning
+    partition_cols = ["h3_cell"]
+    if time_partition:
+        partition_cols.append(f"{time_partition}({datetime_column})")
+    
     print(f"Creating Iceberg table: {table_name}...")
     create_table_sql = f"""
     CREATE TABLE IF NOT EXISTS polaris.default.{table_name} (
         SELECT * FROM source_with_h3
     )
-    PARTITION BY (h3_cell)
+    PARTITION BY ({", ".join(partition_cols)})
     """
     
     try:
+        # CREATE TABLE IF NOT EXISTS writes nothing for an existing table, which the
+        # column statistics must not be stamped onto
+        previous_snapshot_id = current_snapshot_id(polaris_endpoint, table_name)
         conn.execute(create_table_sql)
         print(f"✓ Table {table_name} created successfully!")
         
+        if datetime_column:
+            table_properties[DATETIME_COLUMN_PROPERTY] = datetime_column
+        if table_properties:
+            set_table_properties(polaris_endpoint, table_name, table_properties, previous_snapshot_id)
+        if datetime_column:
+            print(f"✓ Registered {datetime_column} as temporal column")
+        
         # Verify table
         table_count = conn.execute(
             f"SELECT COUNT(*) FROM polaris.default.{table_name}"
@@ -165,6 +508,26 @@ def main():
     parser.add_argument("--s3-bucket", required=True, help="S3 bucket name")
     parser.add_argument("--aws-region", default="us-west-2", help="AWS region")
     parser.add_argument("--h3-resolution", type=int, default=5, help="H3 resolution (default: 5)")
+    parser.add_argument("--datetime-column", help="Timestamp column for temporal queries (default: auto-detect)")
+    parser.add_argument(
+        "--time-partition",
+        choices=TIME_PARTITION_TRANSFORMS,
+        help="Also partition by day/month/year of the datetime column"
+    )
+    parser.add_argument(
+        "--simplify-zooms",
+        type=lambda value: [int(z) for z in value.split(",") if z.strip()],
+        help="Comma-separated zoom levels to precompute simplified geometries for (e.g. 4,8,12)"
+    )
+    parser.add_argument(
+        "--adaptive-partitions",
+        action="store_true",
+        help="Split dense H3 cells to finer resolutions and merge sparse ones into parents"
+    )
+    parser.add_argument("--min-resolution", type=int, help="Coarsest adaptive H3 resolution (default: --h3-resolution - 2)")
+    parser.add_argument("--max-resolution", type=int, help="Finest adaptive H3 resolution (default: --h3-resolution + 3)")
+    parser.add_argument("--partition-min-rows", type=int, default=10_000, help="Target minimum rows per partition")
+    parser.add_argument("--partition-max-rows", type=int, default=1_000_000, help="Target maximum rows per partition")
     
     args = parser.parse_args()
     
@@ -179,7 +542,15 @@ def main():
         polaris_endpoint=args.polaris_endpoint,
         s3_bucket=args.s3_bucket,
         aws_region=args.aws_region,
-        h3_resolution=args.h3_resolution
+        h3_resolution=args.h3_resolution,
+        datetime_column=args.datetime_column,
+        time_partition=args.time_partition,
+        simplify_zooms=args.simplify_zooms,
+        adaptive_partitions=args.adaptive_partitions,
+        min_resolution=args.min_resolution,
+        max_resolution=args.max_resolution,
+        partition_min_rows=args.partition_min_rows,
+        partition_max_rows=args.partition_max_rows
     )
 
 
@@ -0,0 +1,72 @@
+"""
+Mixed-resolution H3 partition planning
+"""
+import h3
+
+from sample_load import plan_adaptive_partitions
+
+MIN_RESOLUTION, BASE_RESOLUTION, MAX_RESOLUTION = 4, 5, 6
+PARENT = h3.latlng_to_cell(45.5, -122.6, MIN_RESOLUTION)
+
+
+def cell_counts(counts):
+    """(ancestors, count) pairs for fine cells given as {cell: count}"""
+    return [
+        ([h3.cell_to_parent(cell, res) for res in range(MIN_RESOLUTION, MAX_RESOLUTION)] + [cell], count)
+        for cell, count in counts.items()
+    ]
+
+
+def plan(counts, min_rows=50, max_rows=500):
+    return plan_adaptive_partitions(
+        cell_counts(counts), BASE_RESOLUTION, MIN_RESOLUTION, MAX_RESOLUTION, min_rows, max_rows
+    )
+
+
+def first_children(resolution):
+    """One fine cell under each child of PARENT at the given resolution"""
+    return [
+        h3.cell_to_center_child(child, MAX_RESOLUTION)
+        for child in h3.cell_to_children(PARENT, resolution)
+    ]
+
+
+def test_dense_cell_splits_into_children():
+    base_cell = h3.cell_to_children(PARENT, BASE_RESOLUTION)[0]
+    fine_cells = h3.cell_to_children(base_cell, MAX_RESOLUTION)
+    mapping = plan({cell: 100 for cell in fine_cells})
+    
+    assert mapping == {cell: cell for cell in fine_cells}
+
+
+def test_sparse_siblings_merge_into_parent():
+    mapping = plan({cell: 10 for cell in first_children(BASE_RESOLUTION)})
+    assert set(mapping.values()) == {PARENT}
+
+
+def test_balanced_cells_stay_at_base_resolution():
+    mapping = plan({cell: 100 for cell in first_children(BASE_RESOLUTION)})
+    
+    assert len(set(mapping.values())) == len(mapping)
+    for cell, partition in mapping.items():
+        assert partition == h3.cell_to_parent(cell, BASE_RESOLUTION)
+
+
+def test_splitting_stops_at_max_resolution():
+    cell = first_children(BASE_RESOLUTION)[0]
+    assert plan({cell: 10_000}) == {cell: cell}
+
+
+def test_dense_sibling_blocks_merge():
+    fine_cells = first_children(BASE_RESOLUTION)
+    dense = fine_cells[0]
+    counts = {cell: 1 for cell in fine_cells}
+    # A split base cell keeps its siblings at the base resolution
+    dense_base = h3.cell_to_parent(dense, BASE_RESOLUTION)
+    counts.update({cell: 300 for cell in h3.cell_to_children(dense_base, MAX_RESOLUTION)})
+    mapping = plan(counts)
+    
+    assert PARENT not in mapping.values()
+    assert mapping[dense] == dense
+    for cell in fine_cells[1:]:
+        assert mapping[cell] == h3.cell_to_parent(cell, BASE_RESOLUTION)
@@ -0,0 +1,62 @@
+"""
+Column statistics stored in the ogc.column-stats table property
+"""
+from datetime import datetime
+
+import duckdb
+import pytest
+
+from sample_load import HISTOGRAM_BINS, compute_column_stats, compute_histogram
+
+
+@pytest.fixture
+def conn():
+    conn = duckdb.connect()
+    conn.execute("""
+        CREATE TABLE source AS
+        SELECT
+            i AS value,
+            TIMESTAMP '2024-01-01' + INTERVAL (i) DAY AS observed_at,
+            CASE WHEN i % 2 = 0 THEN 'even' ELSE 'odd' END AS parity
+        FROM range(100) t(i)
+    """)
+    conn.execute("INSERT INTO source VALUES (NULL, NULL, NULL)")
+    yield conn
+    conn.close()
+
+
+def test_compute_histogram_numeric(conn):
+    histogram = compute_histogram(conn, "source", "value", "number")
+    
+    assert len(histogram["bounds"]) == HISTOGRAM_BINS + 1
+    assert histogram["bounds"][0] == 0 and histogram["bounds"][-1] == pytest.approx(99)
+    # Nulls are not binned; the maximum lands in the last bin
+    assert sum(histogram["counts"]) == 100
+    assert histogram["counts"][-1] == 10
+
+
+def test_compute_histogram_datetime(conn):
+    histogram = compute_histogram(conn, "source", "observed_at", "datetime")
+    
+    assert histogram["bounds"][0] == "2024-01-01T00:00:00"
+    assert datetime.fromisoformat(histogram["bounds"][-1]) == datetime(2024, 4, 9)
+    assert sum(histogram["counts"]) == 100
+
+
+def test_compute_histogram_single_value(conn):
+    conn.execute("CREATE TABLE constant AS SELECT 5 AS value FROM range(3)")
+    histogram = compute_histogram(conn, "constant", "value", "number")
+    assert histogram["counts"][0] == 3
+    assert sum(histogram["counts"]) == 3
+
+
+def test_compute_column_stats(conn):
+    columns = conn.execute("DESCRIBE source").fetchall()
+    stats = compute_column_stats(conn, "source", columns)
+    
+    assert stats["value"]["type"] == "integer"
+    assert (stats["value"]["min"], stats["value"]["max"]) == (0, 99)
+    assert stats["value"]["nullCount"] == 1
+    assert "histogram" in stats["value"]
+    assert stats["observed_at"]["min"] == "2024-01-01T00:00:00"
+    assert stats["parity"]["values"] == {"even": 50, "odd": 50}
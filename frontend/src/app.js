@@ -1,8 +1,19 @@
 import { Deck } from '@deck.gl/core';
-import { GeoJsonLayer, ScatterplotLayer } from '@deck.gl/layers';
-import { load } from '@loaders.gl/core';
-import { ArrowLoader } from '@loaders.gl/arrow';
+import { GeoJsonLayer } from '@deck.gl/layers';
+import { TileLayer } from '@deck.gl/geo-layers';
+import { ClipExtension } from '@deck.gl/extensions';
 import maplibregl from 'maplibre-gl';
+import { fetchWithRetry } from './fetch-retry.js';
+
+// Tile loading: features are fetched per web mercator tile and cached by tile key
+const TILE_SIZE = 512;
+const MAX_TILE_ZOOM = 16;
+const TILE_FEATURE_LIMIT = 10000;
+const TILE_CACHE_SIZE = 256;
+// The API runs MAX_QUERIES_PER_CLIENT (default 2) queries per client at once
+// and queues the rest; more parallel requests only wait longer server-side
+const MAX_TILE_REQUESTS = 2;
+const TILE_DEBOUNCE_MS = 150;
 
 // Application state
 const state = {
@@ -11,7 +22,26 @@ const state = {
     collections: [],
     deck: null,
     map: null,
-    useGeoArrow: false
+    useGeoArrow: false,
+    // Bumped by "Refresh Data" to drop the tile cache
+    generation: 0,
+    layerActive: false
+};
+
+// Arrow decoding runs in a worker; pending requests are keyed by message id
+const arrowWorker = new Worker(new URL('./arrow-worker.js', import.meta.url), { type: 'module' });
+const pendingDecodes = new Map();
+let nextDecodeId = 0;
+
+arrowWorker.onmessage = ({ data: { id, features, error } }) => {
+    const pending = pendingDecodes.get(id);
+    if (!pending) return;
+    pendingDecodes.delete(id);
+    if (error) {
+        pending.reject(new Error(error));
+    } else {
+        pending.resolve(features);
+    }
 };
 
 // DOM elements
@@ -72,13 +102,6 @@ function initializeMap() {
                 pitch: viewState.pitch
             });
             
-            // Debounced data refresh
-            if (state.selectedCollection && loadButton.textContent === 'Refresh Data') {
-                clearTimeout(state.refreshTimeout);
-                state.refreshTimeout = setTimeout(() => {
-                    loadFeatures();
-                }, 1000);
-            }
         },
         getTooltip: ({ object }) => {
             if (!object) return null;
@@ -150,128 +173,134 @@ async function fetchCollections() {
     }
 }
 
-// Load features from selected collection
-async function loadFeatures() {
-    if (!state.selectedCollection) return;
-
-    showLoading(true);
-    clearError();
-
-    try {
-        const viewState = state.deck.viewState;
-        const bounds = getViewportBounds(viewState);
-        const bbox = `${bounds.west},${bounds.south},${bounds.east},${bounds.north}`;
-
-        let url = `${state.apiEndpoint}/collections/${state.selectedCollection}/items?bbox=${bbox}&limit=10000`;
-        
-        let features;
-
-        if (state.useGeoArrow) {
-            // Fetch as GeoArrow
-            url += '&f=arrow';
-            const response = await fetch(url, {
-                headers: {
-                    'Accept': 'application/vnd.apache.arrow.stream'
-                }
-            });
-
-            if (!response.ok) {
-                throw new Error(`HTTP ${response.status}`);
-            }
-
-            const arrayBuffer = await response.arrayBuffer();
-            const arrowTable = await load(arrayBuffer, ArrowLoader);
-            
-            // Convert Arrow to features (simplified)
-            features = convertArrowToFeatures(arrowTable);
-
-        } else {
-            // Fetch as GeoJSON
-            const response = await fetch(url);
-            if (!response.ok) {
-                throw new Error(`HTTP ${response.status}`);
-            }
-
-            const geojson = await response.json();
-            features = geojson.features || [];
+// Decode an Arrow IPC buffer into GeoJSON features in the worker
+function decodeArrow(buffer, signal) {
+    return new Promise((resolve, reject) => {
+        const id = nextDecodeId++;
+        const onAbort = () => {
+            pendingDecodes.delete(id);
+            reject(new DOMException('Tile request aborted', 'AbortError'));
+        };
+        if (signal.aborted) {
+            onAbort();
+            return;
         }
-
-        // Create deck.gl layer
-        const layer = new GeoJsonLayer({
-            id: 'features-layer',
-            data: { type: 'FeatureCollection', features },
-            filled: true,
-            stroked: true,
-            lineWidthMinPixels: 1,
-            getFillColor: [0, 150, 255, 100],
-            getLineColor: [0, 100, 200, 255],
-            pickable: true
+        signal.addEventListener('abort', onAbort, { once: true });
+        pendingDecodes.set(id, {
+            resolve: features => {
+                signal.removeEventListener('abort', onAbort);
+                resolve(features);
+            },
+            reject: error => {
+                signal.removeEventListener('abort', onAbort);
+                reject(error);
+            }
         });
+        arrowWorker.postMessage({ id, buffer }, [buffer]);
+    });
+}
 
-        state.deck.setProps({ layers: [layer] });
-
-        loadButton.textContent = 'Refresh Data';
-        showError('');
-
-        // Update info
-        document.getElementById('info').innerHTML = `
-            <strong>${state.selectedCollection}</strong><br>
-            Loaded ${features.length.toLocaleString()} features<br>
-            ${state.useGeoArrow ? '(GeoArrow format)' : '(GeoJSON format)'}
-        `;
-
-    } catch (error) {
-        console.error('Error loading features:', error);
-        showError(`Failed to load features: ${error.message}`);
-    } finally {
-        showLoading(false);
+// Fetch the features of one tile; the signal aborts it once the tile is no longer needed.
+// Resolves to { features, truncated }, truncated when the tile holds more than was returned.
+async function fetchTile(collection, useGeoArrow, { index, bbox, signal }) {
+    const tileBbox = `${bbox.west},${bbox.south},${bbox.east},${bbox.north}`;
+    let url = `${state.apiEndpoint}/collections/${collection}/items?bbox=${tileBbox}&limit=${TILE_FEATURE_LIMIT}&zoom=${index.z}&count=none`;
+
+    if (useGeoArrow) {
+        url += '&f=arrow';
+        const response = await fetchWithRetry(url, {
+            headers: {
+                'Accept': 'application/vnd.apache.arrow.stream'
+            },
+            signal
+        });
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        // Arrow responses carry no links: a full page means the tile was cut off
+        // (the server may have lowered the limit under load)
+        const downgraded = /limit=(\d+)/.exec(response.headers.get('X-Query-Downgraded') || '');
+        const limit = downgraded ? Number(downgraded[1]) : TILE_FEATURE_LIMIT;
+        const features = await decodeArrow(await response.arrayBuffer(), signal);
+        return { features, truncated: features.length >= limit };
     }
-}
 
-// Helper: Get viewport bounds
-function getViewportBounds(viewState) {
-    const { longitude, latitude, zoom } = viewState;
-    
-    // Approximate bounds calculation
-    const latRad = latitude * Math.PI / 180;
-    const metersPerPixel = 156543.03392 * Math.cos(latRad) / Math.pow(2, zoom);
-    const viewportWidth = window.innerWidth;
-    const viewportHeight = window.innerHeight;
-    
-    const metersWidth = viewportWidth * metersPerPixel;
-    const metersHeight = viewportHeight * metersPerPixel;
-    
-    const degreesPerMeterLon = 1 / 111320;
-    const degreesPerMeterLat = 1 / 110540;
-    
-    const deltaLon = (metersWidth / 2) * degreesPerMeterLon;
-    const deltaLat = (metersHeight / 2) * degreesPerMeterLat;
-    
+    const response = await fetchWithRetry(url, { signal });
+    if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`);
+    }
+    const geojson = await response.json();
     return {
-        west: longitude - deltaLon,
-        south: latitude - deltaLat,
-        east: longitude + deltaLon,
-        north: latitude + deltaLat
+        features: geojson.features || [],
+        truncated: (geojson.links || []).some(link => link.rel === 'next')
     };
 }
 
-// Helper: Convert Arrow table to GeoJSON features (simplified)
-function convertArrowToFeatures(arrowTable) {
-    // This is a simplified conversion
-    // In production, use proper Arrow to GeoJSON conversion
-    const features = [];
-    const numRows = arrowTable.numRows;
-    
-    for (let i = 0; i < numRows; i++) {
-        const row = arrowTable.get(i);
-        features.push({
-            type: 'Feature',
-            properties: row,
-            geometry: null // Would need proper geometry parsing
-        });
+// Build the tile layer for the selected collection
+function createFeatureLayer() {
+    const collection = state.selectedCollection;
+    const useGeoArrow = state.useGeoArrow;
+
+    return new TileLayer({
+        // A new id (collection, format or refresh) starts a new tile cache and aborts the old requests
+        id: `features-${collection}-${useGeoArrow ? 'arrow' : 'json'}-${state.generation}`,
+        getTileData: tile => fetchTile(collection, useGeoArrow, tile),
+        tileSize: TILE_SIZE,
+        maxZoom: MAX_TILE_ZOOM,
+        maxCacheSize: TILE_CACHE_SIZE,
+        maxRequests: MAX_TILE_REQUESTS,
+        debounceTime: TILE_DEBOUNCE_MS,
+        // Keep showing cached parent/child tiles until the new ones arrive
+        refinementStrategy: 'best-available',
+        pickable: true,
+        onViewportLoad: tiles => {
+            showLoading(false);
+            const loaded = tiles.filter(tile => tile.content);
+            const count = loaded.reduce((total, tile) => total + tile.content.features.length, 0);
+            const truncated = loaded.filter(tile => tile.content.truncated).length;
+            document.getElementById('info').innerHTML = `
+                <strong>${collection}</strong><br>
+                Showing ${count.toLocaleString()} features in ${tiles.length} tiles<br>
+                ${truncated ? `<span class="warning">${truncated} tiles hit the feature limit; zoom in to see all features</span><br>` : ''}
+                ${useGeoArrow ? '(GeoArrow format)' : '(GeoJSON format)'}
+            `;
+        },
+        onTileError: error => {
+            if (error.name === 'AbortError') return;
+            showLoading(false);
+            console.error('Error loading tile:', error);
+            showError(`Failed to load features: ${error.message}`);
+        },
+        renderSubLayers: props => {
+            const { west, south, east, north } = props.tile.bbox;
+            // Features crossing tile edges come back with every tile they touch;
+            // clipping draws each part once
+            return new GeoJsonLayer(props, {
+                data: { type: 'FeatureCollection', features: props.data ? props.data.features : [] },
+                filled: true,
+                stroked: true,
+                lineWidthMinPixels: 1,
+                getFillColor: [0, 150, 255, 100],
+                getLineColor: [0, 100, 200, 255],
+                extensions: [new ClipExtension()],
+                clipBounds: [west, south, east, north]
+            });
+        }
+    });
+}
+
+// Show features from the selected collection; tiles load as the view changes
+function loadFeatures() {
+    if (!state.selectedCollection) return;
+
+    showLoading(true);
+    clearError();
+    if (state.layerActive) {
+        state.generation++;
     }
-    
-    return features;
+    state.layerActive = true;
+    state.deck.setProps({ layers: [createFeatureLayer()] });
+    loadButton.textContent = 'Refresh Data';
 }
 
 // UI helpers
@@ -303,6 +332,9 @@ collectionSelect.addEventListener('change', (e) => {
 
 useGeoArrowCheckbox.addEventListener('change', (e) => {
     state.useGeoArrow = e.target.checked;
+    if (state.layerActive) {
+        state.deck.setProps({ layers: [createFeatureLayer()] });
+    }
 });
 
 loadButton.addEventListener('click', loadFeatures);
@@ -0,0 +1,49 @@
+// Decodes GeoArrow tile responses off the main thread
+import { tableFromIPC } from 'apache-arrow';
+import { parseWkb } from './wkb.js';
+
+// Columns managed by the platform rather than shown as properties
+const INTERNAL_COLUMNS = ['geometry', 'h3_cell'];
+
+self.onmessage = ({ data: { id, buffer } }) => {
+    try {
+        const features = arrowToFeatures(tableFromIPC(new Uint8Array(buffer)));
+        self.postMessage({ id, features });
+    } catch (error) {
+        self.postMessage({ id, error: error.message });
+    }
+};
+
+// Convert an Arrow table with a WKB geometry column to GeoJSON features
+function arrowToFeatures(table) {
+    const geometry = table.getChild('geometry');
+    const columns = table.schema.fields
+        .map(field => field.name)
+        .filter(name => !INTERNAL_COLUMNS.includes(name));
+    const vectors = columns.map(name => table.getChild(name));
+
+    const features = new Array(table.numRows);
+    for (let i = 0; i < table.numRows; i++) {
+        const properties = {};
+        columns.forEach((name, j) => {
+            properties[name] = toPlainValue(vectors[j].get(i));
+        });
+
+        const wkb = geometry ? geometry.get(i) : null;
+        features[i] = {
+            type: 'Feature',
+            id: properties.id,
+            properties,
+            geometry: wkb ? parseWkb(wkb) : null
+        };
+    }
+
+    return features;
+}
+
+// Arrow values that structured cloning and tooltips can handle
+function toPlainValue(value) {
+    if (typeof value === 'bigint') return Number(value);
+    if (value && typeof value.toJSON === 'function') return value.toJSON();
+    return value;
+}
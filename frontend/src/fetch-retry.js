@@ -0,0 +1,42 @@
+// fetch with retries for responses the API asks clients to retry
+
+// 429 (per-client query limit) and 503 (server busy) carry a Retry-After header
+const RETRYABLE_STATUSES = new Set([429, 503]);
+const DEFAULT_RETRY_AFTER_MS = 1000;
+
+// Wait for `ms`, rejecting with an AbortError as soon as the signal aborts
+function sleep(ms, signal) {
+    return new Promise((resolve, reject) => {
+        if (signal && signal.aborted) {
+            reject(signal.reason);
+            return;
+        }
+        const onAbort = () => {
+            clearTimeout(timer);
+            reject(signal.reason);
+        };
+        const timer = setTimeout(() => {
+            if (signal) signal.removeEventListener('abort', onAbort);
+            resolve();
+        }, ms);
+        if (signal) signal.addEventListener('abort', onAbort, { once: true });
+    });
+}
+
+// Retry-After in seconds (the API never sends HTTP dates)
+function retryDelay(response) {
+    const seconds = Number(response.headers.get('Retry-After'));
+    return Number.isFinite(seconds) && seconds >= 0 ? seconds * 1000 : DEFAULT_RETRY_AFTER_MS;
+}
+
+// Like fetch, but waits out Retry-After on 429/503 up to `retries` times;
+// the last response is returned as is
+export async function fetchWithRetry(url, options = {}, { retries = 3, fetchImpl = fetch } = {}) {
+    for (let attempt = 0; ; attempt++) {
+        const response = await fetchImpl(url, options);
+        if (!RETRYABLE_STATUSES.has(response.status) || attempt >= retries) {
+            return response;
+        }
+        await sleep(retryDelay(response), options.signal);
+    }
+}
@@ -0,0 +1,51 @@
+// Well-known binary (WKB) geometry decoding
+
+// Parse ISO or extended WKB into a GeoJSON geometry (Z/M values are dropped)
+export function parseWkb(bytes) {
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    let offset = 0;
+
+    function readGeometry() {
+        const littleEndian = view.getUint8(offset) === 1;
+        let type = view.getUint32(offset + 1, littleEndian);
+        offset += 5;
+
+        // EWKB flags Z, M and SRID in the high bits; ISO codes Z/M/ZM as 1000s
+        let dimensions = 2;
+        if (type & 0x80000000) dimensions++;
+        if (type & 0x40000000) dimensions++;
+        if (type & 0x20000000) offset += 4;
+        type &= 0x0fffffff;
+        if (type >= 1000) {
+            dimensions += Math.floor(type / 1000) === 3 ? 2 : 1;
+            type %= 1000;
+        }
+
+        const readCount = () => {
+            const count = view.getUint32(offset, littleEndian);
+            offset += 4;
+            return count;
+        };
+        const readPoint = () => {
+            const position = [view.getFloat64(offset, littleEndian), view.getFloat64(offset + 8, littleEndian)];
+            offset += 8 * dimensions;
+            return position;
+        };
+        const readPoints = () => Array.from({ length: readCount() }, readPoint);
+        const readRings = () => Array.from({ length: readCount() }, readPoints);
+        const readParts = () => Array.from({ length: readCount() }, readGeometry);
+
+        switch (type) {
+            case 1: return { type: 'Point', coordinates: readPoint() };
+            case 2: return { type: 'LineString', coordinates: readPoints() };
+            case 3: return { type: 'Polygon', coordinates: readRings() };
+            case 4: return { type: 'MultiPoint', coordinates: readParts().map(part => part.coordinates) };
+            case 5: return { type: 'MultiLineString', coordinates: readParts().map(part => part.coordinates) };
+            case 6: return { type: 'MultiPolygon', coordinates: readParts().map(part => part.coordinates) };
+            case 7: return { type: 'GeometryCollection', geometries: readParts() };
+            default: throw new Error(`Unsupported WKB geometry type ${type}`);
+        }
+    }
+
+    return readGeometry();
+}
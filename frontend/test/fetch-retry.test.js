@@ -0,0 +1,45 @@
+import { test } from 'node:test';
+import assert from 'node:assert/strict';
+
+import { fetchWithRetry } from '../src/fetch-retry.js';
+
+// A fetch stand-in answering with the given statuses in turn
+function stubFetch(statuses, retryAfter = '0') {
+    const calls = [];
+    const fetchImpl = async (url, options) => {
+        calls.push(url);
+        const status = statuses[Math.min(calls.length - 1, statuses.length - 1)];
+        return new Response(null, { status, headers: { 'Retry-After': retryAfter } });
+    };
+    return { calls, fetchImpl };
+}
+
+test('retries 429 and 503 until the request is admitted', async () => {
+    const { calls, fetchImpl } = stubFetch([429, 503, 200]);
+    const response = await fetchWithRetry('/items', {}, { fetchImpl });
+    assert.equal(response.status, 200);
+    assert.equal(calls.length, 3);
+});
+
+test('returns the last response once retries run out', async () => {
+    const { calls, fetchImpl } = stubFetch([429]);
+    const response = await fetchWithRetry('/items', {}, { retries: 2, fetchImpl });
+    assert.equal(response.status, 429);
+    assert.equal(calls.length, 3);
+});
+
+test('does not retry other errors', async () => {
+    const { calls, fetchImpl } = stubFetch([400]);
+    const response = await fetchWithRetry('/items', {}, { fetchImpl });
+    assert.equal(response.status, 400);
+    assert.equal(calls.length, 1);
+});
+
+test('aborting stops the wait for Retry-After', async () => {
+    const { calls, fetchImpl } = stubFetch([429], '60');
+    const controller = new AbortController();
+    const pending = fetchWithRetry('/items', { signal: controller.signal }, { fetchImpl });
+    setTimeout(() => controller.abort(), 10);
+    await assert.rejects(pending, { name: 'AbortError' });
+    assert.equal(calls.length, 1);
+});
@@ -0,0 +1,100 @@
+import { test } from 'node:test';
+import assert from 'node:assert/strict';
+
+import { parseWkb } from '../src/wkb.js';
+
+// Encode WKB from a type code and values: numbers are float64 coordinates,
+// { count } a uint32 count and { bytes } an embedded geometry
+function wkb(type, values, { littleEndian = true, srid } = {}) {
+    const valueSize = value => (value.count !== undefined ? 4 : value.bytes ? value.bytes.length : 8);
+    const size = 5 + (srid !== undefined ? 4 : 0) + values.reduce((total, value) => total + valueSize(value), 0);
+    const bytes = new Uint8Array(size);
+    const view = new DataView(bytes.buffer);
+    view.setUint8(0, littleEndian ? 1 : 0);
+    view.setUint32(1, type, littleEndian);
+    let offset = 5;
+    if (srid !== undefined) {
+        view.setUint32(offset, srid, littleEndian);
+        offset += 4;
+    }
+    for (const value of values) {
+        if (value.count !== undefined) {
+            view.setUint32(offset, value.count, littleEndian);
+            offset += 4;
+        } else if (value.bytes) {
+            bytes.set(value.bytes, offset);
+            offset += value.bytes.length;
+        } else {
+            view.setFloat64(offset, value, littleEndian);
+            offset += 8;
+        }
+    }
+    return bytes;
+}
+
+test('point, little and big endian', () => {
+    assert.deepEqual(parseWkb(wkb(1, [1.5, -2.5])), { type: 'Point', coordinates: [1.5, -2.5] });
+    assert.deepEqual(
+        parseWkb(wkb(1, [1.5, -2.5], { littleEndian: false })),
+        { type: 'Point', coordinates: [1.5, -2.5] }
+    );
+});
+
+test('linestring and polygon', () => {
+    assert.deepEqual(parseWkb(wkb(2, [{ count: 2 }, 0, 0, 1, 1])), {
+        type: 'LineString',
+        coordinates: [[0, 0], [1, 1]]
+    });
+
+    const ring = [{ count: 4 }, 0, 0, 1, 0, 1, 1, 0, 0];
+    assert.deepEqual(parseWkb(wkb(3, [{ count: 1 }, ...ring])), {
+        type: 'Polygon',
+        coordinates: [[[0, 0], [1, 0], [1, 1], [0, 0]]]
+    });
+});
+
+test('multi geometries and collections', () => {
+    const points = [{ bytes: wkb(1, [0, 0]) }, { bytes: wkb(1, [2, 3]) }];
+    assert.deepEqual(parseWkb(wkb(4, [{ count: 2 }, ...points])), {
+        type: 'MultiPoint',
+        coordinates: [[0, 0], [2, 3]]
+    });
+
+    const polygon = wkb(3, [{ count: 1 }, { count: 4 }, 0, 0, 1, 0, 1, 1, 0, 0]);
+    assert.deepEqual(parseWkb(wkb(6, [{ count: 1 }, { bytes: polygon }])), {
+        type: 'MultiPolygon',
+        coordinates: [[[[0, 0], [1, 0], [1, 1], [0, 0]]]]
+    });
+
+    const line = wkb(2, [{ count: 2 }, 0, 0, 1, 1]);
+    assert.deepEqual(parseWkb(wkb(7, [{ count: 2 }, points[0], { bytes: line }])), {
+        type: 'GeometryCollection',
+        geometries: [
+            { type: 'Point', coordinates: [0, 0] },
+            { type: 'LineString', coordinates: [[0, 0], [1, 1]] }
+        ]
+    });
+});
+
+test('Z and M values are dropped', () => {
+    // ISO codes: 1001 = Point Z, 2002 = LineString M, 3001 = Point ZM
+    assert.deepEqual(parseWkb(wkb(1001, [1, 2, 3])).coordinates, [1, 2]);
+    assert.deepEqual(parseWkb(wkb(2002, [{ count: 2 }, 0, 0, 9, 1, 1, 9])).coordinates, [[0, 0], [1, 1]]);
+    assert.deepEqual(parseWkb(wkb(3001, [1, 2, 3, 4])).coordinates, [1, 2]);
+    // EWKB Z flag with an SRID
+    assert.deepEqual(
+        parseWkb(wkb(0x80000001 | 0x20000000, [1, 2, 3], { srid: 4326 })).coordinates,
+        [1, 2]
+    );
+});
+
+test('views into a larger buffer', () => {
+    const point = wkb(1, [4, 5]);
+    const buffer = new Uint8Array(point.length + 3);
+    buffer.set(point, 3);
+    assert.deepEqual(parseWkb(buffer.subarray(3)).coordinates, [4, 5]);
+});
+
+test('unsupported types throw', () => {
+    assert.throws(() => parseWkb(wkb(17, [])), /Unsupported WKB geometry type 17/);
+});